@@ -0,0 +1,14 @@
+"""
+Ad-hoc benchmarks, run against the configured database:
+
+    python -m benchmarks.<name>
+
+Every benchmark seeds its own data inside a transaction that is rolled back.
+"""
+
+import os
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.recipe_scout.settings")
+django.setup()
@@ -0,0 +1,55 @@
+"""
+Lookup latency of the memory-mapped GeoIP database.
+
+    python -m benchmarks.geoip [--ranges N]
+"""
+
+import argparse
+import ipaddress
+import os
+import random
+import tempfile
+import time
+
+from core.utils.geoip import GeoIPDatabase, write_database
+
+
+def synthetic_ranges(count: int):
+    step = (1 << 32) // count
+    for index in range(count):
+        start = index * step
+        yield (
+            str(ipaddress.IPv4Address(start)),
+            str(ipaddress.IPv4Address(start + step - 1)),
+            random.uniform(-90, 90),
+            random.uniform(-180, 180),
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ranges", type=int, default=1000000)
+    parser.add_argument("--lookups", type=int, default=100000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "geoip.bin")
+        write_database(path, synthetic_ranges(args.ranges))
+        database = GeoIPDatabase(path)
+        ips = [
+            str(ipaddress.IPv4Address(random.getrandbits(32)))
+            for _ in range(args.lookups)
+        ]
+        database.lookup(ips[0])
+
+        start = time.perf_counter()
+        for ip in ips:
+            database.lookup(ip)
+        elapsed = time.perf_counter() - start
+
+        print(f"file size: {os.path.getsize(path) / 1e6:.1f} MB")
+        print(f"lookup: {elapsed / args.lookups * 1e6:.2f} us")
+
+
+if __name__ == "__main__":
+    main()
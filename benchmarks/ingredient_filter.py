@@ -0,0 +1,56 @@
+"""
+Compares the legacy chained `ingredients__name__iexact` filter with the
+compiled IngredientExpression as the number of ingredients grows.
+
+    python -m benchmarks.ingredient_filter [--recipes N]
+"""
+
+import argparse
+
+from benchmarks.utils import measure, plan_nodes, rolled_back, seed_catalog
+from core.recipe.api.filters import IngredientExpression
+from core.recipe.models import Recipe
+
+
+def legacy_filter(queryset, names):
+    for name in names:
+        queryset = queryset.filter(ingredients__name__iexact=name)
+    return queryset
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--recipes", type=int, default=50000)
+    parser.add_argument("--ingredients", type=int, default=1000)
+    parser.add_argument("--max-terms", type=int, default=10)
+    args = parser.parse_args()
+
+    with rolled_back():
+        ingredients, _ = seed_catalog(args.recipes, args.ingredients, per_recipe=9)
+        # The most common ingredients give the largest intermediate results.
+        popular = ingredients[: args.max_terms]
+
+        print("terms | legacy p50 joins | compiled p50 plan")
+        for count in range(1, args.max_terms + 1):
+            names = [ingredient.name for ingredient in popular[:count]]
+            base = Recipe.objects.order_by("-created_at")
+
+            legacy = legacy_filter(base, names)[:15]
+            compiled = IngredientExpression(",".join(names)).apply(base)[:15]
+
+            legacy_nodes = [node["Node Type"] for node in plan_nodes(legacy)]
+            compiled_nodes = [node["Node Type"] for node in plan_nodes(compiled)]
+            joins = sum(
+                "Join" in node or node == "Nested Loop" for node in legacy_nodes
+            )
+
+            legacy_time = measure(lambda q=legacy: list(q.all()), repeat=5)
+            compiled_time = measure(lambda q=compiled: list(q.all()), repeat=5)
+            print(
+                f"{count:>5} | {legacy_time['p50']:>8.2f}ms {joins:>5} | "
+                f"{compiled_time['p50']:>10.2f}ms  {' > '.join(compiled_nodes)}",
+            )
+
+
+if __name__ == "__main__":
+    main()
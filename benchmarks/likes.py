@@ -0,0 +1,104 @@
+"""
+Like toggles per second on one hot recipe, with concurrent clients each
+toggling as a different user: the legacy four-query toggle, the one-statement
+CTE, and the CTE with buffered counts (LIKES_FLUSH_INTERVAL > 0).
+
+    python -m benchmarks.likes [--clients N] [--seconds S]
+
+Clients need committed rows, so the data is deleted afterwards instead of
+being rolled back.
+"""
+
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections, connection
+from django.test.utils import override_settings
+
+from core.account.models import User
+from core.jobs.models import Job
+from core.recipe.models import Recipe
+from core.services.recipe.recipe_service import LikeService, like_counter
+
+
+def legacy_toggle(user, slug):
+    recipe = Recipe.objects.get(slug=slug)
+    liked = recipe.liked_users.filter(pk=user.pk).exists()
+    if liked:
+        recipe.liked_users.remove(user)
+    else:
+        recipe.liked_users.add(user)
+    return not liked, recipe.liked_users.count()
+
+
+def cte_toggle(user, slug):
+    return LikeService.toggle_like(user, slug)
+
+
+def run_clients(toggle, users, slug, seconds):
+    stop = threading.Event()
+    counts = []
+
+    def client(user):
+        count = 0
+        try:
+            while not stop.is_set():
+                toggle(user, slug)
+                count += 1
+        finally:
+            connection.close()
+        counts.append(count)
+
+    with ThreadPoolExecutor(len(users)) as executor:
+        for user in users:
+            executor.submit(client, user)
+        time.sleep(seconds)
+        stop.set()
+    return sum(counts) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    recipe = Recipe.objects.create(
+        name="Viral recipe",
+        category="dessert",
+        description="Benchmark recipe",
+        steps="1 step",
+        total_cooking_time=10,
+        difficulty="easy",
+        country="Nowhere",
+    )
+    users = User.objects.bulk_create(
+        User(email=f"bench-like-{i}@example.com", first_name="Bench", last_name="Like")
+        for i in range(args.clients)
+    )
+    close_old_connections()
+    try:
+        print(f"{args.clients} clients, {args.seconds:g}s each")
+        modes = [
+            ("legacy (4 queries)", legacy_toggle, 0),
+            ("CTE (1 statement)", cte_toggle, 0),
+            ("CTE, buffered count", cte_toggle, 3600),
+        ]
+        for label, toggle, interval in modes:
+            with override_settings(LIKES_FLUSH_INTERVAL=interval):
+                rate = run_clients(toggle, users, recipe.slug, args.seconds)
+            print(f"{label:<22} {rate:>8.0f} toggles/s")
+        like_counter.flush(recipe.pk)
+    finally:
+        Job.objects.filter(
+            name="recipe.flush_likes",
+            payload__recipe_id=recipe.pk,
+        ).delete()
+        recipe.delete()
+        User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Compares the legacy one-`exists()`-per-suffix slug probe with the single
+max-suffix query as the number of recipes sharing a name grows.
+
+    python -m benchmarks.slugs [--max-collisions N]
+"""
+
+import argparse
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.text import slugify
+
+from benchmarks.utils import measure, rolled_back
+from core.recipe.models import Recipe
+from core.utils.slugs import allocate_slugs
+
+
+def legacy_slug(name):
+    base_slug = slugify(name)
+    unique_slug = base_slug
+    num = 1
+    while Recipe.objects.filter(slug=unique_slug).exists():
+        unique_slug = f"{base_slug}-{num}"
+        num += 1
+    return unique_slug
+
+
+def seed_collisions(name, start, stop):
+    base = slugify(name)
+    Recipe.objects.bulk_create(
+        (
+            Recipe(
+                name=name,
+                slug=f"{base}-{i}" if i else base,
+                category="breakfast",
+                description="Benchmark recipe",
+                steps="1 step",
+                total_cooking_time=10,
+                difficulty="easy",
+                country="Nowhere",
+            )
+            for i in range(start, stop)
+        ),
+        batch_size=5000,
+    )
+
+
+def queries(func):
+    with CaptureQueriesContext(connection) as context:
+        func()
+    return len(context)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-collisions", type=int, default=10000)
+    args = parser.parse_args()
+
+    name = "Pancakes"
+    with rolled_back():
+        print("collisions | legacy p50 queries | allocator p50 queries")
+        seeded = 0
+        collisions = 1
+        while collisions <= args.max_collisions:
+            seed_collisions(name, seeded, collisions)
+            seeded = collisions
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE recipe_recipe")
+
+            legacy_time = measure(lambda: legacy_slug(name), repeat=3)
+            allocator_time = measure(lambda: allocate_slugs(Recipe, [name]))
+            print(
+                f"{collisions:>10} | {legacy_time['p50']:>8.2f}ms "
+                f"{queries(lambda: legacy_slug(name)):>7} | "
+                f"{allocator_time['p50']:>10.2f}ms "
+                f"{queries(lambda: allocate_slugs(Recipe, [name])):>7}",
+            )
+            collisions *= 10
+
+        batch = [name] * 1000
+        batch_time = measure(lambda: allocate_slugs(Recipe, batch), repeat=5)
+        print(f"1000 slugs in one batch: {batch_time['p50']:.2f}ms, 1 query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import json
+import random
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+
+from core.recipe.models import Ingredient, Recipe
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back():
+    """Run the block in a transaction that is always rolled back"""
+    try:
+        with transaction.atomic():
+            yield
+            raise _Rollback
+    except _Rollback:
+        pass
+
+
+def plan_nodes(queryset) -> list[dict]:
+    """Every node of the PostgreSQL plan of `queryset`, depth first"""
+    plan = json.loads(queryset.explain(format="json"))[0]["Plan"]
+    nodes, stack = [], [plan]
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        stack.extend(reversed(node.get("Plans", [])))
+    return nodes
+
+
+def measure(func, repeat: int = 20) -> dict:
+    """Call `func` repeatedly and return latency percentiles in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "p50": statistics.median(timings),
+        "p99": timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+    }
+
+
+def seed_catalog(recipes: int, ingredients: int, per_recipe: int, seed: int = 1):
+    """Bulk insert a synthetic catalog and refresh planner statistics"""
+    rng = random.Random(seed)
+    ingredient_objs = Ingredient.objects.bulk_create(
+        Ingredient(name=f"Ingredient {i}", slug=f"bench-ingredient-{i}")
+        for i in range(ingredients)
+    )
+    recipe_objs = Recipe.objects.bulk_create(
+        (
+            Recipe(
+                name=f"Recipe {i}",
+                slug=f"bench-recipe-{i}",
+                category=rng.choice(Recipe.CATEGORY_CHOICES)[0],
+                description="Benchmark recipe",
+                steps="1 step, 2 step, 3 step",
+                total_cooking_time=rng.randint(5, 240),
+                difficulty=rng.choice(["easy", "medium", "hard"]),
+                country="Nowhere",
+                avg_rating=round(rng.uniform(1, 5), 2),
+            )
+            for i in range(recipes)
+        ),
+        batch_size=5000,
+    )
+    # Skewed popularity, like salt vs. saffron.
+    weights = [1 / (rank + 1) for rank in range(ingredients)]
+    through = Recipe.ingredients.through
+    rows = []
+    for recipe in recipe_objs:
+        chosen = set(rng.choices(ingredient_objs, weights=weights, k=per_recipe))
+        rows.extend(
+            through(recipe_id=recipe.id, ingredient_id=ingredient.id)
+            for ingredient in chosen
+        )
+    through.objects.bulk_create(rows, batch_size=10000)
+
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    return ingredient_objs, recipe_objs
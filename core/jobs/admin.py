@@ -0,0 +1,12 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ["id", "name", "status", "attempts", "run_at", "finished_at"]
+    list_filter = ["status", "name"]
+    readonly_fields = ["locked_at", "locked_by", "last_error", "finished_at"]
+
+
+admin.site.register(Job, JobAdmin)
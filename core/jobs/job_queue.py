@@ -0,0 +1,157 @@
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.jobs.models import Job
+
+logger = logging.getLogger(__name__)
+
+# job name -> (function, max attempts)
+registry = {}
+# Functions every worker calls on each maintenance pass
+maintenance_tasks = []
+
+
+def job(name: str | None = None, max_attempts: int = 5):
+    """
+    Register a function as a job handler. It is called with the job
+    payload as keyword arguments, so the payload must be JSON.
+
+        @job("recipe.render_image_variants")
+        def render_image_variants(recipe_id, name): ...
+    """
+
+    def register(func):
+        job_name = name or f"{func.__module__}.{func.__name__}"
+        registry[job_name] = (func, max_attempts)
+        func.job_name = job_name
+        return func
+
+    return register
+
+
+def maintenance(func):
+    """
+    Register housekeeping for the workers, called without arguments about
+    every JOBS_LEASE / 3 seconds by each of them (so it must be idempotent).
+    """
+    maintenance_tasks.append(func)
+    return func
+
+
+def enqueue(handler, delay: float = 0, **payload) -> Job:
+    """
+    Queue a job in the current transaction: it is only seen by workers
+    once the transaction commits, and vanishes if it rolls back.
+    """
+    name = getattr(handler, "job_name", handler)
+    if name not in registry:
+        raise KeyError(f"Unknown job {name!r}")
+    return Job.objects.create(
+        name=name,
+        payload=payload,
+        max_attempts=registry[name][1],
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def claim(worker: str, limit: int) -> list[Job]:
+    """
+    Lock up to `limit` due jobs for `worker`. SKIP LOCKED lets any number
+    of workers dequeue concurrently without waiting on each other.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status="queued", run_at__lte=now)
+            .order_by("run_at", "id")[:limit],
+        )
+        if jobs:
+            Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                status="running",
+                locked_at=now,
+                locked_by=worker,
+                attempts=F("attempts") + 1,
+            )
+    for job in jobs:
+        job.status, job.locked_at, job.locked_by = "running", now, worker
+        job.attempts += 1
+    return jobs
+
+
+def backoff(attempts: int) -> float:
+    """Seconds before the next attempt: exponential, capped, with jitter"""
+    ceiling = settings.JOBS_BACKOFF * 2 ** (attempts - 1)
+    ceiling = min(settings.JOBS_BACKOFF_MAX, ceiling)
+    return random.uniform(ceiling / 2, ceiling)
+
+
+def run(job: Job) -> bool:
+    """Run a claimed job and record the outcome; True if it succeeded"""
+    func, _ = registry.get(job.name, (None, None))
+    try:
+        if func is None:
+            raise KeyError(f"Unknown job {job.name!r}")
+        func(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        retry = job.attempts < job.max_attempts and func is not None
+        logger.warning("Job %s (%s) failed", job.pk, job.name, exc_info=True)
+        updates = {"last_error": error, "locked_at": None, "locked_by": ""}
+        if retry:
+            updates.update(
+                status="queued",
+                run_at=timezone.now() + timedelta(seconds=backoff(job.attempts)),
+            )
+        else:
+            updates.update(status="failed", finished_at=timezone.now())
+        Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(**updates)
+        return False
+
+    Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(
+        status="succeeded",
+        finished_at=timezone.now(),
+        locked_at=None,
+    )
+    return True
+
+
+def heartbeat(job_ids) -> None:
+    """Extend the lease of jobs that are still running"""
+    Job.objects.filter(pk__in=job_ids, status="running").update(
+        locked_at=timezone.now(),
+    )
+
+
+def reclaim_expired() -> int:
+    """
+    Requeue jobs whose worker stopped heartbeating before finishing them,
+    or fail them when they are out of attempts (e.g. they crash the worker).
+    """
+    now = timezone.now()
+    expired = Job.objects.filter(
+        status="running",
+        locked_at__lt=now - timedelta(seconds=settings.JOBS_LEASE),
+    )
+    expired.filter(attempts__gte=F("max_attempts")).update(
+        status="failed",
+        last_error="Lease expired",
+        finished_at=now,
+    )
+    return expired.update(status="queued", locked_at=None, locked_by="", run_at=now)
+
+
+def purge_finished(days: int) -> int:
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = Job.objects.filter(
+        status__in=["succeeded", "failed"],
+        finished_at__lt=cutoff,
+    ).delete()
+    return deleted
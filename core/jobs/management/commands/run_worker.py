@@ -0,0 +1,63 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+
+from core.jobs.spawn import run_worker_process
+from core.jobs.worker import Worker, drain
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs"  # noqa: A003
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=4,
+            help="Jobs run concurrently by each process",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=1,
+            help="Worker processes, for CPU-bound jobs such as image rendering",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run the jobs that are due in this process, then exit",
+        )
+
+    def handle(self, *args, **options):
+        if options["once"]:
+            ran = drain()
+            self.stdout.write(self.style.SUCCESS(f"Ran {ran} jobs"))
+            return
+
+        if options["processes"] <= 1:
+            Worker(options["threads"]).run()
+            return
+
+        # Spawned, not forked: children must not share the parent's connections.
+        context = multiprocessing.get_context("spawn")
+        children = [
+            context.Process(
+                target=run_worker_process,
+                args=(options["threads"], None),
+                name=f"worker-{number}",
+            )
+            for number in range(options["processes"])
+        ]
+        for child in children:
+            child.start()
+
+        def stop(*args):
+            for child in children:
+                if child.is_alive():
+                    child.terminate()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        for child in children:
+            child.join()
@@ -0,0 +1,44 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """A unit of background work, queued in the same transaction as its cause"""
+
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("succeeded", "Succeeded"),
+        ("failed", "Failed"),
+    ]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="queued")
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Dequeueing: the oldest due queued jobs.
+            models.Index(
+                fields=["run_at", "id"],
+                condition=models.Q(status="queued"),
+                name="job_queued_run_at_idx",
+            ),
+            # Reclaiming jobs of workers that died.
+            models.Index(
+                fields=["locked_at"],
+                condition=models.Q(status="running"),
+                name="job_running_locked_at_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.id} | {self.name} | {self.status}"
@@ -0,0 +1,13 @@
+import django
+
+
+def run_worker_process(threads: int, poll_interval: float | None = None):
+    """
+    Entry point of the processes started by `run_worker --processes`. It
+    lives apart from `worker`, which needs the app registry to be imported.
+    """
+    django.setup()
+
+    from core.jobs.worker import Worker
+
+    Worker(threads, poll_interval).run()
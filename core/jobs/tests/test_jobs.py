@@ -0,0 +1,147 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+import pytest
+
+from core.jobs import job_queue
+from core.jobs.job_queue import claim, enqueue, job, reclaim_expired, run
+from core.jobs.models import Job
+from core.jobs.worker import Worker, drain
+
+calls = []
+
+
+@job("tests.record")
+def record(value):
+    calls.append(value)
+
+
+@job("tests.explode", max_attempts=2)
+def explode():
+    raise ValueError("boom")
+
+
+@pytest.fixture(autouse=True)
+def clear_calls():
+    calls.clear()
+
+
+@pytest.mark.django_db()
+def test_enqueue_is_transactional():
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            enqueue(record, value=1)
+            raise RuntimeError
+
+    assert not Job.objects.exists()
+    with pytest.raises(KeyError):
+        enqueue("tests.unknown")
+
+
+@pytest.mark.django_db()
+def test_drain_runs_due_jobs_in_order():
+    enqueue(record, value=1)
+    enqueue(record, delay=60, value=2)
+    enqueue(record, value=3)
+
+    assert drain() == 2
+    assert calls == [1, 3]
+    assert Job.objects.filter(status="succeeded").count() == 2
+    assert Job.objects.get(status="queued").payload == {"value": 2}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_claim_skips_locked_jobs():
+    first = enqueue(record, value=1)
+    second = enqueue(record, value=2)
+
+    def claim_elsewhere():
+        try:
+            return claim("other", 10)
+        finally:
+            connection.close()
+
+    with transaction.atomic():
+        Job.objects.select_for_update().get(pk=first.pk)
+        with ThreadPoolExecutor(1) as executor:
+            claimed = executor.submit(claim_elsewhere).result(timeout=10)
+
+    assert [job.pk for job in claimed] == [second.pk]
+    assert claimed[0].attempts == 1
+    assert Job.objects.get(pk=second.pk).locked_by == "other"
+
+
+@pytest.mark.django_db()
+def test_failed_jobs_back_off_then_fail(settings):
+    settings.JOBS_BACKOFF = 30
+    enqueue(explode)
+
+    [claimed] = claim("worker", 10)
+    assert not run(claimed)
+    retry = Job.objects.get()
+    assert retry.status == "queued"
+    assert retry.run_at > timezone.now() + timedelta(seconds=14)
+    assert "ValueError: boom" in retry.last_error
+    assert not claim("worker", 10)
+
+    Job.objects.update(run_at=timezone.now())
+    [claimed] = claim("worker", 10)
+    assert not run(claimed)
+    failed = Job.objects.get()
+    assert failed.status == "failed"
+    assert failed.attempts == 2
+    assert failed.finished_at
+
+
+@pytest.mark.django_db()
+def test_reclaim_expired_jobs(settings):
+    settings.JOBS_LEASE = 60
+    enqueue(record, value=1)
+    enqueue(explode)
+    claim("dead-worker", 10)
+    Job.objects.update(locked_at=timezone.now() - timedelta(seconds=120))
+    # The second one has used up its attempts, e.g. by crashing its worker.
+    Job.objects.filter(name="tests.explode").update(attempts=2)
+
+    assert reclaim_expired() == 1
+    assert Job.objects.get(name="tests.record").status == "queued"
+    assert Job.objects.get(name="tests.explode").status == "failed"
+    assert drain() == 1
+    assert calls == [1]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_worker_runs_jobs_on_threads():
+    for value in range(5):
+        enqueue(record, value=value)
+    worker = Worker(threads=2, poll_interval=0.05)
+
+    def run_worker():
+        try:
+            worker.run()
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=run_worker)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while Job.objects.exclude(status="succeeded").exists():
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    worker.stop()
+    thread.join(timeout=10)
+
+    assert sorted(calls) == [0, 1, 2, 3, 4]
+    assert not thread.is_alive()
+
+
+@pytest.mark.django_db()
+def test_worker_maintenance_runs_registered_tasks(monkeypatch):
+    monkeypatch.setattr(job_queue, "maintenance_tasks", [lambda: calls.append("ran")])
+    Worker()._maintain()
+    assert calls == ["ran"]
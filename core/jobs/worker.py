@@ -0,0 +1,105 @@
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections
+
+from core.jobs import job_queue
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    """
+    Claims due jobs and runs them on a pool of `threads` threads.
+
+    Running jobs are heartbeated, so their lease (JOBS_LEASE seconds) only
+    runs out when the worker dies; another worker then requeues them.
+    """
+
+    def __init__(self, threads: int = 4, poll_interval: float | None = None):
+        self.threads = threads
+        self.poll_interval = poll_interval or settings.JOBS_POLL_INTERVAL
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = threading.Event()
+        self._running = {}
+        self._last_maintenance = 0.0
+
+    def stop(self, *args):
+        self._stop.set()
+
+    def run(self):
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self.stop)
+            signal.signal(signal.SIGINT, self.stop)
+
+        logger.info("Worker %s started with %s threads", self.name, self.threads)
+        with ThreadPoolExecutor(self.threads, thread_name_prefix="job") as executor:
+            while not self._stop.is_set():
+                jobs = self._claim()
+                for job in jobs:
+                    self._running[executor.submit(self._run, job)] = job.pk
+
+                if jobs and len(self._running) < self.threads:
+                    # More may be due: claim again right away.
+                    continue
+                if self._running:
+                    done, _ = wait(
+                        self._running,
+                        timeout=self.poll_interval,
+                        return_when=FIRST_COMPLETED,
+                    )
+                    for future in done:
+                        del self._running[future]
+                else:
+                    self._stop.wait(self.poll_interval)
+        logger.info("Worker %s stopped", self.name)
+
+    def _claim(self) -> list:
+        free = self.threads - len(self._running)
+        try:
+            if time.monotonic() - self._last_maintenance > settings.JOBS_LEASE / 3:
+                self._maintain()
+                self._last_maintenance = time.monotonic()
+            return job_queue.claim(self.name, free) if free else []
+        except DatabaseError:
+            logger.exception("Worker %s cannot reach the queue", self.name)
+            close_old_connections()
+            return []
+
+    def _maintain(self):
+        try:
+            if self._running:
+                job_queue.heartbeat(list(self._running.values()))
+            reclaimed = job_queue.reclaim_expired()
+            if reclaimed:
+                logger.warning("Requeued %s jobs of dead workers", reclaimed)
+            job_queue.purge_finished(settings.JOBS_KEEP_DAYS)
+            for task in job_queue.maintenance_tasks:
+                task()
+        finally:
+            close_old_connections()
+
+    @staticmethod
+    def _run(job):
+        close_old_connections()
+        try:
+            return job_queue.run(job)
+        finally:
+            close_old_connections()
+
+
+def drain(limit: int = 100) -> int:
+    """Run due jobs in the calling thread until none are left; return how many ran"""
+    name = f"{socket.gethostname()}:{os.getpid()}:drain"
+    ran = 0
+    while jobs := job_queue.claim(name, limit):
+        for job in jobs:
+            job_queue.run(job)
+            ran += 1
+    return ran
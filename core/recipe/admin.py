@@ -1,6 +1,14 @@
 from django.contrib import admin
 
-from .models import Ingredient, Recipe, Review
+from .models import (
+    DailySelection,
+    Ingredient,
+    Recipe,
+    Review,
+    SimilarRecipes,
+    Tombstone,
+    UserRecommendations,
+)
 
 
 class IngredientAdmin(admin.ModelAdmin):
@@ -18,6 +26,30 @@ class ReviewAdmin(admin.ModelAdmin):
     list_display = ["author", "rating", "recipe"]
 
 
+class DailySelectionAdmin(admin.ModelAdmin):
+    list_display = ["date", "band", "created_at"]
+    list_filter = ["band"]
+
+
+class SimilarRecipesAdmin(admin.ModelAdmin):
+    list_display = ["recipe", "computed_at"]
+    raw_id_fields = ["recipe"]
+
+
+class UserRecommendationsAdmin(admin.ModelAdmin):
+    list_display = ["user", "computed_at"]
+    raw_id_fields = ["user"]
+
+
+class TombstoneAdmin(admin.ModelAdmin):
+    list_display = ["resource", "object_id", "deleted_at"]
+    list_filter = ["resource"]
+
+
 admin.site.register(Ingredient, IngredientAdmin)
 admin.site.register(Recipe, RecipeAdmin)
 admin.site.register(Review, ReviewAdmin)
+admin.site.register(DailySelection, DailySelectionAdmin)
+admin.site.register(SimilarRecipes, SimilarRecipesAdmin)
+admin.site.register(UserRecommendations, UserRecommendationsAdmin)
+admin.site.register(Tombstone, TombstoneAdmin)
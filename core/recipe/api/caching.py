@@ -0,0 +1,46 @@
+from core.utils.response_cache import response_cache
+
+
+class ResponseCacheMixin:
+    """
+    Serves anonymous `list()` and `retrieve()` GETs from `response_cache`.
+
+    `cache_models` are the models a response is built from: a save, delete
+    or m2m change on any of them invalidates it. Views whose output depends
+    on more than the URL add key parts in `get_response_cache_parts()`.
+    """
+
+    cache_models = ()
+
+    def list(self, request, *args, **kwargs):  # noqa: A003
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_response_cache_parts(self):
+        return ()
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if request.user.is_authenticated or not response_cache.timeout:
+            return handler(request, *args, **kwargs)
+
+        key = response_cache.key(
+            request,
+            self.cache_models,
+            self.get_response_cache_parts(),
+        )
+        response = response_cache.get(request, key)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            response["X-Cache"] = "MISS"
+            # Stored by finalize_response(), once the response is renderable.
+            self._response_cache_key = key
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = self.__dict__.pop("_response_cache_key", None)
+        if key is not None:
+            response_cache.set(key, response)
+        return response
@@ -0,0 +1,92 @@
+import hashlib
+from calendar import timegm
+
+from django.db.models import Count, Max, Subquery
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from core.recipe.models import Tombstone
+
+
+class ConditionalGetMixin:
+    """
+    ETag and Last-Modified on `list()` and `retrieve()`, answering 304
+    before anything is serialized.
+
+    Validators come from one aggregate query over the filtered queryset:
+    max(updated_at) catches edits and inserts, the count and the latest
+    tombstone of `tombstone_resource` catch deletes. Views whose output
+    depends on the user (e.g. `is_liked`) set `vary_on_user`.
+    """
+
+    tombstone_resource = None
+    vary_on_user = False
+
+    def list(self, request, *args, **kwargs):  # noqa: A003
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        validators = self.get_validators()
+        if validators is None:
+            return handler(request, *args, **kwargs)
+
+        etag, last_modified = validators
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=last_modified and timegm(last_modified.utctimetuple()),
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response.headers.setdefault("ETag", etag)
+            if last_modified:
+                response.headers.setdefault(
+                    "Last-Modified",
+                    http_date(timegm(last_modified.utctimetuple())),
+                )
+            if self.vary_on_user:
+                patch_vary_headers(response, ["Authorization"])
+        return response
+
+    def get_validators(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        is_detail = lookup_url_kwarg in self.kwargs
+        if is_detail:
+            queryset = queryset.filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]},
+            )
+
+        aggregates = {"updated": Max("updated_at"), "count": Count("pk")}
+        if self.tombstone_resource and not is_detail:
+            latest_delete = (
+                Tombstone.objects.filter(resource=self.tombstone_resource)
+                .order_by("-deleted_at")
+                .values("deleted_at")[:1]
+            )
+            aggregates["deleted"] = Max(Subquery(latest_delete))
+        values = queryset.order_by().aggregate(**aggregates)
+        if is_detail and not values["count"]:
+            # Let retrieve() answer the 404.
+            return None
+
+        user = self.request.user.pk if self.vary_on_user else None
+        key = "|".join(
+            str(part)
+            for part in [
+                self.request.get_full_path(),
+                self.request.accepted_media_type,
+                user,
+                *values.values(),
+            ]
+        )
+        etag = f'W/"{hashlib.md5(key.encode()).hexdigest()}"'
+        last_modified = max(
+            (value for value in (values["updated"], values.get("deleted")) if value),
+            default=None,
+        )
+        return etag, last_modified
@@ -1,6 +1,9 @@
+from django.db.models import Count, Exists, OuterRef, Q
+
 import django_filters
 
 from core.recipe.models import Ingredient, Recipe, Review
+from core.services.recipe.ingredient_catalog import ingredient_catalog
 
 
 class IngredientFilter(django_filters.FilterSet):
@@ -20,30 +23,126 @@ class IngredientFilter(django_filters.FilterSet):
         fields = ["name", "caloric_min", "caloric_max", "category"]
 
 
+class IngredientExpression:
+    """
+    Compiles the `ingredients` filter value into a single query.
+
+    Comma separated terms, each an ingredient id, slug or name:
+        tomato            required
+        tomato|tomatoes   required, any alternative matches
+        ~basil            optional, at least one optional term must match
+        -garlic, !garlic  excluded
+
+    Empty terms and alternatives (e.g. "~", "-" or "tomato|") are ignored.
+    """
+
+    def __init__(self, value: str):
+        self.required, self.optional, self.excluded = [], None, set()
+        self.unresolved = False
+
+        for term in value.split(","):
+            term = term.strip()
+            if not term:
+                continue
+            kind, term = self._split_prefix(term)
+            alternatives = [t.strip() for t in term.split("|") if t.strip()]
+            if not alternatives:
+                continue
+            ids = frozenset().union(
+                *(ingredient_catalog.resolve(t) for t in alternatives),
+            )
+            if kind == "required":
+                self.unresolved |= not ids
+                if ids not in self.required:
+                    self.required.append(ids)
+            elif kind == "optional":
+                self.optional = (self.optional or set()) | ids
+            else:
+                self.excluded |= ids
+
+    @staticmethod
+    def _split_prefix(term: str) -> tuple[str, str]:
+        if term[0] in "-!":
+            return "excluded", term[1:]
+        if term[0] == "~":
+            return "optional", term[1:]
+        return "required", term
+
+    def apply(self, queryset):
+        through = Recipe.ingredients.through
+
+        if self.unresolved or self.optional == set():
+            return queryset.none()
+
+        if self.required:
+            # One GROUP BY over the through table; each required term must
+            # be matched by at least one of its ingredient ids.
+            terms = {
+                f"term_{index}": Count("pk", filter=Q(ingredient_id__in=ids))
+                for index, ids in enumerate(self.required)
+            }
+            matching = (
+                through.objects.filter(ingredient_id__in=set().union(*self.required))
+                .values("recipe_id")
+                .annotate(**terms)
+                .filter(**{f"{name}__gt": 0 for name in terms})
+                .values("recipe_id")
+            )
+            queryset = queryset.filter(id__in=matching)
+
+        if self.optional is not None:
+            queryset = queryset.filter(
+                Exists(
+                    through.objects.filter(
+                        recipe_id=OuterRef("pk"),
+                        ingredient_id__in=self.optional,
+                    ),
+                ),
+            )
+
+        if self.excluded:
+            queryset = queryset.filter(
+                ~Exists(
+                    through.objects.filter(
+                        recipe_id=OuterRef("pk"),
+                        ingredient_id__in=self.excluded,
+                    ),
+                ),
+            )
+
+        return queryset
+
+
 class RecipeFilter(django_filters.FilterSet):
-    ingredients = django_filters.CharFilter(
-        field_name="ingredients__name",
-        lookup_expr="iexact",
-        method="filter_ingredients",
-    )
+    ingredients = django_filters.CharFilter(method="filter_ingredients")
     category = django_filters.CharFilter(field_name="category", lookup_expr="iexact")
     country = django_filters.CharFilter(field_name="country", lookup_expr="icontains")
     difficulty = django_filters.CharFilter(
         field_name="difficulty",
         lookup_expr="icontains",
     )
+    calories_min = django_filters.NumberFilter(
+        field_name="total_calories",
+        lookup_expr="gte",
+    )
+    calories_max = django_filters.NumberFilter(
+        field_name="total_calories",
+        lookup_expr="lte",
+    )
 
     class Meta:
         model = Recipe
-        fields = ["ingredients", "category", "country", "difficulty"]
+        fields = [
+            "ingredients",
+            "category",
+            "country",
+            "difficulty",
+            "calories_min",
+            "calories_max",
+        ]
 
     def filter_ingredients(self, queryset, name, value):
-        ingredients_list = value.split(",")
-
-        for ingredient in ingredients_list:
-            queryset = queryset.filter(ingredients__name__iexact=ingredient)
-
-        return queryset
+        return IngredientExpression(value).apply(queryset)
 
 
 class ReviewFilter(django_filters.FilterSet):
@@ -1,7 +1,175 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class RecipePagination(PageNumberPagination):
     page_size = 3
     page_size_query_param = "size"  # client side
     max_page_size = 15  # client side
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over (ordering field, id).
+
+    Each page is `WHERE (field, id) > last seen ... LIMIT size`, so deep
+    pages cost the same as the first one and no COUNT(*) runs unless the
+    client asks for it with `with_count=true`.
+    """
+
+    page_size = 3
+    page_size_query_param = "size"
+    max_page_size = 15
+    cursor_query_param = "cursor"
+    count_query_param = "with_count"
+    ordering_query_param = "ordering"
+    # ordering query value -> (model field, descending)
+    orderings = {}
+    default_ordering = None
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = request.query_params.get(self.ordering_query_param)
+        if self.ordering not in self.orderings:
+            self.ordering = self.default_ordering
+        field, descending = self.orderings[self.ordering]
+
+        prefix = "-" if descending else ""
+        queryset = queryset.order_by(f"{prefix}{field}", f"{prefix}pk")
+
+        self.count = None
+        if request.query_params.get(self.count_query_param) in ("1", "true"):
+            self.count = queryset.count()
+
+        model_field = queryset.model._meta.get_field(field)
+        cursor = self.decode_cursor(request, model_field)
+        if cursor is not None:
+            nullable = model_field.null
+            queryset = queryset.filter(
+                self.after(field, descending, nullable, *cursor),
+            )
+
+        rows = list(queryset[: self.page_size + 1])
+        self.next_position = None
+        if len(rows) > self.page_size:
+            rows = rows[: self.page_size]
+            self.next_position = (getattr(rows[-1], field), rows[-1].pk)
+        return rows
+
+    @staticmethod
+    def after(field: str, descending: bool, nullable: bool, value, pk) -> Q:
+        """Rows following (value, pk); NULLs sort last ascending, first descending"""
+        if value is None:
+            if descending:
+                return Q(**{f"{field}__isnull": True, "pk__lt": pk}) | Q(
+                    **{f"{field}__isnull": False},
+                )
+            return Q(**{f"{field}__isnull": True, "pk__gt": pk})
+
+        # The `>=` bound lets PostgreSQL use the (field, id) index as a range.
+        if descending:
+            condition = Q(**{f"{field}__lte": value}) & (
+                Q(**{f"{field}__lt": value}) | Q(pk__lt=pk)
+            )
+        else:
+            condition = Q(**{f"{field}__gte": value}) & (
+                Q(**{f"{field}__gt": value}) | Q(pk__gt=pk)
+            )
+            if nullable:
+                condition |= Q(**{f"{field}__isnull": True})
+        return condition
+
+    def get_page_size(self, request):
+        size = request.query_params.get(self.page_size_query_param, "")
+        if size.isdigit() and int(size) > 0:
+            return min(int(size), self.max_page_size)
+        return self.page_size
+
+    def decode_cursor(self, request, model_field):
+        """The (value, pk) position of the cursor, its value as `model_field` takes it"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            ordering, value, pk = json.loads(base64.urlsafe_b64decode(encoded))
+            if value is not None:
+                value = model_field.to_python(value)
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if ordering != self.ordering or type(pk) is not int:
+            raise NotFound(self.invalid_cursor_message)
+        return value, pk
+
+    def encode_cursor(self, value, pk) -> str:
+        if hasattr(value, "isoformat"):
+            value = value.isoformat()
+        payload = json.dumps([self.ordering, value, pk], separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.ordering_query_param, self.ordering)
+        return replace_query_param(
+            url,
+            self.cursor_query_param,
+            self.encode_cursor(*self.next_position),
+        )
+
+    def get_paginated_response(self, data):
+        payload = {"next": self.get_next_link(), "results": data}
+        if self.count is not None:
+            payload = {"count": self.count, **payload}
+        return Response(payload)
+
+
+class RecipeKeysetPagination(KeysetPagination):
+    orderings = {
+        "-created_at": ("created_at", True),
+        "avg_rating": ("avg_rating", False),
+        "-avg_rating": ("avg_rating", True),
+        "total_calories": ("total_calories", False),
+        "-total_calories": ("total_calories", True),
+    }
+    default_ordering = "-created_at"
+
+
+class ReviewKeysetPagination(KeysetPagination):
+    page_size = 10
+    max_page_size = 50
+    orderings = {"-created_at": ("created_at", True)}
+    default_ordering = "-created_at"
+
+
+class KeysetPaginationMixin:
+    """
+    Lets clients opt into keyset pagination with `?pagination=cursor`
+    (or by following a `cursor` link); other requests keep the view's
+    regular `pagination_class`.
+    """
+
+    keyset_pagination_class = None
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            params = self.request.query_params
+            use_keyset = params.get("pagination") == "cursor" or "cursor" in params
+            if self.keyset_pagination_class is not None and use_keyset:
+                self._paginator = self.keyset_pagination_class()
+            elif self.pagination_class is None:
+                self._paginator = None
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
@@ -11,31 +11,75 @@ class IngredientSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
+class RecipeListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        recipes = list(data.all() if hasattr(data, "all") else data)
+
+        # Answer "which of these has the user liked" once for the whole page.
+        user = self.context["request"].user
+        if user.is_authenticated:
+            self.context["liked_recipe_ids"] = set(
+                Recipe.liked_users.through.objects.filter(
+                    user_id=user.id,
+                    recipe_id__in=[recipe.id for recipe in recipes],
+                ).values_list("recipe_id", flat=True),
+            )
+        return super().to_representation(recipes)
+
+
 class RecipeSerializer(serializers.ModelSerializer):
     parser_classes = (MultiPartParser, FormParser)
     author = serializers.EmailField(
         source="author.email",
         read_only=True,
     )
-    likes_count = serializers.SerializerMethodField()
     is_liked = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
-        fields = "__all__"
+        exclude = ["search_vector", "import_key"]
+        list_serializer_class = RecipeListSerializer
 
     def create(self, validated_data):
         author = self.context["request"].user
         return RecipeService.create_recipe(author=author, validated_data=validated_data)
 
-    def get_likes_count(self, obj):
-        return obj.liked_users.count()
-
     def get_is_liked(self, obj):
         user = self.context["request"].user
-        if user.is_authenticated:
-            return user.liked_recipes.filter(id=obj.id).exists()
-        return False
+        if not user.is_authenticated:
+            return False
+
+        liked_recipe_ids = self.context.get("liked_recipe_ids")
+        if liked_recipe_ids is not None:
+            return obj.id in liked_recipe_ids
+        return user.liked_recipes.filter(id=obj.id).exists()
+
+    def get_image_variants(self, obj):
+        """{variant: {"webp": url, "jpeg": url}}, empty until they are rendered"""
+        request = self.context.get("request")
+        storage = Recipe._meta.get_field("image").storage
+        urls = {}
+        for variant, names in obj.image_variants.items():
+            if variant == "source":
+                continue
+            urls[variant] = {}
+            for extension, name in names.items():
+                url = storage.url(name)
+                urls[variant][extension] = (
+                    request.build_absolute_uri(url) if request is not None else url
+                )
+        return urls
+
+
+class PantryRecipeSerializer(RecipeSerializer):
+    matched_count = serializers.IntegerField(read_only=True)
+    missing_count = serializers.IntegerField(read_only=True)
+
+
+class RecipeSearchSerializer(RecipeSerializer):
+    rank = serializers.FloatField(read_only=True)
+    headline = serializers.CharField(read_only=True)
 
 
 class ReviewSerializer(serializers.ModelSerializer):
@@ -57,3 +101,6 @@ class ReviewSerializer(serializers.ModelSerializer):
             slug=slug,
             validated_data=validated_data,
         )
+
+    def update(self, instance, validated_data):
+        return ReviewService.update_review(instance, validated_data)
@@ -3,13 +3,20 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import (
+    ChangeFeedAPIView,
     DailyRecipesAPIView,
+    ForYouAPIView,
     IngredientViewSet,
     LikeToggleAPIView,
+    PantryRecipesAPIView,
     RecipeDetail,
+    RecipeExportAPIView,
+    RecipeFacetsAPIView,
     RecipeList,
+    RecipeSearch,
     ReviewDetail,
     ReviewList,
+    SimilarRecipesAPIView,
 )
 
 router = DefaultRouter()
@@ -18,13 +25,24 @@ router.register("ingredients", IngredientViewSet, basename="ingredient")
 recipe_patterns = [
     path("", RecipeList.as_view(), name="recipe-list"),
     path("daily-recipes/", DailyRecipesAPIView.as_view(), name="daily-recipes"),
+    path("for-you/", ForYouAPIView.as_view(), name="recipe-for-you"),
+    path("facets/", RecipeFacetsAPIView.as_view(), name="recipe-facets"),
+    path("search/", RecipeSearch.as_view(), name="recipe-search"),
+    path("pantry/", PantryRecipesAPIView.as_view(), name="recipe-pantry"),
+    path("export/", RecipeExportAPIView.as_view(), name="recipe-export"),
     path("<slug:slug>/", RecipeDetail.as_view(), name="recipe-detail"),
     path("<slug:slug>/like-toggle/", LikeToggleAPIView.as_view(), name="like-toggle"),
+    path(
+        "<slug:slug>/similar/",
+        SimilarRecipesAPIView.as_view(),
+        name="similar-recipes",
+    ),
     path("<slug:slug>/reviews/", ReviewList.as_view(), name="review-list"),
     path("<slug:slug>/reviews/<int:pk>/", ReviewDetail.as_view(), name="review-detail"),
 ]
 
 urlpatterns = [
     path("recipes/", include(recipe_patterns)),
+    path("changes/<str:resource>/", ChangeFeedAPIView.as_view(), name="change-feed"),
     path("", include(router.urls)),
 ]
@@ -1,28 +1,56 @@
-from django.shortcuts import get_object_or_404
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.db.models import F, Subquery
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, generics, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
+from core.recipe.api.caching import ResponseCacheMixin
+from core.recipe.api.conditional import ConditionalGetMixin
 from core.recipe.api.filters import IngredientFilter, RecipeFilter, ReviewFilter
-from core.recipe.api.pagination import RecipePagination
+from core.recipe.api.pagination import (
+    KeysetPaginationMixin,
+    RecipeKeysetPagination,
+    RecipePagination,
+    ReviewKeysetPagination,
+)
 from core.recipe.api.permissions import IsOwnerOrReadOnly
 from core.recipe.api.serializers import (
     IngredientSerializer,
+    PantryRecipeSerializer,
+    RecipeSearchSerializer,
     RecipeSerializer,
     ReviewSerializer,
 )
-from core.recipe.models import Ingredient, Recipe, Review
+from core.recipe.models import DailySelection, Ingredient, Recipe, Review
+from core.services.recipe.change_feed_service import ChangeFeedService
 from core.services.recipe.daily_recipes_service import DailyRecipesService
-from core.services.recipe.recipe_service import LikeService
+from core.services.recipe.export_service import RecipeExporter
+from core.services.recipe.facet_service import RecipeFacetService
+from core.services.recipe.ingredient_catalog import ingredient_catalog
+from core.services.recipe.pantry_service import PantryService
+from core.services.recipe.recipe_service import LikeService, ReviewService
+from core.services.recipe.recommendation_service import ForYouService
+from core.services.recipe.similarity_service import SimilarRecipesService
 from core.utils.location import get_user_ip, get_user_location_by_ip
 
 
-class IngredientViewSet(ReadOnlyModelViewSet):
+class IngredientViewSet(
+    ResponseCacheMixin,
+    ConditionalGetMixin,
+    ReadOnlyModelViewSet,
+):
     queryset = Ingredient.objects.all()
+    tombstone_resource = "ingredients"
+    cache_models = [Ingredient]
     serializer_class = IngredientSerializer
     filter_backends = [
         DjangoFilterBackend,
@@ -33,9 +61,26 @@ class IngredientViewSet(ReadOnlyModelViewSet):
     search_fields = ["name"]
     ordering_fields = ["caloric_content"]
 
+    @action(detail=False, methods=["get"], filter_backends=[], pagination_class=None)
+    def suggest(self, request):
+        """Typeahead answered from the in-process catalog, without DB access"""
+        limit = request.query_params.get("limit", "10")
+        if not limit.isdigit() or not 0 < int(limit) <= 50:
+            raise ValidationError({"limit": "Must be an integer between 1 and 50."})
+
+        query = request.query_params.get("q", "")
+        return Response(ingredient_catalog.suggest(query, limit=int(limit)))
 
-class RecipeList(generics.ListCreateAPIView):
-    queryset = Recipe.objects.select_related("author").order_by("-created_at")
+
+class RecipeList(
+    ResponseCacheMixin,
+    ConditionalGetMixin,
+    KeysetPaginationMixin,
+    generics.ListCreateAPIView,
+):
+    queryset = (
+        Recipe.objects.with_related().defer("search_vector").order_by("-created_at")
+    )
     serializer_class = RecipeSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     filter_backends = [
@@ -45,27 +90,174 @@ class RecipeList(generics.ListCreateAPIView):
     ]
     filterset_class = RecipeFilter
     search_fields = ["name"]
-    ordering_fields = ["avg_rating"]
+    ordering_fields = ["avg_rating", "total_calories"]
+    pagination_class = RecipePagination
+    keyset_pagination_class = RecipeKeysetPagination
+    tombstone_resource = "recipes"
+    vary_on_user = True
+    cache_models = [Recipe, Review, Ingredient]
+
+
+class RecipeFacetsAPIView(APIView):
+    """Recipe counts per category, difficulty and country, under RecipeFilter"""
+
+    def get(self, request):
+        filterset = RecipeFilter(
+            request.query_params,
+            queryset=Recipe.objects.all(),
+            request=request,
+        )
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        facets = RecipeFacetService.get_facets(
+            filterset.qs,
+            filterset.form.cleaned_data,
+        )
+        return Response(facets)
+
+
+class RecipeSearch(generics.ListAPIView):
+    serializer_class = RecipeSearchSerializer
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = RecipeFilter
+    pagination_class = RecipePagination
+
+    def get_queryset(self):
+        text = self.request.query_params.get("q", "").strip()
+        if not text:
+            raise ValidationError({"q": "This query parameter is required."})
+
+        query = SearchQuery(text, search_type="websearch", config="english")
+        return (
+            Recipe.objects.with_related()
+            .defer("search_vector")
+            .filter(search_vector=query)
+            .annotate(
+                rank=SearchRank(F("search_vector"), query),
+                headline=SearchHeadline(
+                    "description",
+                    query,
+                    config="english",
+                    start_sel="<mark>",
+                    stop_sel="</mark>",
+                    max_words=35,
+                    min_words=15,
+                ),
+            )
+            .order_by("-rank", "-id")
+        )
+
+
+class RecipeExportAPIView(APIView):
+    """The whole catalog as streamed NDJSON, gzipped with ?compress=gzip"""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        compress = request.query_params.get("compress")
+        if compress not in (None, "gzip"):
+            raise ValidationError({"compress": "Only gzip is supported."})
+
+        exporter = RecipeExporter()
+        filename = "recipes.ndjson"
+        if compress:
+            response = StreamingHttpResponse(
+                exporter.gzip_lines(),
+                content_type="application/gzip",
+            )
+            filename += ".gz"
+        else:
+            response = StreamingHttpResponse(
+                exporter.lines(),
+                content_type="application/x-ndjson",
+            )
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+class ChangeFeedAPIView(APIView):
+    """
+    Recipes, ingredients or reviews changed since `cursor` (or since the
+    `updated_since` datetime), and the ids deleted since. Clients follow
+    `cursor` until `has_more` is false and keep the last one for next time.
+    """
+
+    permission_classes = [IsAuthenticated]
+    page_size = 100
+    max_page_size = 1000
+
+    def get(self, request, resource):
+        params = request.query_params
+        updated_since = params.get("updated_since")
+        if updated_since:
+            updated_since = parse_datetime(updated_since)
+            if updated_since is None:
+                raise ValidationError(
+                    {"updated_since": "Must be an ISO 8601 datetime."},
+                )
+            if timezone.is_naive(updated_since):
+                updated_since = timezone.make_aware(updated_since)
+
+        size = params.get("size", "")
+        size = min(int(size), self.max_page_size) if size.isdigit() else self.page_size
+        changes = ChangeFeedService.get_changes(
+            resource,
+            cursor=params.get("cursor"),
+            updated_since=updated_since,
+            size=max(size, 1),
+        )
+        return Response(changes)
+
+
+class PantryRecipesAPIView(generics.GenericAPIView):
+    serializer_class = PantryRecipeSerializer
     pagination_class = RecipePagination
 
+    def get(self, request):
+        have = request.query_params.get("have", "")
+        terms = [term.strip() for term in have.split(",") if term.strip()]
+        if not terms:
+            raise ValidationError({"have": "Provide a list of ingredients."})
+
+        max_missing = request.query_params.get("max_missing")
+        if max_missing is not None:
+            if not max_missing.isdigit():
+                raise ValidationError({"max_missing": "Must be a positive integer."})
+            max_missing = int(max_missing)
+
+        ranking = PantryService.rank_recipes(terms, max_missing=max_missing)
+        page = self.paginate_queryset(ranking)
+        serializer = self.get_serializer(PantryService.get_recipes(page), many=True)
+        return self.get_paginated_response(serializer.data)
 
-class RecipeDetail(generics.RetrieveUpdateDestroyAPIView):
+
+class RecipeDetail(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Recipe.objects.select_related("author").defer("slug")
     serializer_class = RecipeSerializer
     permission_classes = [IsOwnerOrReadOnly]
     lookup_field = "slug"
+    vary_on_user = True
 
 
-class ReviewList(generics.ListCreateAPIView):
+class ReviewList(
+    ConditionalGetMixin,
+    KeysetPaginationMixin,
+    generics.ListCreateAPIView,
+):
     serializer_class = ReviewSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     filter_backends = [DjangoFilterBackend]
     filterset_class = ReviewFilter
+    pagination_class = None
+    keyset_pagination_class = ReviewKeysetPagination
+    tombstone_resource = "reviews"
 
     def get_queryset(self):
-        slug = self.kwargs["slug"]
+        # `recipe_id = (SELECT ...)` rather than a join, so that the reviews
+        # are read in order from the (recipe, -created_at, -id) index.
+        recipe = Recipe.objects.filter(slug=self.kwargs["slug"]).values("pk")
         return (
-            Review.objects.filter(recipe__slug=slug)
+            Review.objects.filter(recipe=Subquery(recipe))
             .select_related("author")
             .defer("recipe")
         )
@@ -76,27 +268,53 @@ class ReviewDetail(generics.RetrieveUpdateDestroyAPIView):
     queryset = Review.objects.all().defer("recipe")
     permission_classes = [IsOwnerOrReadOnly]
 
+    def perform_destroy(self, instance):
+        ReviewService.delete_review(instance)
+
 
 class LikeToggleAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, slug):
-        user = request.user
-        recipe = get_object_or_404(Recipe, slug=slug)
-
-        liked = LikeService.toggle_like(user=user, recipe=recipe)
+        liked, like_count = LikeService.toggle_like(user=request.user, slug=slug)
 
         return Response(
-            {"liked": liked, "like_count": recipe.liked_users.count()},
+            {"liked": liked, "like_count": like_count},
             status=status.HTTP_200_OK,
         )
 
 
-class DailyRecipesAPIView(generics.ListAPIView):
+class DailyRecipesAPIView(ResponseCacheMixin, generics.ListAPIView):
     serializer_class = RecipeSerializer
+    cache_models = [Recipe, Review, Ingredient, DailySelection]
+
+    def get_service(self) -> DailyRecipesService:
+        if not hasattr(self, "_service"):
+            ip = get_user_ip(self.request)
+            location = get_user_location_by_ip(ip)
+            self._service = DailyRecipesService(location)
+        return self._service
+
+    def get_response_cache_parts(self):
+        # The answer depends on the weather at the caller's location.
+        return [self.get_service().band, timezone.localdate().isoformat()]
+
+    def get_queryset(self):
+        return self.get_service().get_daily_recipes()
+
+
+class SimilarRecipesAPIView(generics.ListAPIView):
+    serializer_class = RecipeSerializer
+    pagination_class = None
+
+    def get_queryset(self):
+        return SimilarRecipesService.get_similar_recipes(self.kwargs["slug"])
+
+
+class ForYouAPIView(generics.ListAPIView):
+    serializer_class = RecipeSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = None
 
     def get_queryset(self):
-        ip = get_user_ip(self.request)
-        location = get_user_location_by_ip(ip)
-        daily_recipes_service = DailyRecipesService(location)
-        return daily_recipes_service.get_daily_recipes()
+        return ForYouService.get_recipes(self.request.user)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class RecipeConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core.recipe"
+
+    def ready(self):
+        from core.recipe import checks, signals  # noqa: F401
@@ -0,0 +1,72 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Backends whose entries (and version stamps) are not seen by other processes
+PROCESS_LOCAL_CACHES = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+def is_process_local(alias: str = "default") -> bool:
+    return settings.CACHES[alias]["BACKEND"] in PROCESS_LOCAL_CACHES
+
+
+@register(Tags.caches)
+def check_shared_default_cache(app_configs, **kwargs):
+    """
+    Version stamps (core/utils/versions.py) live in the default cache: with a
+    process-local backend a write only refreshes the pantry index and cached
+    responses of the process that made it.
+
+    Cached responses in a shared RESPONSE_CACHE_ALIAS keyed by local stamps
+    are never invalidated for the other processes, so that combination is
+    rejected in DEBUG too.
+    """
+    if not is_process_local():
+        return []
+    if settings.RESPONSE_CACHE_TIMEOUT > 0 and not is_process_local(
+        settings.RESPONSE_CACHE_ALIAS,
+    ):
+        return [
+            Error(
+                "Cached responses are shared through "
+                f"{settings.RESPONSE_CACHE_ALIAS!r} but the version stamps that "
+                "invalidate them are in the process-local default cache.",
+                hint="Use the same shared backend for the default cache, or "
+                "set RESPONSE_CACHE_TIMEOUT to 0.",
+                id="recipe.E002",
+            ),
+        ]
+    if settings.DEBUG:
+        return []
+    return [
+        Error(
+            "The default cache is process-local, so other processes never see "
+            "the version stamps that invalidate the pantry index and cached "
+            "responses.",
+            hint="Set CACHE_BACKEND to a shared backend, e.g. "
+            "django.core.cache.backends.redis.RedisCache.",
+            id="recipe.E001",
+        ),
+    ]
+
+
+@register(Tags.caches)
+def check_shared_like_counter(app_configs, **kwargs):
+    """
+    Buffered like deltas (LIKES_FLUSH_INTERVAL > 0) are added up in the
+    default cache by the web processes and flushed by a worker, which must
+    see them: in DEBUG too.
+    """
+    if not settings.LIKES_FLUSH_INTERVAL or not is_process_local():
+        return []
+    return [
+        Error(
+            "Like counts are buffered in the process-local default cache, "
+            "where the worker flushing them never sees them.",
+            hint="Set CACHE_BACKEND to a shared backend, or "
+            "LIKES_FLUSH_INTERVAL to 0.",
+            id="recipe.E003",
+        ),
+    ]
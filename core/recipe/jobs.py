@@ -0,0 +1,26 @@
+from django.conf import settings
+
+from core.jobs.job_queue import job, maintenance
+from core.services.recipe.change_feed_service import ChangeFeedService
+from core.services.recipe.image_service import process_recipe_image
+from core.services.recipe.recipe_service import RatingService, like_counter
+
+
+@job("recipe.render_image_variants", max_attempts=3)
+def render_image_variants(recipe_id: int, name: str):
+    process_recipe_image(recipe_id, name)
+
+
+@job("recipe.recompute_ratings")
+def recompute_ratings(recipe_ids: list[int]):
+    RatingService.recompute(recipe_ids)
+
+
+@job("recipe.flush_likes")
+def flush_likes(recipe_id: int):
+    like_counter.flush(recipe_id)
+
+
+@maintenance
+def purge_tombstones():
+    ChangeFeedService.purge_tombstones(settings.CHANGE_FEED_KEEP_DAYS)
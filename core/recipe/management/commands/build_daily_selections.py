@@ -0,0 +1,37 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.recipe.models import DailySelection
+from core.services.recipe.daily_recipes_service import DailyRecipesService
+
+
+class Command(BaseCommand):
+    help = "Build the daily recipe selections of every temperature band"  # noqa: A003
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date",
+            type=datetime.date.fromisoformat,
+            help="Day to build (YYYY-MM-DD); defaults to today",
+        )
+        parser.add_argument(
+            "--keep-days",
+            type=int,
+            default=7,
+            help="Delete selections older than this many days",
+        )
+
+    def handle(self, *args, **options):
+        day = options["date"] or timezone.localdate()
+        selections = DailyRecipesService.build_selections(day)
+
+        cutoff = timezone.localdate() - datetime.timedelta(days=options["keep_days"])
+        deleted, _ = DailySelection.objects.filter(date__lt=cutoff).delete()
+
+        for band, recipe_ids in selections.items():
+            self.stdout.write(f"{day} {band}: {len(recipe_ids)} recipes")
+        self.stdout.write(
+            self.style.SUCCESS(f"Built daily selections, deleted {deleted} old ones"),
+        )
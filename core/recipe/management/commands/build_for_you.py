@@ -0,0 +1,35 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from core.services.recipe.recommendation_service import ForYouBuilder
+
+
+class Command(BaseCommand):
+    help = 'Precompute the "for you" recipes of every user'  # noqa: A003
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=os.cpu_count(),
+            help="Processes scoring users (0 scores in this process)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Users scored per task, at most",
+        )
+
+    def handle(self, *args, **options):
+        metrics = ForYouBuilder(options["processes"], options["chunk_size"]).build()
+        self.stdout.write(
+            f"{metrics['users']} users, {metrics['recipes']} recipes, "
+            f"{metrics['interactions']} interactions\n"
+            f"load {metrics['load_seconds']:.2f}s, "
+            f"similarity {metrics['similarity_seconds']:.2f}s, "
+            f"scoring {metrics['score_seconds']:.2f}s "
+            f"({metrics['users_per_second']:.0f} users/s)",
+        )
+        self.stdout.write(self.style.SUCCESS("Built for you recipes"))
@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.fields.json import KT
+
+from core.jobs.job_queue import enqueue
+from core.recipe.jobs import render_image_variants
+from core.recipe.models import Recipe
+from core.services.recipe.image_service import process_recipe_image
+
+
+class Command(BaseCommand):
+    help = "Render missing or outdated recipe image variants"  # noqa: A003
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Re-render every image, also the ones that are up to date",
+        )
+        parser.add_argument(
+            "--inline",
+            action="store_true",
+            help="Render in this process instead of queueing jobs for run_worker",
+        )
+        parser.add_argument("--batch-size", type=int, default=100)
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image="").exclude(image=None)
+        if not options["all"]:
+            recipes = recipes.annotate(source=KT("image_variants__source")).filter(
+                Q(source__isnull=True) | ~Q(source=F("image")),
+            )
+        pending = recipes.order_by("pk").values_list("pk", "image")
+
+        self.queued = self.rendered = self.failed = 0
+        last_pk = 0
+        while batch := list(pending.filter(pk__gt=last_pk)[: options["batch_size"]]):
+            if options["inline"]:
+                self.render(batch)
+            else:
+                with transaction.atomic():
+                    for pk, image in batch:
+                        enqueue(render_image_variants, recipe_id=pk, name=image)
+                self.queued += len(batch)
+            last_pk = batch[-1][0]
+
+        if options["inline"]:
+            message = f"Rendered {self.rendered} images, {self.failed} failed"
+        else:
+            message = f"Queued {self.queued} images"
+        self.stdout.write(self.style.SUCCESS(message))
+
+    def render(self, batch):
+        for pk, image in batch:
+            try:
+                self.rendered += process_recipe_image(pk, image)
+            except Exception as exc:
+                self.failed += 1
+                self.stderr.write(f"Recipe {pk}: {exc}")
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.services.recipe.similarity_service import SimilarRecipesBuilder
+
+
+class Command(BaseCommand):
+    help = "Precompute the similar recipes of every recipe"  # noqa: A003
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--k",
+            type=int,
+            help="Neighbors kept per recipe; defaults to SIMILAR_RECIPES_K",
+        )
+        parser.add_argument(
+            "--block-size",
+            type=int,
+            default=1024,
+            help="Recipes scored per sparse product, at most",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        builder = SimilarRecipesBuilder(options["k"], options["block_size"])
+        built = builder.build()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Built similar recipes of {built} recipes "
+                f"in {time.monotonic() - started:.1f}s",
+            ),
+        )
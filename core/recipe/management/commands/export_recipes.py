@@ -0,0 +1,50 @@
+import sys
+import time
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.recipe.export_service import RecipeExporter
+
+
+class Command(BaseCommand):
+    help = "Stream the recipe catalog as NDJSON"  # noqa: A003
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default="-",
+            help="Output file, gzipped if it ends with .gz (default: stdout)",
+        )
+        parser.add_argument("--gzip", action="store_true", help="Compress stdout")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        output = options["output"]
+        exporter = RecipeExporter(chunk_size=options["chunk_size"])
+        compress = options["gzip"] or output.endswith(".gz")
+        blocks = exporter.gzip_lines() if compress else exporter.lines()
+
+        started = time.perf_counter()
+        written = 0
+        try:
+            with self.open_output(output) as file:
+                for block in blocks:
+                    file.write(block)
+                    written += len(block)
+        except OSError as exc:
+            raise CommandError(f"Could not write {output}: {exc}")
+
+        if output != "-":
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Wrote {written} bytes to {output} in {elapsed:.1f}s",
+                ),
+            )
+
+    @staticmethod
+    def open_output(output):
+        if output == "-":
+            return nullcontext(sys.stdout.buffer)
+        return open(output, "wb")
@@ -0,0 +1,86 @@
+import csv
+import gzip
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.recipe.import_service import RecipeImporter
+
+
+class Command(BaseCommand):
+    help = "Stream recipes from a JSONL or CSV file into the database"  # noqa: A003
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="JSONL or CSV file, optionally gzipped")
+        parser.add_argument(
+            "--format",
+            choices=["jsonl", "csv"],
+            help="Defaults to the file extension",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--author", help="Email of the user owning the recipes")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or (
+            "csv" if path.removesuffix(".gz").endswith(".csv") else "jsonl"
+        )
+
+        importer = RecipeImporter(
+            author=self.get_author(options["author"]),
+            batch_size=options["batch_size"],
+        )
+        opener = gzip.open if path.endswith(".gz") else open
+        started = time.perf_counter()
+        try:
+            with opener(path, "rt", encoding="utf-8", newline="") as file:
+                rows = (
+                    self.read_csv(file)
+                    if file_format == "csv"
+                    else self.read_jsonl(file)
+                )
+                for stats in importer.import_rows(rows):
+                    if options["verbosity"] > 1:
+                        self.stdout.write(self.summary(stats, started))
+        except OSError as exc:
+            raise CommandError(f"Could not read {path}: {exc}")
+
+        for line, error in importer.errors[:20]:
+            self.stderr.write(f"line {line}: {error}")
+        self.stdout.write(self.style.SUCCESS(self.summary(importer.stats, started)))
+
+    @staticmethod
+    def get_author(email):
+        if not email:
+            return None
+        try:
+            return get_user_model().objects.get(email=email)
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User {email} does not exist")
+
+    @staticmethod
+    def read_jsonl(file):
+        for line, text in enumerate(file, start=1):
+            if text.strip():
+                try:
+                    yield line, json.loads(text)
+                except ValueError:
+                    yield line, None
+
+    @staticmethod
+    def read_csv(file):
+        # The header is line 1.
+        for line, row in enumerate(csv.DictReader(file), start=2):
+            yield line, row
+
+    @staticmethod
+    def summary(stats, started: float) -> str:
+        elapsed = time.perf_counter() - started
+        rows = stats["created"] + stats["skipped"] + stats["invalid"]
+        return (
+            f"{stats['created']} created, {stats['skipped']} already imported, "
+            f"{stats['invalid']} invalid, {stats['unknown_ingredients']} unknown "
+            f"ingredients; {rows} rows in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):.0f} rows/s)"
+        )
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from core.recipe.models import Recipe
+from core.services.recipe.recipe_service import RatingService
+from core.utils.response_cache import bump_model_version
+
+
+class Command(BaseCommand):
+    help = "Recompute recipe rating aggregates from their reviews"  # noqa: A003
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        last_id, checked, repaired = 0, 0, 0
+        while True:
+            batch = list(
+                Recipe.objects.filter(pk__gt=last_id)
+                .order_by("pk")
+                .values_list("pk", flat=True)[: options["batch_size"]],
+            )
+            if not batch:
+                break
+            repaired += RatingService.recompute(batch)
+            checked += len(batch)
+            last_id = batch[-1]
+
+        if repaired:
+            bump_model_version(Recipe)
+        self.stdout.write(
+            self.style.SUCCESS(f"Checked {checked} recipes, repaired {repaired}"),
+        )
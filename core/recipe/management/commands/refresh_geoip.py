@@ -0,0 +1,79 @@
+import csv
+import gzip
+import io
+import tempfile
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+import requests
+
+from core.utils.geoip import write_database
+
+
+class Command(BaseCommand):
+    help = "Rebuild the offline GeoIP database from a CSV dataset"  # noqa: A003
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--source",
+            help="URL or path of a (gzipped) CSV of start_ip,end_ip,...,lat,lon rows; "
+            "defaults to GEOIP_SOURCE_URL",
+        )
+        parser.add_argument(
+            "--output",
+            help="Database file to replace; defaults to GEOIP_PATH",
+        )
+
+    def handle(self, *args, **options):
+        source = options["source"] or settings.GEOIP_SOURCE_URL.format(
+            date=timezone.now(),
+        )
+        output = options["output"] or settings.GEOIP_PATH
+
+        with ExitStack() as stack:
+            try:
+                file = self.open_source(stack, source)
+                counts = write_database(output, self.read_ranges(file))
+            except (OSError, ValueError, requests.RequestException) as exc:
+                raise CommandError(f"Could not read {source}: {exc}")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {counts[4]} IPv4 and {counts[6]} IPv6 ranges to {output}",
+            ),
+        )
+
+    @staticmethod
+    def open_source(stack: ExitStack, source: str):
+        if source.startswith(("http://", "https://")):
+            response = stack.enter_context(
+                requests.get(source, stream=True, timeout=60),
+            )
+            response.raise_for_status()
+            file = stack.enter_context(tempfile.TemporaryFile())
+            for chunk in response.iter_content(chunk_size=1 << 20):
+                file.write(chunk)
+            file.seek(0)
+        else:
+            file = stack.enter_context(open(source, "rb"))
+
+        if file.read(2) == b"\x1f\x8b":
+            file.seek(0)
+            file = stack.enter_context(gzip.open(file))
+        else:
+            file.seek(0)
+        return io.TextIOWrapper(file, encoding="utf-8", newline="")
+
+    @staticmethod
+    def read_ranges(file):
+        for row in csv.reader(file):
+            if len(row) < 4:
+                continue
+            try:
+                yield row[0], row[1], float(row[-2]), float(row[-1])
+            except ValueError:
+                # Header line or a range without coordinates
+                continue
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.5 on 2026-10-18 17:28
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+
+def fill_search_vector(apps, schema_editor):
+    Recipe = apps.get_model("recipe", "Recipe")
+    SearchVector = django.contrib.postgres.search.SearchVector
+    Recipe.objects.update(
+        search_vector=(
+            SearchVector("name", weight="A", config="english")
+            + SearchVector("description", weight="B", config="english")
+            + SearchVector("steps", weight="C", config="english")
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipe", "0002_alter_recipe_avg_rating_alter_recipe_number_reviews"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                blank=True, editable=False, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="recipe_search_vector_gin"
+            ),
+        ),
+        migrations.RunPython(fill_search_vector, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.5 on 2026-10-18 17:31
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def fill_likes_count(apps, schema_editor):
+    Recipe = apps.get_model("recipe", "Recipe")
+    likes = (
+        Recipe.liked_users.through.objects.filter(recipe_id=models.OuterRef("pk"))
+        .values("recipe_id")
+        .annotate(count=models.Count("*"))
+        .values("count")
+    )
+    Recipe.objects.update(likes_count=Coalesce(models.Subquery(likes), 0))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipe", "0003_recipe_search_vector"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="likes_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_likes_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.5 on 2026-10-18 17:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipe", "0004_recipe_likes_count"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="recipe_created_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["avg_rating", "id"], name="recipe_rating_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(
+                fields=["recipe", "-created_at", "-id"],
+                name="review_recipe_created_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.5 on 2026-10-18 17:45
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipe", "0005_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailySelection",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "band",
+                    models.CharField(
+                        choices=[("hot", "Hot"), ("mild", "Mild"), ("cold", "Cold")],
+                        max_length=10,
+                    ),
+                ),
+                ("date", models.DateField()),
+                (
+                    "recipe_ids",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.BigIntegerField(), size=None
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("band", "date"), name="daily_selection_band_date_unique"
+                    )
+                ],
+            },
+        ),
+    ]
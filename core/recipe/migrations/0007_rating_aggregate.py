@@ -0,0 +1,105 @@
+# Generated by Django 5.1.5 on 2026-10-18 17:51
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+
+def remove_duplicate_reviews(apps, schema_editor):
+    """Keep the latest review of every author for a recipe"""
+    Review = apps.get_model("recipe", "Review")
+    newer = Review.objects.filter(
+        author_id=models.OuterRef("author_id"),
+        recipe_id=models.OuterRef("recipe_id"),
+        pk__gt=models.OuterRef("pk"),
+    )
+    Review.objects.filter(models.Exists(newer), author__isnull=False).delete()
+
+
+def fill_rating_aggregate(apps, schema_editor):
+    Recipe = apps.get_model("recipe", "Recipe")
+    Review = apps.get_model("recipe", "Review")
+
+    def aggregate(expression):
+        reviews = (
+            Review.objects.filter(recipe_id=models.OuterRef("pk"))
+            .values("recipe_id")
+            .annotate(value=expression)
+            .values("value")
+        )
+        return Coalesce(models.Subquery(reviews), 0)
+
+    Recipe.objects.update(
+        number_reviews=aggregate(models.Count("*")),
+        rating_sum=aggregate(models.Sum("rating")),
+        **{
+            f"stars_{stars}": aggregate(
+                models.Count("pk", filter=models.Q(rating=stars)),
+            )
+            for stars in range(1, 6)
+        },
+    )
+    Recipe.objects.update(
+        avg_rating=Coalesce(
+            Cast("rating_sum", models.FloatField()) / NullIf("number_reviews", 0),
+            0.0,
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipe", "0006_daily_selection"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="rating_sum",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="stars_1",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="stars_2",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="stars_3",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="stars_4",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="stars_5",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(remove_duplicate_reviews, migrations.RunPython.noop),
+        migrations.RunPython(fill_rating_aggregate, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="recipe",
+            name="avg_rating",
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name="recipe",
+            name="number_reviews",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddConstraint(
+            model_name="review",
+            constraint=models.UniqueConstraint(
+                fields=("author", "recipe"), name="review_author_recipe_unique"
+            ),
+        ),
+    ]
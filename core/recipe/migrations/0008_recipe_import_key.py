@@ -0,0 +1,19 @@
+# Generated by Django 5.1.5 on 2026-10-18 17:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipe", "0007_rating_aggregate"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="import_key",
+            field=models.CharField(
+                blank=True, editable=False, max_length=64, null=True, unique=True
+            ),
+        ),
+    ]
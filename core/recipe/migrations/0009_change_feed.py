@@ -0,0 +1,66 @@
+# Generated by Django 5.1.5 on 2026-10-18 18:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipe", "0008_recipe_import_key"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Tombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "resource",
+                    models.CharField(
+                        choices=[
+                            ("recipes", "Recipes"),
+                            ("ingredients", "Ingredients"),
+                            ("reviews", "Reviews"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("object_id", models.BigIntegerField()),
+                ("deleted_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="ingredient",
+            index=models.Index(
+                fields=["updated_at", "id"], name="ingredient_updated_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["updated_at", "id"], name="recipe_updated_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(
+                fields=["updated_at", "id"], name="review_updated_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tombstone",
+            index=models.Index(
+                fields=["resource", "deleted_at", "id"],
+                name="tombstone_resource_deleted_idx",
+            ),
+        ),
+    ]
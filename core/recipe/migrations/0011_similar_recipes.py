@@ -0,0 +1,39 @@
+# Generated by Django 5.1.5 on 2026-10-18 18:31
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipe", "0010_recipe_image_variants"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SimilarRecipes",
+            fields=[
+                (
+                    "recipe",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="similar_recipes",
+                        serialize=False,
+                        to="recipe.recipe",
+                    ),
+                ),
+                (
+                    "recipe_ids",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.BigIntegerField(), size=None
+                    ),
+                ),
+                ("computed_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name_plural": "similar recipes",
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.5 on 2026-10-18 18:41
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("account", "0001_initial"),
+        ("recipe", "0011_similar_recipes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserRecommendations",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="recommendations",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "recipe_ids",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.BigIntegerField(), size=None
+                    ),
+                ),
+                ("computed_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name_plural": "user recommendations",
+            },
+        ),
+    ]
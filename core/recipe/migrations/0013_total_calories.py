@@ -0,0 +1,38 @@
+# Generated by Django 5.1.5 on 2026-10-18 19:04
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def fill_total_calories(apps, schema_editor):
+    Recipe = apps.get_model("recipe", "Recipe")
+    calories = (
+        Recipe.ingredients.through.objects.filter(recipe_id=models.OuterRef("pk"))
+        .values("recipe_id")
+        .annotate(total=models.Sum("ingredient__caloric_content"))
+        .values("total")
+    )
+    Recipe.objects.update(total_calories=Coalesce(models.Subquery(calories), 0))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipe", "0012_user_recommendations"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="total_calories",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_total_calories, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["total_calories", "id"], name="recipe_calories_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.1.5 on 2026-10-18 19:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipe", "0013_total_calories"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # The covering index replaces the plain one; create it first, so that
+        # rating queries are never left without an index.
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["avg_rating", "id"],
+                include=("category",),
+                name="recipe_rating_category_idx",
+            ),
+        ),
+        migrations.RemoveIndex(
+            model_name="recipe",
+            name="recipe_rating_id_idx",
+        ),
+        migrations.AlterField(
+            model_name="review",
+            name="author",
+            field=models.ForeignKey(
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="reviews",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="review",
+            name="recipe",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="reviews",
+                to="recipe.recipe",
+            ),
+        ),
+    ]
@@ -1,18 +1,20 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
-from django.utils.text import slugify
 
+from core.utils.slugs import save_with_slug
 
-def create_slug_field(name, queryset):
-    """Generate unique slug for any model"""
-    base_slug = slugify(name)
-    unique_slug = base_slug
-    num = 1
-    while queryset.filter(slug=unique_slug).exists():
-        unique_slug = f"{base_slug}-{num}"
-        num += 1
-    return unique_slug
+
+def recipe_search_vector():
+    """Weighted document used for recipe full-text search"""
+    return (
+        SearchVector("name", weight="A", config="english")
+        + SearchVector("description", weight="B", config="english")
+        + SearchVector("steps", weight="C", config="english")
+    )
 
 
 class Ingredient(models.Model):
@@ -48,15 +50,34 @@ class Ingredient(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Change feed: rows changed since (updated_at, id).
+            models.Index(fields=["updated_at", "id"], name="ingredient_updated_id_idx"),
+        ]
+
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = create_slug_field(self.name, Ingredient.objects.all())
-        super().save(*args, **kwargs)
+        if self.slug:
+            super().save(*args, **kwargs)
+        else:
+            save_with_slug(self, super().save, *args, **kwargs)
 
     def __str__(self):
         return f"{self.id} | {self.name} | {self.category}"
 
 
+class RecipeQuerySet(models.QuerySet):
+    def with_related(self):
+        """Load everything RecipeSerializer touches in a constant number of queries"""
+        return self.select_related("author").prefetch_related(
+            models.Prefetch("ingredients", queryset=Ingredient.objects.only("id")),
+            models.Prefetch(
+                "liked_users",
+                queryset=get_user_model().objects.only("id"),
+            ),
+        )
+
+
 class Recipe(models.Model):
     CATEGORY_CHOICES = [
         ("breakfast", "Breakfast"),
@@ -81,15 +102,27 @@ class Recipe(models.Model):
         choices=[("easy", "Easy"), ("medium", "Medium"), ("hard", "Hard")],
     )
     image = models.ImageField(upload_to="images_recipes/", blank=True, null=True)
+    # Resized copies of `image`, rendered in the background by image_service
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     country = models.CharField(max_length=100)
-    avg_rating = models.FloatField(default=0, blank=True, null=True)
-    number_reviews = models.IntegerField(default=0, blank=True, null=True)
+    # Rating aggregate, maintained by RatingService on every review write
+    avg_rating = models.FloatField(default=0, editable=False)
+    number_reviews = models.IntegerField(default=0, editable=False)
+    rating_sum = models.IntegerField(default=0, editable=False)
+    stars_1 = models.IntegerField(default=0, editable=False)
+    stars_2 = models.IntegerField(default=0, editable=False)
+    stars_3 = models.IntegerField(default=0, editable=False)
+    stars_4 = models.IntegerField(default=0, editable=False)
+    stars_5 = models.IntegerField(default=0, editable=False)
     liked_users = models.ManyToManyField(
         get_user_model(),
         related_name="liked_recipes",
         blank=True,
     )
+    likes_count = models.PositiveIntegerField(default=0, editable=False)
     ingredients = models.ManyToManyField(Ingredient, related_name="recipes")
+    # Sum of the ingredients' caloric_content, maintained by CalorieService
+    total_calories = models.PositiveIntegerField(default=0, editable=False)
     author = models.ForeignKey(
         get_user_model(),
         on_delete=models.CASCADE,
@@ -99,27 +132,207 @@ class Recipe(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     created_at = models.DateTimeField(auto_now_add=True)
     slug = models.SlugField(unique=True, db_index=True, blank=True)
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
+    # Identifies rows loaded by `manage.py import_recipes`, so re-runs skip them
+    import_key = models.CharField(
+        max_length=64,
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False,
+    )
+
+    SEARCH_FIELDS = {"name", "description", "steps"}
+    # Denormalized columns moved by atomic UPDATEs only (RatingService, the
+    # likes signal): a full save() of a copy loaded earlier must not write its
+    # stale values back.
+    MAINTAINED_FIELDS = {
+        "avg_rating",
+        "number_reviews",
+        "rating_sum",
+        "stars_1",
+        "stars_2",
+        "stars_3",
+        "stars_4",
+        "stars_5",
+        "likes_count",
+    }
+
+    objects = RecipeQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="recipe_search_vector_gin"),
+            # Keyset pagination: (ordering field, id) for every supported ordering.
+            models.Index(fields=["-created_at", "-id"], name="recipe_created_id_idx"),
+            # Covers the daily recipes too (category IN ... by best rating),
+            # as an index only scan.
+            models.Index(
+                fields=["avg_rating", "id"],
+                include=["category"],
+                name="recipe_rating_category_idx",
+            ),
+            # Also serves the calories_min/calories_max range filters.
+            models.Index(
+                fields=["total_calories", "id"],
+                name="recipe_calories_id_idx",
+            ),
+            models.Index(fields=["updated_at", "id"], name="recipe_updated_id_idx"),
+        ]
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = create_slug_field(self.name, Recipe.objects.all())
-        super().save(*args, **kwargs)
+        if (
+            kwargs.get("update_fields") is None
+            and not kwargs.get("force_insert")
+            and not self._state.adding
+        ):
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.MAINTAINED_FIELDS
+                and field.attname not in deferred
+            ]
+
+        if self.slug:
+            super().save(*args, **kwargs)
+        else:
+            save_with_slug(self, super().save, *args, **kwargs)
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or self.SEARCH_FIELDS & set(update_fields):
+            Recipe.objects.filter(pk=self.pk).update(
+                search_vector=recipe_search_vector(),
+            )
 
     def __str__(self):
         return f"{self.name}"
 
 
 class Review(models.Model):
+    # Both foreign keys lead an index of Meta (the author/recipe constraint
+    # and review_recipe_created_idx), so neither needs one of its own.
     author = models.ForeignKey(
         get_user_model(),
         on_delete=models.CASCADE,
         related_name="reviews",
         null=True,
+        db_index=False,
     )
     description = models.TextField()
     rating = models.PositiveIntegerField(
         validators=[MinValueValidator(1), MaxValueValidator(5)],
     )
-    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name="reviews")
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="reviews",
+        db_index=False,
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["author", "recipe"],
+                name="review_author_recipe_unique",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["recipe", "-created_at", "-id"],
+                name="review_recipe_created_idx",
+            ),
+            models.Index(fields=["updated_at", "id"], name="review_updated_id_idx"),
+        ]
+
+
+class DailySelection(models.Model):
+    """Recipe ids shown by the daily recipes for one temperature band and day"""
+
+    BAND_CHOICES = [
+        ("hot", "Hot"),
+        ("mild", "Mild"),
+        ("cold", "Cold"),
+    ]
+
+    band = models.CharField(max_length=10, choices=BAND_CHOICES)
+    date = models.DateField()
+    recipe_ids = ArrayField(models.BigIntegerField())
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["band", "date"],
+                name="daily_selection_band_date_unique",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.date} | {self.band}"
+
+
+class SimilarRecipes(models.Model):
+    """Precomputed nearest neighbors of a recipe, most similar first"""
+
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="similar_recipes",
+    )
+    recipe_ids = ArrayField(models.BigIntegerField())
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "similar recipes"
+
+    def __str__(self):
+        return f"{self.recipe_id} | {len(self.recipe_ids)} neighbors"
+
+
+class UserRecommendations(models.Model):
+    """Precomputed "for you" recipes of a user, best first"""
+
+    user = models.OneToOneField(
+        get_user_model(),
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="recommendations",
+    )
+    recipe_ids = ArrayField(models.BigIntegerField())
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "user recommendations"
+
+    def __str__(self):
+        return f"{self.user_id} | {len(self.recipe_ids)} recipes"
+
+
+class Tombstone(models.Model):
+    """A deleted recipe, ingredient or review, reported by the change feed"""
+
+    RESOURCE_CHOICES = [
+        ("recipes", "Recipes"),
+        ("ingredients", "Ingredients"),
+        ("reviews", "Reviews"),
+    ]
+
+    resource = models.CharField(max_length=20, choices=RESOURCE_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["resource", "deleted_at", "id"],
+                name="tombstone_resource_deleted_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.resource} | {self.object_id} | {self.deleted_at}"
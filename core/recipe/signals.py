@@ -0,0 +1,193 @@
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from core.jobs.job_queue import enqueue
+from core.recipe.jobs import recompute_ratings, render_image_variants
+from core.recipe.models import DailySelection, Ingredient, Recipe, Review, Tombstone
+from core.services.recipe.image_service import delete_variants
+from core.services.recipe.ingredient_catalog import ingredient_catalog
+from core.services.recipe.pantry_service import ingredient_index
+from core.services.recipe.recipe_service import CalorieService, LikeService
+from core.utils.response_cache import bump_model_version
+from core.utils.versions import bump_version
+
+
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def update_ingredient_index(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear":
+        related = instance.recipes if reverse else instance.ingredients
+        instance._cleared_pks = set(related.values_list("pk", flat=True))
+        return
+    if action == "post_clear":
+        pk_set = instance.__dict__.pop("_cleared_pks", set())
+    elif action not in ("post_add", "post_remove"):
+        return
+
+    if reverse:
+        pairs = [(instance.pk, recipe_id) for recipe_id in pk_set]
+    else:
+        pairs = [(ingredient_id, instance.pk) for ingredient_id in pk_set]
+
+    handler = ingredient_index.add if action == "post_add" else ingredient_index.remove
+    transaction.on_commit(partial(handler, pairs))
+
+
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def update_total_calories(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear" and reverse:
+        instance._cleared_calorie_recipe_pks = set(
+            instance.recipes.values_list("pk", flat=True),
+        )
+    elif action in ("post_add", "post_remove", "post_clear") and reverse:
+        if action == "post_clear":
+            pk_set = instance.__dict__.pop("_cleared_calorie_recipe_pks", set())
+        # Their ingredient list changed: the change feed must report them
+        # even when the total did not move.
+        CalorieService.recompute(pk_set, touch=True)
+    elif action in ("post_add", "post_remove", "post_clear"):
+        CalorieService.recompute([instance.pk], touch=True)
+        # A later recipe.save() must not write back the old total.
+        instance.refresh_from_db(fields=["total_calories", "updated_at"])
+
+
+@receiver(post_save, sender=Ingredient)
+def update_total_calories_of_ingredient(
+    sender,
+    instance,
+    created,
+    update_fields=None,
+    **kwargs,
+):
+    # A new ingredient is in no recipe yet.
+    if created or (
+        update_fields is not None and "caloric_content" not in update_fields
+    ):
+        return
+    if CalorieService.recompute_for_ingredients([instance.pk]):
+        transaction.on_commit(partial(bump_model_version, Recipe))
+
+
+@receiver(pre_delete, sender=Ingredient)
+def remember_recipes_of_ingredient(sender, instance, **kwargs):
+    # The through rows go away in the cascade, without m2m_changed.
+    instance._calorie_recipe_pks = list(
+        instance.recipes.values_list("pk", flat=True),
+    )
+
+
+@receiver(post_delete, sender=Ingredient)
+def update_total_calories_of_deleted_ingredient(sender, instance, **kwargs):
+    recipe_pks = instance.__dict__.pop("_calorie_recipe_pks", [])
+    if recipe_pks and CalorieService.recompute(recipe_pks):
+        transaction.on_commit(partial(bump_model_version, Recipe))
+
+
+@receiver(post_delete, sender=Recipe)
+def discard_recipe_from_index(sender, instance, **kwargs):
+    transaction.on_commit(partial(ingredient_index.discard_recipe, instance.pk))
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_delete, sender=Review)
+def record_tombstone(sender, instance, **kwargs):
+    # Route names of the change feed: "recipes", "ingredients", "reviews".
+    Tombstone.objects.create(
+        resource=f"{sender._meta.model_name}s",
+        object_id=instance.pk,
+    )
+
+
+@receiver(post_delete, sender=Ingredient)
+def discard_ingredient_from_index(sender, instance, **kwargs):
+    transaction.on_commit(partial(ingredient_index.discard_ingredient, instance.pk))
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def bump_ingredient_catalog_version(sender, **kwargs):
+    transaction.on_commit(partial(bump_version, ingredient_catalog.version_name))
+
+
+@receiver(m2m_changed, sender=Recipe.liked_users.through)
+def recount_recipe_likes(sender, instance, action, reverse, pk_set, **kwargs):
+    # LikeService.toggle_like updates likes_count itself; this covers
+    # .add()/.set()/.clear() from the admin, fixtures and services.
+    if action == "pre_clear" and reverse:
+        instance._cleared_recipe_pks = set(
+            instance.liked_recipes.values_list("pk", flat=True),
+        )
+    elif action in ("post_add", "post_remove"):
+        LikeService.recount_likes(pk_set if reverse else [instance.pk])
+    elif action == "post_clear":
+        LikeService.recount_likes(
+            (
+                instance.__dict__.pop("_cleared_recipe_pks", set())
+                if reverse
+                else [instance.pk]
+            ),
+        )
+    if action in ("post_add", "post_remove", "post_clear") and not reverse:
+        instance.refresh_from_db(fields=["likes_count"])
+
+
+@receiver(pre_delete, sender=get_user_model())
+def remember_liked_and_reviewed_recipes(sender, instance, **kwargs):
+    instance._liked_recipe_pks = list(
+        instance.liked_recipes.values_list("pk", flat=True),
+    )
+    # Their reviews go away in the cascade, bypassing ReviewService.
+    instance._reviewed_recipe_pks = list(
+        instance.reviews.values_list("recipe_id", flat=True),
+    )
+
+
+@receiver(post_delete, sender=get_user_model())
+def recount_likes_and_ratings_of_deleted_user(sender, instance, **kwargs):
+    LikeService.recount_likes(instance.__dict__.pop("_liked_recipe_pks", []))
+    # Their reviews may be deleted after the user (the FK is nullable), so
+    # recompute once the whole cascade is done.
+    recipe_pks = instance.__dict__.pop("_reviewed_recipe_pks", [])
+    if recipe_pks:
+        enqueue(recompute_ratings, recipe_ids=sorted(set(recipe_pks)))
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_save, sender=DailySelection)
+@receiver(post_delete, sender=DailySelection)
+def invalidate_cached_responses(sender, **kwargs):
+    # After the commit: a reader must not cache the old rows under the new version.
+    transaction.on_commit(partial(bump_model_version, sender))
+
+
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+@receiver(m2m_changed, sender=Recipe.liked_users.through)
+def invalidate_cached_recipe_responses(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        transaction.on_commit(partial(bump_model_version, Recipe))
+
+
+@receiver(post_save, sender=Recipe)
+def schedule_image_variants(sender, instance, update_fields=None, **kwargs):
+    if "image" in instance.get_deferred_fields() or (
+        update_fields is not None and "image" not in update_fields
+    ):
+        return
+    name = instance.image.name or ""
+    if name == instance.image_variants.get("source", ""):
+        return
+    if name:
+        enqueue(render_image_variants, recipe_id=instance.pk, name=name)
+    else:
+        transaction.on_commit(partial(delete_variants, instance.image_variants))
+        Recipe.objects.filter(pk=instance.pk).update(image_variants={})
+        instance.image_variants = {}
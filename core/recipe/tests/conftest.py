@@ -1,11 +1,77 @@
 import datetime
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
 
+from django.core.cache import cache
 from django.utils import timezone
 
 import pytest
 from rest_framework.test import APIClient
 
 from core.recipe.models import Ingredient, Recipe
+from core.utils.http_client import reset_clients
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def response_cache_disabled(settings):
+    # Invalidation runs on commit, which never comes inside a test
+    # transaction; test_response_cache.py turns it back on.
+    settings.RESPONSE_CACHE_TIMEOUT = 0
+
+
+@pytest.fixture(autouse=True)
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path / "media"
+    return settings.MEDIA_ROOT
+
+
+@pytest.fixture(autouse=True)
+def http_clients():
+    # Circuit breakers and pools must not leak between tests.
+    reset_clients()
+
+
+@pytest.fixture
+def weather_server(settings):
+    """Local stand-in for the tomorrow.io realtime endpoint"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):  # noqa: N802
+            server.requests.append(parse_qs(urlparse(self.path).query))
+            server.clients.add(self.client_address)
+            time.sleep(server.delay)
+            body = json.dumps(
+                {"data": {"values": {"temperature": server.temperature}}},
+            ).encode()
+            status = server.statuses.pop(0) if server.statuses else server.status
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.requests, server.clients = [], set()
+    server.temperature, server.status, server.statuses, server.delay = 20.5, 200, [], 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = settings.TOMORROW_IO_URL = f"http://127.0.0.1:{server.server_port}/"
+    yield server
+    server.shutdown()
+    server.server_close()
 
 
 @pytest.fixture
@@ -67,6 +133,30 @@ def ingredients():
     return ingredients
 
 
+@pytest.fixture
+def create_recipe():
+    """Factory of lunch recipes with the given ingredients and likers"""
+
+    def create(name, ingredients=(), liked_users=(), **fields):
+        recipe = Recipe.objects.create(
+            **{
+                "name": name,
+                "category": "lunch",
+                "description": name,
+                "steps": "1 step",
+                "total_cooking_time": 30,
+                "difficulty": "easy",
+                "country": "Italy",
+                **fields,
+            },
+        )
+        recipe.ingredients.set(ingredients)
+        recipe.liked_users.set(liked_users)
+        return recipe
+
+    return create
+
+
 @pytest.fixture
 def recipes(users, ingredients):
     recipes = [
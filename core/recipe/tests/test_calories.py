@@ -0,0 +1,99 @@
+import io
+
+from django.core.management import call_command
+from django.urls import reverse
+
+import pytest
+
+from core.recipe.models import Ingredient, Recipe
+
+PIZZA_CALORIES = 364 + 280 + 18 + 494 + 143 + 100 + 884
+RATATOUILLE_CALORIES = 25 + 17 + 18 + 31 + 40 + 149 + 884 + 101 + 23
+
+
+def total_calories(recipe):
+    return Recipe.objects.values_list("total_calories", flat=True).get(pk=recipe.pk)
+
+
+@pytest.mark.django_db()
+def test_total_calories_follow_recipe_ingredients(recipes, ingredients):
+    pizza, ratatouille = recipes
+    assert pizza.total_calories == total_calories(pizza) == PIZZA_CALORIES
+    assert total_calories(ratatouille) == RATATOUILLE_CALORIES
+
+    flour, *_, olive_oil = ingredients["pizza"]
+    pizza.ingredients.remove(olive_oil)
+    assert total_calories(pizza) == PIZZA_CALORIES - 884
+    # The refreshed instance does not write the old total back.
+    pizza.save()
+    assert total_calories(pizza) == PIZZA_CALORIES - 884
+
+    # From the ingredient side.
+    flour.recipes.add(ratatouille)
+    assert total_calories(ratatouille) == RATATOUILLE_CALORIES + 364
+    flour.recipes.clear()
+    assert total_calories(pizza) == PIZZA_CALORIES - 884 - 364
+    assert total_calories(ratatouille) == RATATOUILLE_CALORIES
+
+    ratatouille.ingredients.clear()
+    assert total_calories(ratatouille) == 0
+
+
+@pytest.mark.django_db()
+def test_total_calories_follow_ingredient_changes(recipes, ingredients):
+    pizza, ratatouille = recipes
+    olive_oil = ingredients["pizza"][-1]
+    ratatouille.ingredients.add(olive_oil)
+
+    olive_oil.caloric_content = 900
+    olive_oil.save()
+    assert total_calories(pizza) == PIZZA_CALORIES + 16
+    assert total_calories(ratatouille) == RATATOUILLE_CALORIES + 900
+
+    olive_oil.delete()
+    assert total_calories(pizza) == PIZZA_CALORIES - 884
+    assert total_calories(ratatouille) == RATATOUILLE_CALORIES
+
+
+@pytest.mark.django_db()
+def test_filter_and_order_by_calories(client, recipes):
+    url = reverse("recipe-list")
+    response = client.get(url, {"calories_min": 2000})
+    assert [recipe["name"] for recipe in response.data["results"]] == [
+        "Pizza Margarrita",
+    ]
+    assert response.data["results"][0]["total_calories"] == PIZZA_CALORIES
+
+    response = client.get(url, {"calories_min": 1000, "calories_max": 2000})
+    assert [recipe["name"] for recipe in response.data["results"]] == ["Ratatouille"]
+
+    response = client.get(url, {"ordering": "total_calories"})
+    assert [recipe["name"] for recipe in response.data["results"]] == [
+        "Ratatouille",
+        "Pizza Margarrita",
+    ]
+
+    response = client.get(
+        url,
+        {"ordering": "-total_calories", "pagination": "cursor", "size": 1},
+    )
+    assert [recipe["name"] for recipe in response.data["results"]] == [
+        "Pizza Margarrita",
+    ]
+    response = client.get(response.data["next"])
+    assert [recipe["name"] for recipe in response.data["results"]] == ["Ratatouille"]
+    assert response.data["next"] is None
+
+
+@pytest.mark.django_db()
+def test_recompute_calories_command(recipes):
+    # Bulk updates send no signals.
+    Ingredient.objects.filter(name="Olive Oil").update(caloric_content=0)
+    Recipe.objects.filter(pk=recipes[1].pk).update(total_calories=0)
+
+    stdout = io.StringIO()
+    call_command("recompute_calories", batch_size=1, stdout=stdout)
+
+    assert "Checked 2 recipes, repaired 2" in stdout.getvalue()
+    assert total_calories(recipes[0]) == PIZZA_CALORIES - 884
+    assert total_calories(recipes[1]) == RATATOUILLE_CALORIES
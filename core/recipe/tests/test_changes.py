@@ -0,0 +1,146 @@
+from datetime import timedelta
+
+from django.urls import reverse
+from django.utils import timezone
+
+import pytest
+from rest_framework import status
+
+from core.recipe.jobs import purge_tombstones
+from core.recipe.models import Ingredient, Review, Tombstone
+
+
+@pytest.fixture
+def feed(client, users, settings):
+    settings.CHANGE_FEED_LAG = 0
+    client.force_authenticate(user=users[0])
+
+    def get(resource, **params):
+        url = reverse("change-feed", kwargs={"resource": resource})
+        response = client.get(url, params)
+        assert response.status_code == status.HTTP_200_OK
+        return response.data
+
+    return get
+
+
+@pytest.mark.django_db()
+def test_change_feed_requires_authentication(client):
+    response = client.get(reverse("change-feed", kwargs={"resource": "recipes"}))
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db()
+def test_change_feed_pages_and_resumes(feed, recipes):
+    first = feed("recipes", size=1)
+    assert [row["slug"] for row in first["results"]] == ["pizza-margarrita"]
+    assert first["has_more"]
+
+    second = feed("recipes", size=1, cursor=first["cursor"])
+    assert [row["slug"] for row in second["results"]] == ["ratatouille"]
+    assert second["results"][0]["ingredients"]
+
+    # Nothing new: the same cursor comes back.
+    third = feed("recipes", cursor=second["cursor"])
+    assert third == {**third, "results": [], "deleted": [], "has_more": False}
+    assert third["cursor"] == second["cursor"]
+
+    recipes[1].name = "Ratatouille Nicoise"
+    recipes[1].save()
+    changed = feed("recipes", cursor=third["cursor"])
+    assert [row["name"] for row in changed["results"]] == ["Ratatouille Nicoise"]
+
+
+@pytest.mark.django_db()
+def test_change_feed_reports_deletes(client, feed, users, recipes):
+    Review.objects.create(
+        author=users[1],
+        recipe=recipes[0],
+        rating=5,
+        description="Great",
+    )
+    review_cursor = feed("reviews")["cursor"]
+    recipe_cursor = feed("recipes")["cursor"]
+
+    client.force_authenticate(user=users[0])
+    response = client.delete(
+        reverse("recipe-detail", kwargs={"slug": recipes[0].slug}),
+    )
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    assert feed("recipes", cursor=recipe_cursor)["deleted"] == [recipes[0].id]
+    # The cascade deleted its review too.
+    reviews = feed("reviews", cursor=review_cursor)
+    assert len(reviews["deleted"]) == 1 and reviews["results"] == []
+
+
+@pytest.mark.django_db()
+def test_change_feed_rating_and_likes_move_updated_at(client, feed, users, recipes):
+    cursor = feed("recipes")["cursor"]
+
+    client.force_authenticate(user=users[1])
+    client.post(reverse("like-toggle", kwargs={"slug": recipes[1].slug}))
+    client.post(
+        reverse("review-list", kwargs={"slug": recipes[0].slug}),
+        {"rating": 4, "description": "Nice"},
+    )
+
+    rows = feed("recipes", cursor=cursor)["results"]
+    assert {
+        row["slug"]: (row["likes_count"], row["number_reviews"]) for row in rows
+    } == {
+        recipes[1].slug: (1, 0),
+        recipes[0].slug: (0, 1),
+    }
+
+
+@pytest.mark.django_db()
+def test_change_feed_ingredient_edits_move_updated_at(feed, recipes, ingredients):
+    cursor = feed("recipes")["cursor"]
+    # Zero calories: the total stays the same.
+    salt = Ingredient.objects.create(name="Salt", caloric_content=0)
+    recipes[0].ingredients.add(salt)
+    rows = feed("recipes", cursor=cursor)["results"]
+    assert [row["slug"] for row in rows] == [recipes[0].slug]
+    assert salt.id in rows[0]["ingredients"]
+
+    cursor = feed("recipes", cursor=cursor)["cursor"]
+    salt.recipes.add(recipes[1])
+    rows = feed("recipes", cursor=cursor)["results"]
+    assert [row["slug"] for row in rows] == [recipes[1].slug]
+
+
+@pytest.mark.django_db()
+def test_change_feed_purges_old_tombstones(feed, recipes, settings):
+    settings.CHANGE_FEED_KEEP_DAYS = 30
+    recipe_ids = [recipe.id for recipe in recipes]
+    for recipe in recipes:
+        recipe.delete()
+    Tombstone.objects.filter(object_id=recipe_ids[0]).update(
+        deleted_at=timezone.now() - timedelta(days=31),
+    )
+
+    purge_tombstones()
+    assert feed("recipes")["deleted"] == recipe_ids[1:]
+
+
+@pytest.mark.django_db()
+def test_change_feed_updated_since_and_errors(feed, client, ingredients, settings):
+    tomato = Ingredient.objects.get(name="Tomato")
+    tomato.caloric_content = 20
+    tomato.save()
+
+    rows = feed("ingredients", updated_since=tomato.updated_at.isoformat())["results"]
+    assert [row["name"] for row in rows] == ["Tomato"]
+
+    url = reverse("change-feed", kwargs={"resource": "ingredients"})
+    assert client.get(url, {"cursor": "nope"}).status_code == 400
+    recipes_url = reverse("change-feed", kwargs={"resource": "recipes"})
+    cursor = feed("ingredients")["cursor"]
+    assert client.get(recipes_url, {"cursor": cursor}).status_code == 400
+    unknown_url = reverse("change-feed", kwargs={"resource": "users"})
+    assert client.get(unknown_url).status_code == 404
+
+    settings.CHANGE_FEED_LAG = 3600
+    assert feed("ingredients")["results"] == []
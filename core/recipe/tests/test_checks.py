@@ -0,0 +1,59 @@
+import pytest
+
+from core.recipe.checks import check_shared_default_cache, check_shared_like_counter
+
+LOCMEM = "django.core.cache.backends.locmem.LocMemCache"
+REDIS = "django.core.cache.backends.redis.RedisCache"
+
+
+@pytest.fixture
+def default_cache(settings):
+    def configure(backend, alias="default"):
+        settings.CACHES = {**settings.CACHES, alias: {"BACKEND": backend}}
+
+    return configure
+
+
+def error_ids():
+    return [error.id for error in check_shared_default_cache(None)]
+
+
+def test_process_local_default_cache_outside_debug(settings, default_cache):
+    default_cache(LOCMEM)
+    settings.DEBUG = True
+    assert error_ids() == []
+
+    settings.DEBUG = False
+    assert error_ids() == ["recipe.E001"]
+
+    default_cache(REDIS)
+    assert error_ids() == []
+
+
+def test_shared_response_cache_with_local_versions(settings, default_cache):
+    settings.DEBUG = True
+    default_cache(LOCMEM)
+    default_cache(REDIS, alias="responses")
+    settings.RESPONSE_CACHE_ALIAS = "responses"
+    settings.RESPONSE_CACHE_TIMEOUT = 300
+    assert error_ids() == ["recipe.E002"]
+
+    settings.RESPONSE_CACHE_TIMEOUT = 0
+    assert error_ids() == []
+
+    settings.RESPONSE_CACHE_TIMEOUT = 300
+    default_cache(REDIS)
+    assert error_ids() == []
+
+
+def test_buffered_likes_need_a_shared_default_cache(settings, default_cache):
+    settings.DEBUG = True
+    default_cache(LOCMEM)
+    settings.LIKES_FLUSH_INTERVAL = 0
+    assert check_shared_like_counter(None) == []
+
+    settings.LIKES_FLUSH_INTERVAL = 30
+    assert [error.id for error in check_shared_like_counter(None)] == ["recipe.E003"]
+
+    default_cache(REDIS)
+    assert check_shared_like_counter(None) == []
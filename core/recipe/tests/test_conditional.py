@@ -0,0 +1,86 @@
+from django.urls import reverse
+
+import pytest
+from rest_framework import status
+
+from core.recipe.models import Ingredient, Review
+
+
+@pytest.mark.django_db()
+def test_recipe_detail_not_modified(client, recipes, django_assert_num_queries):
+    recipe_url = reverse("recipe-detail", kwargs={"slug": recipes[0].slug})
+    response = client.get(recipe_url)
+    etag = response["ETag"]
+    assert response.status_code == status.HTTP_200_OK
+    assert "Last-Modified" in response
+
+    # One aggregate query, nothing serialized.
+    with django_assert_num_queries(1):
+        response = client.get(recipe_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response["ETag"] == etag
+
+    recipes[0].description = "even better pizza"
+    recipes[0].save()
+    response = client.get(recipe_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response["ETag"] != etag
+
+
+@pytest.mark.django_db()
+def test_recipe_detail_if_modified_since(client, recipes):
+    recipe_url = reverse("recipe-detail", kwargs={"slug": recipes[0].slug})
+    last_modified = client.get(recipe_url)["Last-Modified"]
+
+    response = client.get(recipe_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    missing_url = reverse("recipe-detail", kwargs={"slug": "missing"})
+    assert client.get(missing_url).status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db()
+def test_recipe_list_etag_follows_filters_users_and_deletes(client, users, recipes):
+    recipe_url = reverse("recipe-list")
+    etag = client.get(recipe_url)["ETag"]
+    assert client.get(recipe_url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+    assert client.get(recipe_url, {"country": "Italy"})["ETag"] != etag
+
+    # is_liked differs per user.
+    client.force_authenticate(user=users[0])
+    response = client.get(recipe_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert "Authorization" in response["Vary"]
+    user_etag = response["ETag"]
+
+    client.post(reverse("like-toggle", kwargs={"slug": recipes[1].slug}))
+    response = client.get(recipe_url, HTTP_IF_NONE_MATCH=user_etag)
+    assert response.status_code == status.HTTP_200_OK
+
+    etag = response["ETag"]
+    recipes[1].delete()
+    response = client.get(recipe_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.data["results"]) == 1
+
+
+@pytest.mark.django_db()
+def test_review_and_ingredient_lists_not_modified(client, users, recipes):
+    review_url = reverse("review-list", kwargs={"slug": recipes[0].slug})
+    etag = client.get(review_url)["ETag"]
+    assert client.get(review_url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    Review.objects.create(
+        author=users[1],
+        recipe=recipes[0],
+        rating=5,
+        description="Yum",
+    )
+    assert client.get(review_url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    ingredient_url = reverse("ingredient-list")
+    etag = client.get(ingredient_url)["ETag"]
+    assert client.get(ingredient_url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    Ingredient.objects.filter(name="Thyme").delete()
+    assert client.get(ingredient_url, HTTP_IF_NONE_MATCH=etag).status_code == 200
@@ -0,0 +1,67 @@
+import gzip
+import json
+
+from django.core.management import call_command
+from django.urls import reverse
+
+import pytest
+from rest_framework import status
+
+
+def read_lines(content):
+    return [json.loads(line) for line in content.decode().splitlines()]
+
+
+@pytest.mark.django_db()
+def test_export_requires_authentication(client):
+    response = client.get(reverse("recipe-export"))
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db()
+def test_export_streams_ndjson(client, users, recipes, django_assert_num_queries):
+    recipes[0].liked_users.add(users[1])
+    recipes[0].likes_count = 1
+    recipes[0].save()
+    client.force_authenticate(user=users[0])
+
+    response = client.get(reverse("recipe-export"))
+    assert response.streaming
+    assert response["Content-Type"] == "application/x-ndjson"
+    # One query per chunk of recipes, one for their ingredients.
+    with django_assert_num_queries(2):
+        rows = read_lines(b"".join(response.streaming_content))
+
+    assert [row["slug"] for row in rows] == [recipe.slug for recipe in recipes]
+    pizza = rows[0]
+    assert pizza["likes_count"] == 1
+    assert pizza["avg_rating"] == 3.2
+    assert pizza["ingredients"] == sorted(
+        ingredient.id for ingredient in recipes[0].ingredients.all()
+    )
+    assert "description" in pizza and "search_vector" not in pizza
+
+
+@pytest.mark.django_db()
+def test_export_gzip(client, users, recipes):
+    client.force_authenticate(user=users[0])
+
+    response = client.get(reverse("recipe-export"), {"compress": "gzip"})
+
+    assert response["Content-Type"] == "application/gzip"
+    assert "recipes.ndjson.gz" in response["Content-Disposition"]
+    content = gzip.decompress(b"".join(response.streaming_content))
+    assert len(read_lines(content)) == 2
+
+
+@pytest.mark.django_db()
+def test_export_recipes_command(recipes, tmp_path):
+    output = tmp_path / "recipes.ndjson.gz"
+
+    call_command("export_recipes", output=str(output), chunk_size=1)
+
+    with gzip.open(output) as file:
+        rows = read_lines(file.read())
+    assert {row["name"] for row in rows} == {"Pizza Margarrita", "Ratatouille"}
+    assert all(row["ingredients"] for row in rows)
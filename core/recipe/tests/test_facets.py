@@ -0,0 +1,79 @@
+from django.urls import reverse
+
+import pytest
+from rest_framework import status
+
+from core.recipe.models import Recipe
+from core.utils.response_cache import bump_model_version
+
+
+@pytest.fixture
+def calzone(recipes, ingredients, create_recipe):
+    return create_recipe(
+        "Calzone",
+        ingredients["pizza"][:3],
+        description="folded pizza",
+        difficulty="medium",
+    )
+
+
+@pytest.mark.django_db()
+def test_recipe_facets(client, calzone, django_assert_num_queries):
+    url = reverse("recipe-facets")
+    with django_assert_num_queries(1):
+        response = client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data == {
+        "count": 3,
+        "category": [
+            {"value": "lunch", "count": 2},
+            {"value": "side_dish", "count": 1},
+        ],
+        "difficulty": [
+            {"value": "medium", "count": 2},
+            {"value": "easy", "count": 1},
+        ],
+        "country": [
+            {"value": "Italy", "count": 2},
+            {"value": "France", "count": 1},
+        ],
+    }
+
+    response = client.get(url, {"ingredients": "tomato,flour", "calories_max": 1000})
+    assert response.data == {
+        "count": 1,
+        "category": [{"value": "lunch", "count": 1}],
+        "difficulty": [{"value": "medium", "count": 1}],
+        "country": [{"value": "Italy", "count": 1}],
+    }
+
+    response = client.get(url, {"ingredients": "saffron"})
+    assert response.data == {
+        "count": 0,
+        "category": [],
+        "difficulty": [],
+        "country": [],
+    }
+
+
+@pytest.mark.django_db()
+def test_recipe_facets_cached_per_normalized_filter(client, calzone):
+    url = reverse("recipe-facets")
+    params = {"ingredients": "Tomato, flour", "calories_max": "1000", "page": "2"}
+    cached = client.get(url, params).data
+
+    calzone.delete()
+    # The same filter: case, term order and unrelated params do not matter.
+    params = {"ingredients": "flour,tomato", "calories_max": "1000.0"}
+    assert client.get(url, params).data == cached
+
+    # Invalidated with the recipes (on commit, outside of tests).
+    bump_model_version(Recipe)
+    assert client.get(url, params).data["count"] == 0
+
+
+@pytest.mark.django_db()
+def test_recipe_facets_invalid_filter(client, recipes):
+    response = client.get(reverse("recipe-facets"), {"calories_min": "lots"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "calories_min" in response.data
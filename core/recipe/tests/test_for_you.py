@@ -0,0 +1,90 @@
+import io
+
+from django.core.management import call_command
+from django.urls import reverse
+
+import numpy as np
+import pytest
+from rest_framework import status
+from scipy import sparse
+
+from core.recipe.models import Recipe, Review, UserRecommendations
+from core.utils.recommend import recommend
+
+
+@pytest.fixture
+def history(recipes, users, django_user_model, create_recipe):
+    u0, u1 = users
+    u2, u3, u4, newcomer = (
+        django_user_model.objects.create_user(
+            email=f"user{number}@example.com",
+            first_name="User",
+            last_name=str(number),
+            password="qwerty123",
+        )
+        for number in range(2, 6)
+    )
+    pizza = recipes[0]
+    pizza.liked_users.set([u0, u1, u2])
+    calzone = create_recipe("Calzone", liked_users=[u0, u1])
+    create_recipe("Soup", liked_users=[u1])
+    Review.objects.create(author=u3, recipe=calzone, rating=5, description="Yes")
+    Review.objects.create(author=u4, recipe=pizza, rating=1, description="No")
+    return {"u0": u0, "u2": u2, "u3": u3, "u4": u4, "newcomer": newcomer}
+
+
+def recommended(user):
+    recipe_ids = UserRecommendations.objects.get(user=user).recipe_ids
+    recipes = Recipe.objects.in_bulk(recipe_ids)
+    return [recipes[recipe_id].name for recipe_id in recipe_ids]
+
+
+@pytest.mark.django_db()
+@pytest.mark.parametrize("processes", [0, 2])
+def test_build_for_you(history, processes):
+    stdout = io.StringIO()
+    call_command("build_for_you", processes=processes, chunk_size=2, stdout=stdout)
+
+    assert "5 users, 4 recipes, 8 interactions" in stdout.getvalue()
+    assert "users/s" in stdout.getvalue()
+    assert recommended(history["u2"]) == ["Calzone", "Soup"]
+    # Nothing they already liked.
+    assert recommended(history["u0"]) == ["Soup"]
+    # A five star review counts like a like; ties go to the older recipe.
+    assert recommended(history["u3"]) == ["Pizza Margarrita", "Soup"]
+    # A one star review pushes similar recipes down.
+    assert recommended(history["u4"]) == []
+    assert not UserRecommendations.objects.filter(user=history["newcomer"]).exists()
+
+
+def test_recommend_skips_seen_items_with_zero_weight():
+    # A like of item 0 and a three star review (weight 0) of item 1.
+    interactions = sparse.csr_matrix(
+        (np.array([1, 0], dtype=np.float32), ([0, 0], [0, 1])),
+        shape=(1, 3),
+    )
+    similarity = sparse.csr_matrix(1 - np.eye(3, dtype=np.float32))
+    assert interactions.nnz == 2
+    assert [list(columns) for columns in recommend(interactions, similarity, 3)] == [
+        [2],
+    ]
+
+
+@pytest.mark.django_db()
+def test_for_you_endpoint(client, history, django_assert_num_queries):
+    call_command("build_for_you", processes=0, stdout=io.StringIO())
+    url = reverse("recipe-for-you")
+    assert client.get(url).status_code == status.HTTP_401_UNAUTHORIZED
+
+    client.force_authenticate(user=history["u2"])
+    # Lookup, bulk fetch, the ingredients and likes of the page, is_liked.
+    with django_assert_num_queries(5):
+        response = client.get(url)
+    assert [recipe["name"] for recipe in response.data] == ["Calzone", "Soup"]
+
+    # No (useful) history: the most popular recipes.
+    popular = ["Pizza Margarrita", "Calzone", "Soup", "Ratatouille"]
+    for user in (history["newcomer"], history["u4"]):
+        client.force_authenticate(user=user)
+        response = client.get(url)
+        assert [recipe["name"] for recipe in response.data] == popular
@@ -0,0 +1,141 @@
+import gzip
+import threading
+
+from django.core.management import call_command
+from django.urls import reverse
+
+import pytest
+from rest_framework import status
+
+from core.utils import geoip
+from core.utils.geoip import GeoIPDatabase, write_database
+from core.utils.location import DEFAULT_LOCATION, get_user_location_by_ip
+
+RANGES = [
+    ("1.0.0.0", "1.0.0.255", -27.4766, 153.0166),
+    ("1.0.1.0", "1.0.3.255", 26.0614, 119.3061),
+    ("5.58.0.0", "5.58.255.255", 49.8397, 24.0297),
+    ("2001:db8::", "2001:db8:ffff:ffff:ffff:ffff:ffff:ffff", 52.52, 13.405),
+]
+
+
+@pytest.fixture
+def geoip_path(settings, tmp_path):
+    settings.GEOIP_PATH = str(tmp_path / "geoip.bin")
+    write_database(settings.GEOIP_PATH, RANGES)
+    return settings.GEOIP_PATH
+
+
+@pytest.mark.parametrize(
+    ("ip", "expected"),
+    [
+        ("1.0.0.0", (-27.4766, 153.0166)),
+        ("1.0.2.17", (26.0614, 119.3061)),
+        ("5.58.200.1", (49.8397, 24.0297)),
+        ("::ffff:5.58.0.1", (49.8397, 24.0297)),
+        ("2001:db8::1", (52.52, 13.405)),
+        ("0.255.255.255", None),
+        ("1.0.4.0", None),
+        ("255.255.255.255", None),
+        ("2001:db9::", None),
+    ],
+)
+def test_geoip_lookup(geoip_path, ip, expected):
+    coordinates = GeoIPDatabase(geoip_path).lookup(ip)
+
+    if expected is None:
+        assert coordinates is None
+    else:
+        assert coordinates == pytest.approx(expected, abs=1e-4)
+
+
+def test_adjacent_ranges_with_same_location_are_merged(tmp_path):
+    counts = write_database(
+        tmp_path / "geoip.bin",
+        [
+            ("10.0.0.0", "10.0.0.255", 1, 2),
+            ("10.0.1.0", "10.0.1.255", 1, 2),
+            ("10.0.2.0", "10.0.2.255", 3, 4),
+        ],
+    )
+
+    # Leading gap, two locations, trailing gap
+    assert counts == {4: 4, 6: 0}
+
+
+def test_location_without_database_uses_http_fallback_only_if_enabled(
+    settings,
+    tmp_path,
+    mocker,
+):
+    settings.GEOIP_PATH = str(tmp_path / "missing.bin")
+    http_lookup = mocker.patch(
+        "core.utils.location.get_user_location_over_http",
+        return_value="1.0,2.0",
+    )
+
+    assert get_user_location_by_ip("5.58.0.1") == DEFAULT_LOCATION
+    assert get_user_location_by_ip("not an ip") == DEFAULT_LOCATION
+    settings.GEOIP_HTTP_FALLBACK = True
+    assert get_user_location_by_ip("5.58.0.1") == "1.0,2.0"
+    http_lookup.assert_called_once_with("5.58.0.1")
+
+
+def test_concurrent_first_lookups_wait_for_the_tables(geoip_path, mocker):
+    database = GeoIPDatabase(geoip_path)
+    loading, release = threading.Event(), threading.Event()
+    tables = geoip._Tables
+
+    def slow_tables(buffer):
+        loading.set()
+        release.wait(5)
+        return tables(buffer)
+
+    mocker.patch("core.utils.geoip._Tables", side_effect=slow_tables)
+    results = []
+
+    def lookup():
+        results.append(database.lookup("5.58.0.1"))
+
+    first = threading.Thread(target=lookup)
+    first.start()
+    loading.wait(5)
+    # Arrives while the first lookup is still loading the tables.
+    second = threading.Thread(target=lookup)
+    second.start()
+    release.set()
+    first.join(5)
+    second.join(5)
+
+    assert results == [pytest.approx((49.8397, 24.0297), abs=1e-4)] * 2
+
+
+def test_refresh_geoip_replaces_database(settings, tmp_path, geoip_path):
+    source = tmp_path / "dbip.csv.gz"
+    with gzip.open(source, "wt") as file:
+        file.write("ip_start,ip_end,continent,country,region,city,latitude,longitude\n")
+        file.write("5.58.0.0,5.58.255.255,EU,UA,Kyiv,Kyiv,50.4501,30.5234\n")
+        file.write("2001:db8::,2001:db8::ffff,EU,DE,Berlin,Berlin,,\n")
+
+    # An earlier reader picks up the replaced file on its next check.
+    database = GeoIPDatabase(geoip_path)
+    database.check_interval = 0
+    assert database.lookup("1.0.0.1") is not None
+    call_command("refresh_geoip", source=str(source))
+
+    assert database.lookup("1.0.0.1") is None
+    assert database.lookup("5.58.1.1") == pytest.approx((50.4501, 30.5234), abs=1e-4)
+    assert get_user_location_by_ip("5.58.1.1") == "50.4501,30.5234"
+
+
+@pytest.mark.django_db()
+def test_daily_recipes_use_offline_location(client, geoip_path, mocker):
+    get_temperature = mocker.patch(
+        "core.services.recipe.daily_recipes_service.weather_cache.get_temperature",
+        return_value=2,
+    )
+
+    response = client.get(reverse("daily-recipes"), REMOTE_ADDR="5.58.0.1")
+
+    assert response.status_code == status.HTTP_200_OK
+    get_temperature.assert_called_once_with("49.8397,24.0297")
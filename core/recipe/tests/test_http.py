@@ -0,0 +1,120 @@
+import logging
+import time
+
+from django.urls import reverse
+
+import pytest
+import requests
+from rest_framework import status
+
+from core.utils import metrics
+from core.utils.http_client import CircuitOpenError, HttpClient, get_client
+
+
+def test_client_reuses_pooled_connection(weather_server):
+    client = HttpClient("test")
+
+    for _ in range(3):
+        assert client.get(weather_server.url).json()["data"]
+
+    assert len(weather_server.clients) == 1
+    metrics = client.metrics.snapshot()
+    assert metrics["calls"] == 3
+    assert metrics["failures"] == 0
+    assert metrics["p50_ms"] is not None
+
+
+def test_transient_errors_are_retried(weather_server):
+    weather_server.statuses = [503, 502]
+    client = HttpClient("test", retries=2, backoff=0.01)
+
+    assert client.get(weather_server.url).status_code == 200
+    assert len(weather_server.requests) == 3
+    assert client.metrics.snapshot()["retries"] == 2
+
+
+def test_client_errors_are_not_retried(weather_server):
+    weather_server.status = 404
+    client = HttpClient("test", retries=2, failure_threshold=1)
+
+    with pytest.raises(requests.HTTPError):
+        client.get(weather_server.url)
+
+    assert len(weather_server.requests) == 1
+    assert client.breaker.state == "closed"
+
+
+def test_retries_stop_at_the_deadline(weather_server):
+    weather_server.delay = 1
+    client = HttpClient("test", read_timeout=0.1, deadline=0.3, retries=10)
+
+    start = time.monotonic()
+    with pytest.raises(requests.Timeout):
+        client.get(weather_server.url)
+
+    assert time.monotonic() - start < 0.6
+
+
+def test_circuit_opens_and_recovers(weather_server):
+    weather_server.status = 503
+    client = HttpClient("test", retries=0, failure_threshold=2, reset_timeout=0.2)
+
+    for _ in range(2):
+        with pytest.raises(requests.HTTPError):
+            client.get(weather_server.url)
+    with pytest.raises(CircuitOpenError):
+        client.get(weather_server.url)
+    assert len(weather_server.requests) == 2
+    assert client.metrics.snapshot()["rejected"] == 1
+
+    weather_server.status = 200
+    time.sleep(0.25)
+    assert client.get(weather_server.url).status_code == 200
+    assert client.breaker.state == "closed"
+
+
+@pytest.mark.django_db()
+def test_daily_recipes_fall_back_to_default_band(
+    client,
+    recipes,
+    weather_server,
+    settings,
+):
+    weather_server.status = 503
+    settings.OUTBOUND_HTTP = {
+        "weather": {"retries": 0, "failure_threshold": 1, "reset_timeout": 60},
+    }
+
+    for _ in range(2):
+        response = client.get(reverse("daily-recipes"))
+        assert response.status_code == status.HTTP_200_OK
+        # 18 degrees: the "mild" band
+        assert [recipe["name"] for recipe in response.data] == ["Ratatouille"]
+
+    # The second request failed fast on the open circuit.
+    assert len(weather_server.requests) == 1
+
+
+@pytest.mark.django_db()
+def test_client_metrics_are_logged_periodically(
+    client,
+    weather_server,
+    settings,
+    caplog,
+    monkeypatch,
+):
+    settings.METRICS_LOG_INTERVAL = 60
+    monkeypatch.setattr(metrics, "_last_report", time.monotonic() - 61)
+    get_client("test").get(weather_server.url)
+
+    with caplog.at_level(logging.INFO, logger="core.utils.metrics"):
+        client.get(reverse("ingredient-list"))
+        client.get(reverse("ingredient-list"))
+    lines = [
+        record.getMessage()
+        for record in caplog.records
+        if record.getMessage().startswith("metrics http ")
+    ]
+    # Once per interval, not once per request.
+    assert len(lines) == 1
+    assert '"test": {"calls": 1' in lines[0]
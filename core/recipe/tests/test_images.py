@@ -0,0 +1,87 @@
+import io
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+
+import pytest
+from PIL import Image
+
+from core.jobs.models import Job
+from core.jobs.worker import drain
+from core.recipe.models import Recipe
+
+
+def upload(name="pizza.png", size=(2000, 1000), mode="RGBA"):
+    buffer = BytesIO()
+    Image.new(mode, size, (200, 30, 30, 128)[: len(mode)]).save(buffer, "PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+@pytest.mark.django_db()
+def test_upload_queues_variants(client, recipes, media):
+    recipe = recipes[0]
+    recipe.image = upload()
+    recipe.save()
+    assert drain() == 1
+
+    recipe.refresh_from_db()
+    variants = recipe.image_variants
+    assert variants["source"] == recipe.image.name
+    with Image.open(media / variants["thumb"]["webp"]) as thumb:
+        assert thumb.format == "WEBP"
+        assert thumb.size == (160, 80)
+    with Image.open(media / variants["full"]["jpeg"]) as full:
+        assert full.format == "JPEG"
+        assert full.size == (1600, 800)
+
+    response = client.get(reverse("recipe-detail", kwargs={"slug": recipe.slug}))
+    urls = response.data["image_variants"]
+    assert set(urls) == {"thumb", "card", "full"}
+    assert urls["card"]["webp"].startswith("http://testserver/media/images_recipes/")
+
+    # A new upload replaces the variants and removes the old files.
+    recipe.image = upload(size=(300, 300), mode="RGB")
+    recipe.save()
+    drain()
+    recipe.refresh_from_db()
+    assert recipe.image_variants["card"] != variants["card"]
+    assert not (media / variants["thumb"]["webp"]).exists()
+
+
+@pytest.mark.django_db()
+def test_unrelated_saves_do_not_render(recipes):
+    recipes[0].name = "Pizza Diavola"
+    recipes[0].save()
+
+    assert not Job.objects.exists()
+
+
+@pytest.mark.django_db()
+def test_build_image_variants_backfills(recipes, media):
+    recipe = recipes[0]
+    name = Recipe._meta.get_field("image").storage.save(
+        "images_recipes/legacy.png",
+        upload(),
+    )
+    # Written directly, as older uploads were: no variants yet.
+    Recipe.objects.filter(pk=recipe.pk).update(image=name)
+
+    stdout = io.StringIO()
+    call_command("build_image_variants", stdout=stdout)
+    assert "Queued 1 images" in stdout.getvalue()
+    call_command("run_worker", once=True, stdout=stdout)
+    assert "Ran 1 jobs" in stdout.getvalue()
+    recipe.refresh_from_db()
+    assert recipe.image_variants["source"] == name
+    assert (media / recipe.image_variants["thumb"]["jpeg"]).exists()
+
+    # Up to date now.
+    stdout = io.StringIO()
+    call_command("build_image_variants", stdout=stdout)
+    assert "Queued 0 images" in stdout.getvalue()
+
+    stdout = io.StringIO()
+    call_command("build_image_variants", all=True, inline=True, stdout=stdout)
+    assert "Rendered 1 images, 0 failed" in stdout.getvalue()
@@ -0,0 +1,142 @@
+import csv
+import gzip
+import json
+
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.urls import reverse
+
+import pytest
+
+from core.recipe.models import Recipe
+from core.services.recipe.import_service import RecipeImporter
+from core.utils.slugs import allocate_slugs, is_slug_conflict
+
+ROW = {
+    "category": "lunch",
+    "description": "imported recipe",
+    "steps": "1 step, 2 step",
+    "total_cooking_time": 30,
+    "difficulty": "easy",
+    "country": "Italy",
+}
+
+
+@pytest.fixture
+def jsonl_file(tmp_path):
+    rows = [
+        {
+            **ROW,
+            "name": "Pizza Margarrita",
+            "ingredients": ["Flour", "tomato", "Saffron"],
+        },
+        {**ROW, "name": "Pizza Margarrita", "description": "another one"},
+        {**ROW, "name": "Pizza Margarrita", "import_key": "pizza-3"},
+        {**ROW, "name": "Broken", "category": "unknown"},
+    ]
+    path = tmp_path / "recipes.jsonl.gz"
+    with gzip.open(path, "wt") as file:
+        for row in rows:
+            file.write(json.dumps(row) + "\n")
+        file.write("not json\n")
+    return path
+
+
+@pytest.mark.django_db()
+def test_import_recipes_jsonl(client, recipes, jsonl_file, capsys):
+    call_command("import_recipes", str(jsonl_file), batch_size=2)
+
+    imported = Recipe.objects.exclude(import_key=None).order_by("id")
+    assert [recipe.slug for recipe in imported] == [
+        "pizza-margarrita-1",
+        "pizza-margarrita-2",
+        "pizza-margarrita-3",
+    ]
+    assert {ingredient.name for ingredient in imported[0].ingredients.all()} == {
+        "Flour",
+        "Tomato",
+    }
+    assert imported[2].import_key == "pizza-3"
+    out = capsys.readouterr()
+    assert "3 created, 0 already imported, 2 invalid, 1 unknown ingredients" in out.out
+    assert "line 4: category: Value 'unknown' is not a valid choice." in out.err
+
+    response = client.get(reverse("recipe-search"), {"q": "another"})
+    results = response.data["results"]
+    assert [recipe["slug"] for recipe in results] == ["pizza-margarrita-2"]
+
+    # A re-run skips everything it already imported.
+    call_command("import_recipes", str(jsonl_file))
+    assert Recipe.objects.exclude(import_key=None).count() == 3
+    assert "0 created, 3 already imported" in capsys.readouterr().out
+
+
+@pytest.mark.django_db()
+def test_import_rejects_invalid_fields(ingredients):
+    rows = [
+        {**ROW, "name": "Calzone"},
+        {**ROW, "name": "Hot", "difficulty": "extreme"},
+        {**ROW, "name": "Far", "country": "x" * 101},
+        {**ROW, "name": "Slow", "total_cooking_time": "-5"},
+        {**ROW, "name": "Soon", "total_cooking_time": "soon"},
+    ]
+    importer = RecipeImporter()
+    list(importer.import_rows(enumerate(rows, start=1)))
+
+    assert list(Recipe.objects.values_list("name", flat=True)) == ["Calzone"]
+    assert importer.stats["created"] == 1
+    assert importer.stats["invalid"] == 4
+    assert [(line, error.split(":")[0]) for line, error in importer.errors] == [
+        (2, "difficulty"),
+        (3, "country"),
+        (4, "total_cooking_time"),
+        (5, "total_cooking_time"),
+    ]
+
+
+@pytest.mark.django_db()
+def test_import_recipes_csv(ingredients, tmp_path):
+    path = tmp_path / "recipes.csv"
+    with path.open("w", newline="") as file:
+        writer = csv.DictWriter(file, ["name", *ROW, "ingredients"])
+        writer.writeheader()
+        writer.writerow(
+            {**ROW, "name": "Ratatouille", "ingredients": "Aubergine|Zucchini|Thyme"},
+        )
+
+    call_command("import_recipes", str(path))
+
+    recipe = Recipe.objects.get(slug="ratatouille")
+    assert recipe.ingredients.count() == 3
+    assert recipe.total_calories == 25 + 17 + 101
+    assert recipe.total_cooking_time == 30
+
+
+@pytest.mark.django_db()
+def test_allocate_slugs(recipes, django_assert_num_queries):
+    Recipe.objects.filter(pk=recipes[1].pk).update(slug="ratatouille-9")
+    with django_assert_num_queries(1):
+        slugs = allocate_slugs(
+            Recipe,
+            ["Pizza Margarrita", "Ratatouille", "Ratatouille", "Soup", "x" * 100],
+        )
+    assert slugs == [
+        "pizza-margarrita-1",
+        "ratatouille-10",
+        "ratatouille-11",
+        "soup",
+        "x" * 43,
+    ]
+
+
+@pytest.mark.django_db()
+def test_is_slug_conflict(recipes):
+    def violation(**fields):
+        recipe = Recipe(**{**ROW, "name": "(slug)=", **fields})
+        with pytest.raises(IntegrityError) as info, transaction.atomic():
+            Recipe.objects.bulk_create([recipe])
+        return info.value
+
+    assert is_slug_conflict(Recipe, violation(slug=recipes[0].slug))
+    # Not the slug constraint, even if the message mentions a slug.
+    assert not is_slug_conflict(Recipe, violation(slug="(slug)=", description=None))
@@ -0,0 +1,72 @@
+from django.urls import reverse
+
+import pytest
+from rest_framework import status
+
+from core.recipe.models import Ingredient
+from core.utils import slugs
+
+
+@pytest.mark.parametrize(
+    "query, expected_names",
+    [
+        ("to", ["Tomato", "Tomatoes"]),
+        ("oil", ["Olive Oil", "Olive oil"]),
+        ("tomatto", ["Tomato", "Tomatoes"]),
+        ("xyz", []),
+    ],
+)
+@pytest.mark.django_db
+def test_ingredient_suggest_ranking(client, ingredients, query, expected_names):
+    suggest_url = reverse("ingredient-suggest")
+    response = client.get(suggest_url, {"q": query})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [item["name"] for item in response.data] == expected_names
+
+
+@pytest.mark.django_db
+def test_ingredient_suggest_hot_path_skips_database(
+    client,
+    ingredients,
+    django_assert_num_queries,
+):
+    suggest_url = reverse("ingredient-suggest")
+    client.get(suggest_url, {"q": "b"})
+
+    with django_assert_num_queries(0):
+        response = client.get(suggest_url, {"q": "bas", "limit": 1})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [item["name"] for item in response.data] == ["Basil"]
+
+
+@pytest.mark.django_db
+def test_ingredient_slug_is_allocated_in_one_query(
+    ingredients,
+    django_assert_num_queries,
+):
+    Ingredient.objects.bulk_create(
+        Ingredient(name="Basil", slug=f"basil-{i}") for i in range(2, 200)
+    )
+
+    # The slug query and the insert, plus the SAVEPOINT and its RELEASE.
+    with django_assert_num_queries(4):
+        ingredient = Ingredient.objects.create(name="Basil")
+
+    assert ingredient.slug == "basil-200"
+
+
+@pytest.mark.django_db
+def test_ingredient_slug_is_retried_after_concurrent_insert(ingredients, mocker):
+    # The first allocation misses a concurrent "basil", "basil-1" insert.
+    max_suffixes = mocker.patch.object(
+        slugs,
+        "max_suffixes",
+        side_effect=[{}, {"basil": 1}],
+    )
+
+    ingredient = Ingredient.objects.create(name="Basil")
+
+    assert ingredient.slug == "basil-2"
+    assert max_suffixes.call_count == 2
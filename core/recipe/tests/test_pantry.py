@@ -0,0 +1,78 @@
+from django.urls import reverse
+
+import pytest
+from rest_framework import status
+
+from core.recipe.models import Ingredient
+from core.services.recipe.pantry_service import ingredient_index
+
+
+@pytest.mark.django_db
+def test_pantry_ranks_recipes_by_coverage(client, recipes):
+    pantry_url = reverse("recipe-pantry")
+    response = client.get(pantry_url, {"have": "flour,mozzarella,tomato,basil"})
+    data = response.data["results"]
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [recipe["name"] for recipe in data] == ["Pizza Margarrita", "Ratatouille"]
+    assert data[0]["matched_count"] == 4
+    assert data[0]["missing_count"] == 3
+    assert data[1]["matched_count"] == 1
+    assert data[1]["missing_count"] == 8
+
+
+@pytest.mark.django_db
+def test_pantry_max_missing(client, recipes):
+    pantry_url = reverse("recipe-pantry")
+    params = {"have": "flour,mozzarella,tomato,basil", "max_missing": 3}
+    response = client.get(pantry_url, params)
+    data = response.data["results"]
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(data) == 1
+    assert data[0]["name"] == "Pizza Margarrita"
+
+
+@pytest.mark.django_db
+def test_pantry_requires_ingredients(client):
+    response = client.get(reverse("recipe-pantry"))
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_ingredient_index_follows_m2m_changes(
+    recipes,
+    django_assert_num_queries,
+    django_capture_on_commit_callbacks,
+):
+    pizza = recipes[0]
+    ham = Ingredient.objects.create(name="Ham")
+    assert list(ingredient_index.rank([ham.id])) == []
+
+    with django_capture_on_commit_callbacks(execute=True):
+        pizza.ingredients.add(ham)
+
+    with django_assert_num_queries(0):
+        assert list(ingredient_index.rank([ham.id])) == [(pizza.id, 1, 7)]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        ham.recipes.remove(pizza)
+
+    with django_assert_num_queries(0):
+        assert list(ingredient_index.rank([ham.id])) == []
+
+
+@pytest.mark.django_db
+def test_pantry_ranking_indexing(recipes, ingredients):
+    pizza, ratatouille = recipes
+    olive_oils = [ingredients["pizza"][-1].id, ingredients["ratatouille"][-2].id]
+    ranking = ingredient_index.rank(olive_oils)
+
+    assert ranking[0][0] == pizza.id
+    assert ranking[-1] == ranking[1]
+    assert ranking[-1][0] == ratatouille.id
+    with pytest.raises(IndexError):
+        ranking[2]
+    with pytest.raises(IndexError):
+        ranking[-3]
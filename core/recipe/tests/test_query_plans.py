@@ -0,0 +1,149 @@
+"""
+EXPLAIN the hot query shapes against a seeded database: none of them may
+fall back to a sequential scan or a sort once the tables are big enough
+for the planner to care.
+"""
+
+import datetime
+import random
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.functions import Now
+
+import pytest
+
+from benchmarks.utils import plan_nodes
+from core.recipe.api.pagination import KeysetPagination
+from core.recipe.api.views import RecipeList, ReviewList
+from core.recipe.models import Recipe, Review
+from core.services.recipe.daily_recipes_service import DailyRecipesService
+
+RECIPES = 20000
+REVIEWERS = 2000
+# Popular recipes, each reviewed by every reviewer
+REVIEWED_RECIPES = 20
+SORTS = {"Sort", "Incremental Sort"}
+
+
+@pytest.fixture(scope="module")
+def seeded(django_db_setup, django_db_blocker):
+    """Seeded once for the module, rolled back after its last test"""
+    rng = random.Random(7)
+    categories = [value for value, _ in Recipe.CATEGORY_CHOICES]
+    with django_db_blocker.unblock(), transaction.atomic():
+        Recipe.objects.bulk_create(
+            Recipe(
+                name=f"Recipe {number}",
+                slug=f"plan-{number}",
+                category=rng.choice(categories),
+                description="",
+                steps="",
+                total_cooking_time=30,
+                difficulty="easy",
+                country="Italy",
+                avg_rating=rng.randint(0, 50) / 10,
+                total_calories=rng.randint(0, 3000),
+            )
+            for number in range(RECIPES)
+        )
+        # One recipe a minute rather than one timestamp for all of them.
+        Recipe.objects.update(
+            created_at=Now() - F("id") * datetime.timedelta(minutes=1),
+        )
+        reviewers = get_user_model().objects.bulk_create(
+            get_user_model()(email=f"plan{number}@example.com")
+            for number in range(REVIEWERS)
+        )
+        recipe_ids = Recipe.objects.order_by("pk").values_list("pk", flat=True)
+        Review.objects.bulk_create(
+            Review(author=author, recipe_id=recipe_id, rating=5, description="")
+            for recipe_id in recipe_ids[:REVIEWED_RECIPES]
+            for author in reviewers
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"ANALYZE {Recipe._meta.db_table}, {Review._meta.db_table}",
+            )
+        yield {
+            "recipe": Recipe.objects.get(slug=f"plan-{REVIEWED_RECIPES // 2}"),
+            "author": reviewers[0],
+        }
+        transaction.set_rollback(True)
+
+
+def keyset_page(queryset, field, descending, value, pk, size=10):
+    prefix = "-" if descending else ""
+    return queryset.order_by(f"{prefix}{field}", f"{prefix}pk").filter(
+        KeysetPagination.after(field, descending, False, value, pk),
+    )[: size + 1]
+
+
+def recipe_list():
+    return RecipeList.queryset
+
+
+def review_list(recipe):
+    return ReviewList(kwargs={"slug": recipe.slug}).get_queryset()
+
+
+QUERIES = {
+    "recipes newest first": lambda seeded: recipe_list()[:3],
+    "recipes newest first, next page": lambda seeded: keyset_page(
+        recipe_list(),
+        "created_at",
+        True,
+        seeded["recipe"].created_at,
+        seeded["recipe"].pk,
+    ),
+    "recipes best rated, next page": lambda seeded: keyset_page(
+        recipe_list(),
+        "avg_rating",
+        True,
+        4.5,
+        seeded["recipe"].pk,
+    ),
+    "recipes by calories, next page": lambda seeded: keyset_page(
+        recipe_list(),
+        "total_calories",
+        False,
+        500,
+        seeded["recipe"].pk,
+    ),
+    "recipes in a calorie range, by calories": lambda seeded: recipe_list()
+    .filter(total_calories__gte=400, total_calories__lte=800)
+    .order_by("total_calories", "pk")[:3],
+    "daily recipes of a band": lambda seeded: DailyRecipesService.ranked_recipes(
+        "cold",
+    )[:20],
+    "reviews of a recipe": lambda seeded: review_list(seeded["recipe"]).order_by(
+        "-created_at",
+        "-pk",
+    )[:11],
+    "reviews of a recipe, created after": lambda seeded: review_list(
+        seeded["recipe"],
+    )
+    .filter(created_at__gte=seeded["recipe"].created_at)
+    .order_by("-created_at", "-pk")[:11],
+    "review of an author for a recipe": lambda seeded: Review.objects.filter(
+        author=seeded["author"],
+        recipe=seeded["recipe"],
+    ),
+}
+
+
+@pytest.mark.django_db()
+@pytest.mark.parametrize("name", QUERIES)
+def test_query_plan_uses_indexes(seeded, name):
+    nodes = plan_nodes(QUERIES[name](seeded))
+    seeded_tables = {Recipe._meta.db_table, Review._meta.db_table}
+
+    scanned = [
+        node["Relation Name"]
+        for node in nodes
+        if node["Node Type"] == "Seq Scan" and node["Relation Name"] in seeded_tables
+    ]
+    assert not scanned, f"sequential scan of {scanned}"
+    sorts = [node for node in nodes if node["Node Type"] in SORTS]
+    assert not sorts, f"sort on {sorts[0].get('Sort Key')}"
@@ -1,10 +1,24 @@
+import base64
+import datetime
+import io
+import json
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
 import pytest
 from rest_framework import status
 
-from core.recipe.models import Ingredient, Recipe
+from core.jobs.models import Job
+from core.jobs.worker import drain
+from core.recipe.api.filters import RecipeFilter
+from core.recipe.models import DailySelection, Ingredient, Recipe
 from core.services.recipe.daily_recipes_service import DailyRecipesService
+from core.services.recipe.recipe_service import like_counter
 
 
 @pytest.mark.django_db
@@ -56,6 +70,69 @@ def test_search_filter_with_field_name(
     assert unexpected_recipe_name not in returned_name
 
 
+@pytest.mark.django_db()
+def test_full_text_search_ranks_and_highlights(client, recipes):
+    recipes[1].description = "Provencal stew, much better than pizza"
+    recipes[1].save()
+
+    search_url = reverse("recipe-search")
+    response = client.get(search_url, {"q": "pizza"})
+    data = response.data["results"]
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [recipe["name"] for recipe in data] == ["Pizza Margarrita", "Ratatouille"]
+    assert data[0]["rank"] > data[1]["rank"]
+    assert "<mark>pizza</mark>" in data[1]["headline"]
+    assert "search_vector" not in data[0]
+
+
+@pytest.mark.django_db()
+def test_full_text_search_requires_query(client):
+    response = client.get(reverse("recipe-search"))
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.parametrize(
+    "expression, expected_names",
+    [
+        ("flour,mozzarella", ["Pizza Margarrita"]),
+        ("Olive Oil", ["Pizza Margarrita", "Ratatouille"]),
+        ("basil,-garlic", ["Pizza Margarrita"]),
+        ("tomato|tomatoes,!pepperoni", ["Ratatouille"]),
+        ("~pepperoni,~zucchini", ["Pizza Margarrita", "Ratatouille"]),
+        ("flour,zucchini", []),
+        ("unknown", []),
+        # Empty terms are ignored, whatever their prefix.
+        ("~,flour", ["Pizza Margarrita"]),
+        ("-,flour,!", ["Pizza Margarrita"]),
+        ("flour,|", ["Pizza Margarrita"]),
+    ],
+)
+@pytest.mark.django_db()
+def test_ingredients_filter_expression(client, recipes, expression, expected_names):
+    recipe_url = reverse("recipe-list")
+    response = client.get(recipe_url, {"ingredients": expression})
+    names = sorted(recipe["name"] for recipe in response.data["results"])
+
+    assert response.status_code == status.HTTP_200_OK
+    assert names == expected_names
+
+
+@pytest.mark.django_db()
+def test_ingredients_filter_by_id_and_slug_is_single_query(recipes, ingredients):
+    zucchini, garlic = ingredients["ratatouille"][1], ingredients["ratatouille"][5]
+    expression = f"{zucchini.id},{garlic.slug},-{ingredients['pizza'][0].slug}"
+
+    queryset = RecipeFilter({"ingredients": expression}, Recipe.objects.all()).qs
+    with CaptureQueriesContext(connection) as queries:
+        names = [recipe.name for recipe in queryset]
+
+    assert names == ["Ratatouille"]
+    assert len(queries) == 1
+    assert "GROUP BY" in queries[0]["sql"]
+
+
 @pytest.mark.parametrize(
     "ordering_condition, recipe_name, avg_rating",
     [("avg_rating", "Pizza Margarrita", 3.2), ("-avg_rating", "Ratatouille", 4.0)],
@@ -79,6 +156,69 @@ def test_ordering_filter_with_field_avg_rating(
     assert returned_avg_rating == avg_rating
 
 
+@pytest.mark.parametrize(
+    "ordering, order_by",
+    [
+        ("-created_at", ["-created_at", "-id"]),
+        ("avg_rating", ["avg_rating", "id"]),
+        ("-avg_rating", ["-avg_rating", "-id"]),
+    ],
+)
+@pytest.mark.django_db()
+def test_keyset_pagination_walks_every_recipe_once(
+    client,
+    recipes,
+    users,
+    ordering,
+    order_by,
+):
+    _create_recipes(users[0], 5)
+    Recipe.objects.filter(name__startswith="Soup").update(avg_rating=3.2)
+
+    params = {"pagination": "cursor", "ordering": ordering, "size": 2}
+    response = client.get(reverse("recipe-list"), params)
+    seen = [recipe["id"] for recipe in response.data["results"]]
+    while response.data["next"]:
+        assert "count" not in response.data
+        response = client.get(response.data["next"])
+        seen += [recipe["id"] for recipe in response.data["results"]]
+
+    expected = Recipe.objects.order_by(*order_by).values_list("id", flat=True)
+    assert seen == list(expected)
+
+
+@pytest.mark.django_db()
+def test_keyset_pagination_count_is_opt_in(client, recipes):
+    params = {"pagination": "cursor", "with_count": "true", "size": 1}
+    response = client.get(reverse("recipe-list"), params)
+
+    assert response.data["count"] == 2
+    assert len(response.data["results"]) == 1
+
+    response = client.get(reverse("recipe-list"), {"cursor": "not-a-cursor"})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        ["-created_at", "notadate", 1],
+        ["avg_rating", "x", 1],
+        ["-created_at", {"a": 1}, 1],
+        ["total_calories", [500], 1],
+        ["-created_at", None, "1"],
+        ["-created_at", None, True],
+    ],
+)
+@pytest.mark.django_db()
+def test_keyset_pagination_rejects_tampered_cursors(client, recipes, cursor):
+    encoded = base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+    params = {"ordering": cursor[0], "cursor": encoded}
+    response = client.get(reverse("recipe-list"), params)
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
 @pytest.mark.django_db()
 def test_add_recipe_with_authorization(client, users):
     ingredient1 = Ingredient.objects.create(name="Apple")
@@ -103,6 +243,27 @@ def test_add_recipe_with_authorization(client, users):
     assert response_data["author"] == users[0].email
 
 
+@pytest.mark.django_db()
+def test_add_recipe_with_liked_users_counts_them(client, users, ingredients):
+    client.force_authenticate(user=users[0])
+    data = {
+        "name": "Apple Pie",
+        "category": "dessert",
+        "description": "Some fantastic Apple Pie",
+        "steps": "1 step, 2 step, 3 step",
+        "total_cooking_time": 120,
+        "difficulty": "medium",
+        "country": "USA",
+        "ingredients": [ingredient.id for ingredient in ingredients["pizza"][:2]],
+        "liked_users": [user.id for user in users],
+    }
+    response = client.post(path=reverse("recipe-list"), data=data)
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.data["likes_count"] == 2
+    assert Recipe.objects.get(slug=response.data["slug"]).likes_count == 2
+
+
 @pytest.mark.django_db()
 def test_update_recipe_without_owner_permission(client, recipes, users):
     recipe = Recipe.objects.get(name="Ratatouille")
@@ -131,6 +292,128 @@ def test_like_toggle(client, recipes, users):
     assert data["like_count"] == recipe.liked_users.count()
 
 
+@pytest.mark.django_db()
+def test_like_toggle_keeps_likes_count(client, recipes, users):
+    recipe = recipes[0]
+    recipe_url = reverse("like-toggle", kwargs={"slug": recipe.slug})
+
+    client.force_authenticate(user=users[0])
+    assert client.post(path=recipe_url).data == {"liked": True, "like_count": 1}
+    client.force_authenticate(user=users[1])
+    assert client.post(path=recipe_url).data == {"liked": True, "like_count": 2}
+    assert client.post(path=recipe_url).data == {"liked": False, "like_count": 1}
+
+    recipe.liked_users.set(users)
+    recipe.refresh_from_db()
+    assert recipe.likes_count == 2
+
+
+@pytest.mark.django_db()
+def test_saving_a_stale_recipe_keeps_likes_count(client, recipes, users):
+    stale = Recipe.objects.get(pk=recipes[0].pk)
+    client.force_authenticate(user=users[1])
+    client.post(reverse("like-toggle", kwargs={"slug": stale.slug}))
+
+    stale.name = "Pizza Diavola"
+    stale.save()
+    stale.refresh_from_db()
+    assert (stale.name, stale.likes_count) == ("Pizza Diavola", 1)
+
+
+@pytest.mark.django_db()
+def test_like_toggle_is_one_statement(client, recipes, users):
+    client.force_authenticate(user=users[0])
+    recipe_url = reverse("like-toggle", kwargs={"slug": recipes[0].slug})
+    with CaptureQueriesContext(connection) as context:
+        response = client.post(path=recipe_url)
+    statements = [
+        query["sql"]
+        for query in context.captured_queries
+        if "SAVEPOINT" not in query["sql"]
+    ]
+
+    assert len(statements) == 1
+    assert response.data == {"liked": True, "like_count": 1}
+    response = client.post(reverse("like-toggle", kwargs={"slug": "missing"}))
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db()
+def test_like_toggle_buffers_counts(client, recipes, users, settings):
+    settings.LIKES_FLUSH_INTERVAL = 30
+    recipe = recipes[0]
+    recipe_url = reverse("like-toggle", kwargs={"slug": recipe.slug})
+    for user in users:
+        client.force_authenticate(user=user)
+        assert client.post(path=recipe_url).data["liked"]
+    client.force_authenticate(user=users[0])
+    assert client.post(path=recipe_url).data == {"liked": False, "like_count": 1}
+
+    updated_at = recipe.updated_at
+    recipe.refresh_from_db()
+    assert recipe.likes_count == 0
+    # The likers changed now: the ETag and the change feed must move.
+    assert recipe.updated_at > updated_at
+    # One flush for the whole burst, after the interval.
+    flush = Job.objects.get(name="recipe.flush_likes")
+    assert drain() == 0
+
+    flush.run_at = timezone.now()
+    flush.save()
+    assert drain() == 1
+    recipe.refresh_from_db()
+    assert recipe.likes_count == 1
+    assert like_counter.pending(recipe.pk) == 0
+
+
+def _create_recipes(author, count):
+    for number in range(count):
+        recipe = Recipe.objects.create(
+            name=f"Soup {number}",
+            category="soup",
+            description="warm soup",
+            steps="1 step",
+            total_cooking_time=30,
+            difficulty="easy",
+            country="Ukraine",
+            author=author,
+        )
+        recipe.ingredients.set(Ingredient.objects.all()[:3])
+        recipe.liked_users.set([author])
+
+
+@pytest.mark.parametrize("extra_recipes", [0, 10])
+@pytest.mark.parametrize(
+    "url_name, expected_queries",
+    [
+        # ETag validators, count, page, ingredients, liked users, is_liked
+        ("recipe-list", 6),
+        # daily recipes (ids from the cache), ingredients, liked users, is_liked
+        ("daily-recipes", 4),
+    ],
+)
+@pytest.mark.django_db()
+def test_recipe_lists_run_constant_number_of_queries(
+    client,
+    recipes,
+    users,
+    mocker,
+    django_assert_num_queries,
+    url_name,
+    expected_queries,
+    extra_recipes,
+):
+    _create_recipes(users[0], extra_recipes)
+    DailyRecipesService.build_selections()
+    mocker.patch.object(DailyRecipesService, "get_temperature", return_value=2)
+    client.force_authenticate(user=users[0])
+
+    with django_assert_num_queries(expected_queries):
+        response = client.get(reverse(url_name), {"size": 15})
+
+    assert response.status_code == status.HTTP_200_OK
+
+
 @pytest.mark.django_db()
 def test_daily_products_service_within_cold_weather(client, recipes, mocker):
     r1 = recipes[0]
@@ -142,3 +425,42 @@ def test_daily_products_service_within_cold_weather(client, recipes, mocker):
 
     assert r1 in recipes
     assert r2 not in recipes
+
+
+@pytest.mark.django_db()
+def test_daily_selections_are_built_once_per_band_and_day(
+    recipes,
+    mocker,
+    django_assert_num_queries,
+):
+    call_command("build_daily_selections", stdout=io.StringIO())
+    cache.clear()
+    mocker.patch.object(DailyRecipesService, "get_temperature", return_value=2)
+    service = DailyRecipesService(location="50.4501,30.5234")
+
+    assert DailySelection.objects.count() == 3
+    # selection, daily recipes, ingredients, liked users
+    with django_assert_num_queries(4):
+        assert service.get_daily_recipes() == [recipes[0]]
+    # ids come from the cache now
+    with django_assert_num_queries(3):
+        service.get_daily_recipes()
+
+
+@pytest.mark.django_db()
+def test_daily_selection_rotates_deterministically(users, settings, mocker):
+    _create_recipes(users[0], 10)
+    settings.DAILY_RECIPES_POOL_SIZE = 8
+    mocker.patch.object(DailyRecipesService, "size", 3)
+    pool = list(
+        Recipe.objects.order_by("-avg_rating", "-id").values_list("id", flat=True)[:8],
+    )
+
+    days = [datetime.date(2025, 1, day) for day in range(1, 8)]
+    selections = [DailyRecipesService.select_recipe_ids("cold", day) for day in days]
+
+    assert selections[0] == DailyRecipesService.select_recipe_ids("cold", days[0])
+    assert len({tuple(selection) for selection in selections}) > 1
+    for selection in selections:
+        assert len(selection) == 3
+        assert selection == sorted(selection, key=pool.index)
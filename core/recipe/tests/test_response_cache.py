@@ -0,0 +1,139 @@
+import logging
+import time
+
+from django.urls import reverse
+
+import pytest
+from rest_framework import status
+
+from core.recipe.models import Ingredient
+from core.services.recipe.daily_recipes_service import DailyRecipesService
+from core.utils import metrics
+from core.utils.response_cache import response_cache
+
+
+@pytest.fixture(autouse=True)
+def response_cache_enabled(settings, tmp_path):
+    settings.RESPONSE_CACHE_TIMEOUT = 60
+    settings.CACHES = {
+        **settings.CACHES,
+        "responses": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": str(tmp_path),
+        },
+    }
+    settings.RESPONSE_CACHE_ALIAS = "responses"
+
+
+@pytest.mark.django_db()
+def test_anonymous_recipe_list_is_cached_until_a_recipe_changes(
+    client,
+    recipes,
+    django_assert_num_queries,
+    django_capture_on_commit_callbacks,
+):
+    counters = response_cache.snapshot()
+    recipe_url = reverse("recipe-list")
+    first = client.get(recipe_url, {"size": 5, "ordering": "avg_rating"})
+    assert first["X-Cache"] == "MISS"
+
+    # Same query in another order: same entry, no database access.
+    with django_assert_num_queries(0):
+        second = client.get(recipe_url, {"ordering": "avg_rating", "size": 5})
+    assert second["X-Cache"] == "HIT"
+    assert second.content == first.content
+    assert second["ETag"] == first["ETag"]
+    assert response_cache.snapshot()["hits"] == counters["hits"] + 1
+    assert response_cache.snapshot()["misses"] == counters["misses"] + 1
+
+    with django_capture_on_commit_callbacks(execute=True):
+        recipes[0].name = "Pizza Diavola"
+        recipes[0].save()
+    third = client.get(recipe_url, {"size": 5, "ordering": "avg_rating"})
+    assert third["X-Cache"] == "MISS"
+    assert "Pizza Diavola" in third.content.decode()
+
+
+@pytest.mark.django_db()
+def test_cache_counters_are_logged_periodically(
+    client,
+    ingredients,
+    settings,
+    caplog,
+    monkeypatch,
+):
+    settings.METRICS_LOG_INTERVAL = 60
+    monkeypatch.setattr(metrics, "_last_report", time.monotonic() - 61)
+    counters = response_cache.snapshot()
+
+    with caplog.at_level(logging.INFO, logger="core.utils.metrics"):
+        client.get(reverse("ingredient-list"))
+    lines = [
+        record.getMessage()
+        for record in caplog.records
+        if record.getMessage().startswith("metrics response_cache ")
+    ]
+    assert len(lines) == 1
+    assert f'"misses": {counters["misses"] + 1}' in lines[0]
+
+
+@pytest.mark.django_db()
+def test_cached_response_honours_if_none_match(client, ingredients):
+    ingredient_url = reverse("ingredient-list")
+    etag = client.get(ingredient_url)["ETag"]
+
+    response = client.get(ingredient_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.django_db()
+def test_authenticated_requests_bypass_the_cache(client, users, recipes):
+    client.force_authenticate(user=users[0])
+    response = client.get(reverse("recipe-list"))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert "X-Cache" not in response
+
+
+@pytest.mark.django_db()
+def test_invalidation_by_signals_and_likes(
+    client,
+    users,
+    recipes,
+    django_capture_on_commit_callbacks,
+):
+    ingredient_url = reverse("ingredient-list")
+    client.get(ingredient_url)
+    with django_capture_on_commit_callbacks(execute=True):
+        Ingredient.objects.filter(name="Thyme").delete()
+    assert client.get(ingredient_url)["X-Cache"] == "MISS"
+    assert client.get(ingredient_url)["X-Cache"] == "HIT"
+
+    recipe_url = reverse("recipe-list")
+    client.get(recipe_url)
+    liker = client.__class__()
+    liker.force_authenticate(user=users[1])
+    with django_capture_on_commit_callbacks(execute=True):
+        liker.post(reverse("like-toggle", kwargs={"slug": recipes[0].slug}))
+    response = client.get(recipe_url)
+    assert response["X-Cache"] == "MISS"
+    assert response.data["results"][0]["likes_count"] == 1
+
+
+@pytest.mark.django_db()
+def test_daily_recipes_are_cached_per_band(client, recipes, mocker):
+    DailyRecipesService.build_selections()
+    temperature = mocker.patch.object(
+        DailyRecipesService,
+        "get_temperature",
+        return_value=2,
+    )
+    daily_url = reverse("daily-recipes")
+
+    assert client.get(daily_url)["X-Cache"] == "MISS"
+    assert client.get(daily_url)["X-Cache"] == "HIT"
+
+    temperature.return_value = 30
+    response = client.get(daily_url)
+    assert response["X-Cache"] == "MISS"
+    assert response.data == []
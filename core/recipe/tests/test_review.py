@@ -1,9 +1,15 @@
+import io
+
+from django.core.management import call_command
+from django.db import IntegrityError
 from django.urls import reverse
 
 import pytest
 from rest_framework import status
 
+from core.jobs.worker import drain
 from core.recipe.models import Recipe, Review
+from core.services.recipe.recipe_service import RatingService, ReviewService
 
 
 @pytest.fixture
@@ -61,3 +67,135 @@ def test_recipe_rating_and_review_count_update(client, users, recipes, reviews):
 
     assert response.status_code == status.HTTP_201_CREATED
     assert recipe.number_reviews == 1
+
+
+@pytest.mark.django_db
+def test_reviews_cursor_pagination_is_opt_in(client, users, recipes, reviews):
+    Review.objects.create(
+        author=users[0],
+        description="Good one",
+        rating=5,
+        recipe=recipes[0],
+    )
+    reviews_url = reverse("review-list", kwargs={"slug": recipes[0].slug})
+
+    response = client.get(reviews_url)
+    assert len(response.data) == 2
+
+    response = client.get(reviews_url, {"pagination": "cursor", "size": 1})
+    first = response.data["results"]
+    response = client.get(response.data["next"])
+    second = response.data["results"]
+
+    assert first[0]["description"] == "Good one"
+    assert second[0]["id"] == reviews[0].id
+    assert response.data["next"] is None
+
+
+def _aggregate(recipe):
+    return Recipe.objects.values(
+        "number_reviews",
+        "rating_sum",
+        "avg_rating",
+        "stars_2",
+        "stars_4",
+        "stars_5",
+    ).get(pk=recipe.pk)
+
+
+@pytest.mark.django_db
+def test_rating_aggregate_follows_review_writes(client, users, recipes, reviews):
+    RatingService.recompute()
+    client.force_authenticate(user=users[0])
+
+    response = client.post(
+        reverse("review-list", kwargs={"slug": recipes[0].slug}),
+        data={"description": "Great", "rating": 5},
+    )
+    review_url = reverse(
+        "review-detail",
+        kwargs={"slug": recipes[0].slug, "pk": response.data["id"]},
+    )
+    assert _aggregate(recipes[0]) == {
+        "number_reviews": 2,
+        "rating_sum": 9,
+        "avg_rating": 4.5,
+        "stars_2": 0,
+        "stars_4": 1,
+        "stars_5": 1,
+    }
+
+    response = client.patch(review_url, data={"rating": 2})
+    assert response.status_code == status.HTTP_200_OK
+    assert _aggregate(recipes[0]) == {
+        "number_reviews": 2,
+        "rating_sum": 6,
+        "avg_rating": 3.0,
+        "stars_2": 1,
+        "stars_4": 1,
+        "stars_5": 0,
+    }
+
+    response = client.delete(review_url)
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert _aggregate(recipes[0])["avg_rating"] == 4.0
+    assert RatingService.recompute() == 0
+
+
+@pytest.mark.django_db
+def test_saving_a_stale_recipe_keeps_the_rating_aggregate(users, recipes):
+    stale = Recipe.objects.get(pk=recipes[0].pk)
+    ReviewService.create_review(
+        users[0],
+        stale.slug,
+        {"description": "Great", "rating": 5},
+    )
+
+    stale.name = "Pizza Diavola"
+    stale.save()
+    assert _aggregate(stale) == {
+        "number_reviews": 1,
+        "rating_sum": 5,
+        "avg_rating": 5.0,
+        "stars_2": 0,
+        "stars_4": 0,
+        "stars_5": 1,
+    }
+    assert RatingService.recompute([stale.pk]) == 0
+
+
+@pytest.mark.django_db
+def test_one_review_per_author_is_enforced_by_the_database(users, recipes, reviews):
+    with pytest.raises(IntegrityError):
+        Review.objects.create(
+            author=users[1],
+            description="Again",
+            rating=1,
+            recipe=recipes[0],
+        )
+
+
+@pytest.mark.django_db
+def test_create_review_only_reports_duplicates_as_already_reviewed(users, recipes):
+    # A NOT NULL violation is not a duplicate review.
+    with pytest.raises(IntegrityError):
+        ReviewService.create_review(
+            users[0],
+            recipes[0].slug,
+            {"description": None, "rating": 5},
+        )
+
+
+@pytest.mark.django_db
+def test_recompute_ratings_repairs_drift(users, recipes, reviews):
+    stdout = io.StringIO()
+    call_command("recompute_ratings", batch_size=1, stdout=stdout)
+
+    assert "repaired 2" in stdout.getvalue()
+    assert _aggregate(recipes[0])["avg_rating"] == 4.0
+    assert _aggregate(recipes[1])["avg_rating"] == 3.0
+
+    users[1].delete()
+    drain()
+    assert _aggregate(recipes[0])["number_reviews"] == 0
+    assert _aggregate(recipes[0])["avg_rating"] == 0
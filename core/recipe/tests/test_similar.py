@@ -0,0 +1,80 @@
+import io
+
+from django.core.management import call_command
+from django.urls import reverse
+
+import pytest
+from rest_framework import status
+
+from core.recipe.models import Ingredient, Recipe, SimilarRecipes
+
+
+@pytest.fixture
+def catalog(recipes, ingredients, users, create_recipe):
+    pizza, ratatouille = recipes
+    pizza.liked_users.set(users[:1])
+    ratatouille.liked_users.set(users)
+    flour, mozzarella, tomato, pepperoni, eggs, _, olive_oil = ingredients["pizza"]
+    return {
+        "pizza": pizza,
+        "ratatouille": ratatouille,
+        "calzone": create_recipe(
+            "Calzone",
+            [flour, mozzarella, tomato, pepperoni, eggs],
+            [],
+        ),
+        "focaccia": create_recipe("Focaccia", [flour, olive_oil], users[:1]),
+        "soup": create_recipe("Soup", [Ingredient.objects.create(name="Leek")], users),
+    }
+
+
+def neighbors(recipe):
+    recipe_ids = SimilarRecipes.objects.get(recipe=recipe).recipe_ids
+    return list(
+        Recipe.objects.in_bulk(recipe_ids)[recipe_id].name for recipe_id in recipe_ids
+    )
+
+
+@pytest.mark.django_db()
+def test_build_similar_recipes(catalog):
+    stdout = io.StringIO()
+    call_command("build_similar_recipes", k=2, block_size=2, stdout=stdout)
+
+    assert "Built similar recipes of 5 recipes" in stdout.getvalue()
+    # Co-liked and sharing two of seven ingredients beats sharing five.
+    assert neighbors(catalog["pizza"]) == ["Focaccia", "Calzone"]
+    # Liked by the same users; ties go to the older recipe.
+    assert neighbors(catalog["ratatouille"]) == ["Soup", "Pizza Margarrita"]
+    assert neighbors(catalog["calzone"]) == ["Pizza Margarrita", "Focaccia"]
+
+    # A rebuild replaces the neighbors.
+    catalog["focaccia"].liked_users.clear()
+    call_command("build_similar_recipes", k=2, stdout=stdout)
+    assert neighbors(catalog["pizza"]) == ["Calzone", "Ratatouille"]
+
+
+@pytest.mark.django_db()
+def test_similar_recipes_endpoint(
+    client,
+    catalog,
+    create_recipe,
+    django_assert_num_queries,
+):
+    call_command("build_similar_recipes", k=3, stdout=io.StringIO())
+    url = reverse("similar-recipes", kwargs={"slug": catalog["pizza"].slug})
+
+    # Lookup, bulk fetch, and the ingredients and likes of the page.
+    with django_assert_num_queries(4):
+        response = client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    assert [recipe["slug"] for recipe in response.data] == [
+        "focaccia",
+        "calzone",
+        "ratatouille",
+    ]
+
+    new = create_recipe("Panzanella")
+    response = client.get(reverse("similar-recipes", kwargs={"slug": new.slug}))
+    assert response.data == []
+    response = client.get(reverse("similar-recipes", kwargs={"slug": "missing"}))
+    assert response.status_code == status.HTTP_404_NOT_FOUND
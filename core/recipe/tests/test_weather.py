@@ -0,0 +1,116 @@
+import time
+from concurrent import futures
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from core.services.recipe import weather_service
+from core.services.recipe.daily_recipes_service import DailyRecipesService
+from core.services.recipe.weather_service import WeatherCache
+
+
+@pytest.fixture(
+    params=[
+        "django.core.cache.backends.locmem.LocMemCache",
+        "django.core.cache.backends.filebased.FileBasedCache",
+    ],
+)
+def cache_alias(request, settings, tmp_path):
+    settings.CACHES = {
+        **settings.CACHES,
+        "weather": {"BACKEND": request.param, "LOCATION": str(tmp_path)},
+    }
+    return "weather"
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_nearby_locations_share_one_grid_cell(weather_server):
+    first = DailyRecipesService(location="50.4501,30.5234").get_temperature()
+    second = DailyRecipesService(location="50.4723,30.4788").get_temperature()
+
+    assert first == second == 20
+    assert len(weather_server.requests) == 1
+    assert weather_server.requests[0]["location"] == ["50.5,30.5"]
+
+
+def test_concurrent_misses_are_coalesced(weather_server, cache_alias):
+    weather_server.delay = 0.2
+    weather = WeatherCache(alias=cache_alias)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(
+            executor.map(
+                lambda _: weather.get_temperature("50.4501,30.5234"),
+                range(8),
+            ),
+        )
+
+    assert results == [20] * 8
+    assert len(weather_server.requests) == 1
+
+
+def test_miss_waits_for_fetch_in_another_process(weather_server):
+    weather = WeatherCache()
+    # Another worker holds the lock for this cell and stores the result.
+    weather.cache.add("weather:50.5,30.5:lock", 1)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        result = executor.submit(weather.get_temperature, "50.4501,30.5234")
+        time.sleep(0.1)
+        weather.cache.set(
+            "weather:50.5,30.5",
+            {"temperature": 7, "fetched_at": time.time()},
+        )
+        assert result.result() == 7
+
+    assert weather_server.requests == []
+
+
+def test_stale_value_is_served_while_refreshing(weather_server, cache_alias):
+    weather = WeatherCache(ttl=0, alias=cache_alias)
+    assert weather.get_temperature("50.4501,30.5234") == 20
+
+    weather_server.temperature, weather_server.delay = 5, 0.2
+    time.sleep(0.01)
+    stale = [weather.get_temperature("50.4501,30.5234") for _ in range(5)]
+
+    assert stale == [20] * 5
+    _wait_for(lambda: weather.cache.get("weather:50.5,30.5:lock") is None)
+    assert len(weather_server.requests) == 2
+    assert weather.get_temperature("50.4501,30.5234") == 5
+
+
+def test_failed_refresh_keeps_stale_value(weather_server):
+    weather = WeatherCache(ttl=0)
+    assert weather.get_temperature("50.4501,30.5234") == 20
+
+    weather_server.status = 500
+    time.sleep(0.01)
+    assert weather.get_temperature("50.4501,30.5234") == 20
+
+    _wait_for(lambda: weather.cache.get("weather:50.5,30.5:lock") is None)
+    # the first fetch, then the refresh and its retry
+    assert len(weather_server.requests) == 3
+    assert weather.get_temperature("50.4501,30.5234") == 20
+
+
+def test_daily_recipes_use_default_temperature_after_wait_timeout(
+    monkeypatch,
+    settings,
+):
+    def wait_timed_out(location):
+        raise futures.TimeoutError
+
+    monkeypatch.setattr(
+        weather_service.weather_cache,
+        "get_temperature",
+        wait_timed_out,
+    )
+    service = DailyRecipesService("50.4501,30.5234")
+    assert service.get_temperature() == settings.DAILY_RECIPES_DEFAULT_TEMPERATURE
@@ -43,9 +43,11 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     # first-party
     "core.recipe",
     "core.account",
+    "core.jobs",
     # third party
     "rest_framework",
     "django_filters",
@@ -55,6 +57,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.utils.metrics.MetricsLogMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -102,6 +105,146 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND",
+            default="django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", default=""),
+    },
+}
+
+# Anonymous GETs of recipe, ingredient and daily recipe lists are cached in
+# RESPONSE_CACHE_ALIAS for RESPONSE_CACHE_TIMEOUT seconds (0 disables)
+RESPONSE_CACHE_ALIAS = os.getenv("RESPONSE_CACHE_ALIAS", default="default")
+RESPONSE_CACHE_TIMEOUT = int(os.getenv("RESPONSE_CACHE_TIMEOUT", default="300"))
+# Recipe facet counts, per normalized filter (0 disables)
+FACETS_CACHE_TIMEOUT = int(os.getenv("FACETS_CACHE_TIMEOUT", default="300"))
+
+
+# Weather (tomorrow.io) used by the daily recipes
+
+TOMORROW_IO_URL = os.getenv(
+    "TOMORROW_IO_URL",
+    default="https://api.tomorrow.io/v4/weather/realtime",
+)
+TOMORROW_IO_TIMEOUT = float(os.getenv("TOMORROW_IO_TIMEOUT", default="3"))
+
+# Used when the weather is unavailable (18 falls into the "mild" band)
+DAILY_RECIPES_DEFAULT_TEMPERATURE = int(
+    os.getenv("DAILY_RECIPES_DEFAULT_TEMPERATURE", default="18"),
+)
+
+# Temperatures are cached per grid cell of WEATHER_CACHE_GRID degrees (0.1 ~ 11 km),
+# fresh for WEATHER_CACHE_TTL seconds and served stale for WEATHER_CACHE_STALE_TTL more
+WEATHER_CACHE_ALIAS = os.getenv("WEATHER_CACHE_ALIAS", default="default")
+WEATHER_CACHE_GRID = float(os.getenv("WEATHER_CACHE_GRID", default="0.1"))
+WEATHER_CACHE_TTL = int(os.getenv("WEATHER_CACHE_TTL", default="900"))
+WEATHER_CACHE_STALE_TTL = int(os.getenv("WEATHER_CACHE_STALE_TTL", default="3600"))
+
+# Daily recipes rotate through the top DAILY_RECIPES_POOL_SIZE recipes of a band
+# (20, the number shown, disables the rotation)
+DAILY_RECIPES_POOL_SIZE = int(os.getenv("DAILY_RECIPES_POOL_SIZE", default="20"))
+
+# The change feed holds back rows changed in the last CHANGE_FEED_LAG seconds,
+# so that transactions still in flight cannot be skipped by a cursor
+CHANGE_FEED_LAG = float(os.getenv("CHANGE_FEED_LAG", default="5"))
+# Days the ids of deleted rows are kept for the change feed (purged by the workers)
+CHANGE_FEED_KEEP_DAYS = int(os.getenv("CHANGE_FEED_KEEP_DAYS", default="30"))
+
+# Seconds like counts are buffered in the default cache before being
+# written to Recipe.likes_count (0 writes every toggle through)
+LIKES_FLUSH_INTERVAL = int(os.getenv("LIKES_FLUSH_INTERVAL", default="0"))
+
+
+# Offline IP geolocation, refreshed with `manage.py refresh_geoip`
+
+GEOIP_PATH = os.getenv("GEOIP_PATH", default=str(BASE_DIR / "data" / "geoip.bin"))
+# CSV of start_ip,end_ip,...,lat,lon rows (DB-IP "IP to City Lite" layout)
+GEOIP_SOURCE_URL = os.getenv(
+    "GEOIP_SOURCE_URL",
+    default="https://download.db-ip.com/free/dbip-city-lite-{date:%Y-%m}.csv.gz",
+)
+# Ask ip-api.com about addresses missing from the database
+GEOIP_HTTP_FALLBACK = (
+    os.getenv("GEOIP_HTTP_FALLBACK", default="false").lower() == "true"
+)
+GEOIP_HTTP_TIMEOUT = float(os.getenv("GEOIP_HTTP_TIMEOUT", default="2"))
+
+
+# Outbound HTTP clients (core/utils/http_client.py), in seconds. Each call gets
+# connect/read timeouts within an overall deadline, `retries` jittered retries
+# and a circuit breaker that opens after `failure_threshold` failures in a row
+# and lets a trial call through after `reset_timeout`.
+OUTBOUND_HTTP = {
+    "weather": {
+        "connect_timeout": 1,
+        "read_timeout": TOMORROW_IO_TIMEOUT,
+        "deadline": TOMORROW_IO_TIMEOUT,
+        "retries": 1,
+        "failure_threshold": 5,
+        "reset_timeout": 30,
+    },
+    "geoip": {
+        "connect_timeout": 0.5,
+        "read_timeout": GEOIP_HTTP_TIMEOUT,
+        "deadline": GEOIP_HTTP_TIMEOUT,
+        "retries": 0,
+        "failure_threshold": 5,
+        "reset_timeout": 60,
+    },
+}
+
+# Every process logs its in-process metrics (outbound HTTP latencies, ...)
+# at most every METRICS_LOG_INTERVAL seconds (0 disables)
+METRICS_LOG_INTERVAL = int(os.getenv("METRICS_LOG_INTERVAL", default="300"))
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "core": {
+            "handlers": ["console"],
+            "level": os.getenv("LOG_LEVEL", default="INFO"),
+        },
+    },
+}
+
+
+# Similar recipes, built by `python manage.py build_similar_recipes`: the
+# SIMILAR_RECIPES_K nearest neighbors of every recipe, scored by co-likes
+# (this weight) and shared ingredients (the rest)
+SIMILAR_RECIPES_K = int(os.getenv("SIMILAR_RECIPES_K", default="12"))
+SIMILAR_RECIPES_LIKES_WEIGHT = float(
+    os.getenv("SIMILAR_RECIPES_LIKES_WEIGHT", default="0.5"),
+)
+
+# "For you" recipes, built by `python manage.py build_for_you`: the
+# FOR_YOU_SIZE best recipes per user from the FOR_YOU_NEIGHBORS most similar
+# recipes of each one they liked or reviewed. Users without a history get
+# the most popular recipes, cached for FOR_YOU_POPULAR_TTL seconds.
+FOR_YOU_SIZE = int(os.getenv("FOR_YOU_SIZE", default="20"))
+FOR_YOU_NEIGHBORS = int(os.getenv("FOR_YOU_NEIGHBORS", default="50"))
+FOR_YOU_POPULAR_TTL = int(os.getenv("FOR_YOU_POPULAR_TTL", default="3600"))
+
+
+# Background jobs (core.jobs), run by `python manage.py run_worker`.
+# A job whose worker stops heartbeating for JOBS_LEASE seconds is requeued;
+# failed attempts are retried after JOBS_BACKOFF * 2 ** (attempt - 1)
+# seconds, at most JOBS_BACKOFF_MAX.
+JOBS_POLL_INTERVAL = float(os.getenv("JOBS_POLL_INTERVAL", default="1"))
+JOBS_LEASE = int(os.getenv("JOBS_LEASE", default="300"))
+JOBS_BACKOFF = int(os.getenv("JOBS_BACKOFF", default="10"))
+JOBS_BACKOFF_MAX = int(os.getenv("JOBS_BACKOFF_MAX", default="3600"))
+# Days finished jobs are kept for inspection
+JOBS_KEEP_DAYS = int(os.getenv("JOBS_KEEP_DAYS", default="7"))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 
@@ -0,0 +1,141 @@
+import base64
+import json
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from rest_framework.exceptions import NotFound, ValidationError
+
+from core.recipe.models import Ingredient, Review, Tombstone
+from core.services.recipe.export_service import RecipeExporter
+
+
+class ChangeFeedService:
+    """
+    Rows of a resource changed since a cursor, and the ids deleted since.
+
+    Both lists are keyset pages over an index: (updated_at, id) of the rows
+    and (deleted_at, id) of the tombstones. Rows younger than
+    CHANGE_FEED_LAG seconds are held back, so a transaction that commits
+    late cannot slip in behind a cursor that has already moved past it.
+    Tombstones are kept for CHANGE_FEED_KEEP_DAYS days: a mirror that syncs
+    less often must start over without a cursor.
+    """
+
+    invalid_cursor_message = "Invalid cursor."
+    # resource -> method returning its changed rows
+    resources = {
+        "recipes": "recipe_rows",
+        "ingredients": "ingredient_rows",
+        "reviews": "review_rows",
+    }
+
+    @staticmethod
+    def recipe_rows(condition, size):
+        recipes = RecipeExporter.get_queryset().filter(condition)
+        return [
+            RecipeExporter.row(recipe)
+            for recipe in recipes.order_by("updated_at", "id")[:size]
+        ]
+
+    @staticmethod
+    def ingredient_rows(condition, size):
+        return list(
+            Ingredient.objects.filter(condition)
+            .order_by("updated_at", "id")
+            .values()[:size],
+        )
+
+    @staticmethod
+    def review_rows(condition, size):
+        return list(
+            Review.objects.filter(condition)
+            .order_by("updated_at", "id")
+            .values()[:size],
+        )
+
+    @classmethod
+    def get_changes(
+        cls,
+        resource: str,
+        cursor: str | None = None,
+        updated_since: datetime | None = None,
+        size: int = 100,
+    ) -> dict:
+        if resource not in cls.resources:
+            raise NotFound(f"Unknown resource {resource!r}")
+
+        if cursor:
+            changed, deleted = cls.decode_cursor(resource, cursor)
+        else:
+            start = (updated_since, 0) if updated_since else None
+            changed = deleted = start
+
+        until = timezone.now() - timedelta(seconds=settings.CHANGE_FEED_LAG)
+        condition = Q(updated_at__lt=until)
+        if changed is not None:
+            condition &= cls.after("updated_at", *changed)
+        rows = getattr(cls, cls.resources[resource])(condition, size + 1)
+
+        tombstones = Tombstone.objects.filter(resource=resource, deleted_at__lt=until)
+        if deleted is not None:
+            tombstones = tombstones.filter(cls.after("deleted_at", *deleted))
+        tombstones = list(
+            tombstones.order_by("deleted_at", "id").values_list(
+                "deleted_at",
+                "id",
+                "object_id",
+            )[: size + 1],
+        )
+
+        has_more = len(rows) > size or len(tombstones) > size
+        rows, tombstones = rows[:size], tombstones[:size]
+        if rows:
+            changed = (rows[-1]["updated_at"], rows[-1]["id"])
+        if tombstones:
+            deleted = tombstones[-1][:2]
+        return {
+            "results": rows,
+            "deleted": [object_id for _, _, object_id in tombstones],
+            "cursor": cls.encode_cursor(resource, changed, deleted),
+            "has_more": has_more,
+        }
+
+    @staticmethod
+    def purge_tombstones(days: int) -> int:
+        cutoff = timezone.now() - timedelta(days=days)
+        deleted, _ = Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+        return deleted
+
+    @staticmethod
+    def after(field: str, value, pk) -> Q:
+        # The `>=` bound lets PostgreSQL use the (field, id) index as a range.
+        return Q(**{f"{field}__gte": value}) & (
+            Q(**{f"{field}__gt": value}) | Q(pk__gt=pk)
+        )
+
+    @staticmethod
+    def encode_cursor(resource: str, *positions) -> str:
+        payload = [resource] + [
+            position and [position[0].isoformat(), position[1]]
+            for position in positions
+        ]
+        encoded = json.dumps(payload, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(encoded).decode()
+
+    @classmethod
+    def decode_cursor(cls, resource: str, cursor: str):
+        try:
+            cursor_resource, *positions = json.loads(base64.urlsafe_b64decode(cursor))
+            positions = [
+                position and (datetime.fromisoformat(position[0]), int(position[1]))
+                for position in positions
+            ]
+            changed, deleted = positions
+        except (TypeError, ValueError, IndexError):
+            raise ValidationError({"cursor": cls.invalid_cursor_message})
+        if cursor_resource != resource:
+            raise ValidationError({"cursor": cls.invalid_cursor_message})
+        return changed, deleted
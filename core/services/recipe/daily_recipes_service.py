@@ -1,45 +1,129 @@
-import os
+import random
+from concurrent import futures
+from datetime import date
 
-import requests
-from dotenv import load_dotenv
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.functional import cached_property
 
-from core.recipe.models import Recipe
+import requests
 
-load_dotenv()
+from core.recipe.models import DailySelection, Recipe
+from core.services.recipe.weather_service import weather_cache
 
 
 class DailyRecipesService:
+    """
+    Daily recipes for the weather at a location.
+
+    There is one selection per temperature band and day. Selections are
+    built by `manage.py build_daily_selections` (or on the first request of
+    the day), stored as ordered id lists and cached, so a request costs one
+    cache read plus one bulk fetch.
+    """
+
+    BAND_CATEGORIES = {
+        "hot": ["healthy", "salad", "appetizer"],
+        "mild": ["breakfast", "side_dish", "bread", "dessert"],
+        "cold": ["soup", "drink", "lunch"],
+    }
+    size = 20
+    cache_timeout = 60 * 60 * 24
+
     def __init__(self, location: str):
         self.location = location
 
-    def get_daily_recipes(self):
-        temperature = self.get_temperature()
-        if temperature >= 25:
-            return Recipe.objects.filter(
-                category__in=["healthy", "salad", "appetizer"],
-            ).order_by("-avg_rating")[:20]
-        elif temperature <= 10:
-            return Recipe.objects.filter(
-                category__in=["soup", "drink", "lunch"],
-            ).order_by("-avg_rating")[:20]
-        else:
-            return Recipe.objects.filter(
-                category__in=["breakfast", "side_dish", "bread", "dessert"],
-            ).order_by("-avg_rating")[:20]
+    @cached_property
+    def band(self) -> str:
+        return self.get_band(self.get_temperature())
+
+    def get_daily_recipes(self) -> list[Recipe]:
+        recipe_ids = self.get_recipe_ids(self.band)
+        recipes = Recipe.objects.with_related().in_bulk(recipe_ids)
+        return [recipes[recipe_id] for recipe_id in recipe_ids if recipe_id in recipes]
 
     def get_temperature(self):
-        url = "https://api.tomorrow.io/v4/weather/realtime"
-        headers = {"apikey": os.getenv("TOMORROW_IO_API_KEY")}
+        try:
+            return weather_cache.get_temperature(self.location)
+        except (requests.RequestException, futures.TimeoutError, ValueError, KeyError):
+            # Weather unavailable, its circuit open or a coalesced fetch still
+            # running (futures.TimeoutError is not TimeoutError before 3.11):
+            # use the default band.
+            return settings.DAILY_RECIPES_DEFAULT_TEMPERATURE
+
+    @staticmethod
+    def get_band(temperature: int) -> str:
+        if temperature >= 25:
+            return "hot"
+        if temperature <= 10:
+            return "cold"
+        return "mild"
+
+    @staticmethod
+    def cache_key(band: str, day: date) -> str:
+        return f"daily_recipes:{band}:{day.isoformat()}"
+
+    @classmethod
+    def get_recipe_ids(cls, band: str, day: date | None = None) -> list[int]:
+        day = day or timezone.localdate()
+        key = cls.cache_key(band, day)
+        recipe_ids = cache.get(key)
+        if recipe_ids is not None:
+            return recipe_ids
+
+        try:
+            recipe_ids = DailySelection.objects.values_list(
+                "recipe_ids",
+                flat=True,
+            ).get(band=band, date=day)
+        except DailySelection.DoesNotExist:
+            selection, _ = DailySelection.objects.get_or_create(
+                band=band,
+                date=day,
+                defaults={"recipe_ids": cls.select_recipe_ids(band, day)},
+            )
+            recipe_ids = selection.recipe_ids
+        cache.set(key, recipe_ids, cls.cache_timeout)
+        return recipe_ids
+
+    @classmethod
+    def ranked_recipes(cls, band: str):
+        """Ids of the recipes of the band, best rated first"""
+        return (
+            Recipe.objects.filter(category__in=cls.BAND_CATEGORIES[band])
+            .order_by("-avg_rating", "-id")
+            .values_list("id", flat=True)
+        )
 
-        params = {
-            "location": self.location,
-            "language": "en",
-            "fields": ["temperature"],
-        }
+    @classmethod
+    def select_recipe_ids(cls, band: str, day: date) -> list[int]:
+        """
+        Best rated recipes of the band. With DAILY_RECIPES_POOL_SIZE above
+        `size`, a daily rotation of the top pool, kept in rating order.
+        """
+        pool_size = max(settings.DAILY_RECIPES_POOL_SIZE, cls.size)
+        pool = list(cls.ranked_recipes(band)[:pool_size])
+        if len(pool) <= cls.size:
+            return pool
 
-        response = requests.get(url=url, headers=headers, params=params)
-        response.raise_for_status()
-        data = response.json()["data"]
-        temperature = int(data["values"]["temperature"])
+        # Seeded by band and day, so every process picks the same rotation.
+        rotation = random.Random(f"{band}:{day.isoformat()}")
+        positions = sorted(rotation.sample(range(len(pool)), cls.size))
+        return [pool[position] for position in positions]
 
-        return temperature
+    @classmethod
+    def build_selections(cls, day: date | None = None) -> dict:
+        """(Re)build and cache the selections of every band for a day"""
+        day = day or timezone.localdate()
+        selections = {}
+        for band in cls.BAND_CATEGORIES:
+            recipe_ids = cls.select_recipe_ids(band, day)
+            DailySelection.objects.update_or_create(
+                band=band,
+                date=day,
+                defaults={"recipe_ids": recipe_ids},
+            )
+            cache.set(cls.cache_key(band, day), recipe_ids, cls.cache_timeout)
+            selections[band] = recipe_ids
+        return selections
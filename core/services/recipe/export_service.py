@@ -0,0 +1,90 @@
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+
+from core.recipe.models import Ingredient, Recipe
+
+
+class RecipeExporter:
+    """
+    The whole catalog as NDJSON, one recipe per line.
+
+    Recipes are read with `iterator(chunk_size=...)`: a server-side cursor
+    on PostgreSQL, with ingredients prefetched once per chunk. Memory use
+    depends on the chunk size, not on the size of the catalog.
+    """
+
+    fields = [
+        "id",
+        "slug",
+        "name",
+        "category",
+        "description",
+        "steps",
+        "total_cooking_time",
+        "difficulty",
+        "country",
+        "author_id",
+        "avg_rating",
+        "number_reviews",
+        "rating_sum",
+        "stars_1",
+        "stars_2",
+        "stars_3",
+        "stars_4",
+        "stars_5",
+        "likes_count",
+        "total_calories",
+        "created_at",
+        "updated_at",
+    ]
+    # Lines are joined into blocks of about this many bytes before being sent.
+    block_size = 64 * 1024
+
+    def __init__(self, chunk_size: int = 2000):
+        self.chunk_size = chunk_size
+
+    @classmethod
+    def get_queryset(cls):
+        return (
+            Recipe.objects.only(*cls.fields, "image")
+            .prefetch_related(
+                Prefetch("ingredients", queryset=Ingredient.objects.only("id")),
+            )
+            .order_by("id")
+        )
+
+    @classmethod
+    def row(cls, recipe: Recipe) -> dict:
+        row = {field: getattr(recipe, field) for field in cls.fields}
+        row["image"] = recipe.image.name or None
+        row["ingredients"] = sorted(
+            ingredient.id for ingredient in recipe.ingredients.all()
+        )
+        return row
+
+    def rows(self):
+        for recipe in self.get_queryset().iterator(chunk_size=self.chunk_size):
+            yield self.row(recipe)
+
+    def lines(self):
+        """NDJSON, in blocks of about `block_size` bytes"""
+        block, size = [], 0
+        for row in self.rows():
+            line = json.dumps(row, cls=DjangoJSONEncoder).encode() + b"\n"
+            block.append(line)
+            size += len(line)
+            if size >= self.block_size:
+                yield b"".join(block)
+                block, size = [], 0
+        if block:
+            yield b"".join(block)
+
+    def gzip_lines(self):
+        """`lines()` as one gzip stream, flushed after every block"""
+        compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+        for block in self.lines():
+            yield compressor.compress(block) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
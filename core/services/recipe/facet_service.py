@@ -0,0 +1,98 @@
+import hashlib
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from core.recipe.models import Ingredient, Recipe
+from core.utils.response_cache import model_version_name
+from core.utils.versions import get_versions
+
+
+class RecipeFacetService:
+    """
+    Recipe counts per category, difficulty and country for the recipe
+    browser, within the recipes matching the RecipeFilter params.
+
+    All facets come from one `GROUP BY GROUPING SETS` over the filtered
+    recipes, plus the `()` set for the total. Results are cached for
+    FACETS_CACHE_TIMEOUT seconds per normalized filter and per version of
+    the models they are built from, so any recipe or ingredient change
+    invalidates them.
+    """
+
+    facets = ["category", "difficulty", "country"]
+    cache_models = [Recipe, Ingredient]
+
+    facets_sql = """
+        SELECT {groupings}, {facets}, COUNT(*)
+        FROM ({recipes}) AS recipes
+        GROUP BY GROUPING SETS ({sets}, ())
+    """
+
+    @staticmethod
+    def normalize(name: str, value) -> str:
+        if isinstance(value, Decimal):
+            return format(value.normalize(), "f")
+        # Every text filter is case insensitive.
+        value = str(value).strip().lower()
+        if name == "ingredients":
+            # Comma separated terms, matched in any order.
+            terms = {term.strip() for term in value.split(",")} - {""}
+            value = ",".join(sorted(terms))
+        return value
+
+    @classmethod
+    def cache_key(cls, params: dict) -> str:
+        versions = get_versions(
+            sorted(model_version_name(model) for model in cls.cache_models),
+        )
+        normalized = sorted(
+            (name, cls.normalize(name, value))
+            for name, value in params.items()
+            if value not in (None, "")
+        )
+        key = repr([normalized, sorted(versions.items())])
+        return f"recipes:facets:{hashlib.md5(key.encode()).hexdigest()}"
+
+    @classmethod
+    def count(cls, queryset) -> dict:
+        """{"count": total, facet: [{"value": ..., "count": ...}, ...]}"""
+        result = {"count": 0, **{facet: [] for facet in cls.facets}}
+        if queryset.query.is_empty():
+            return result
+
+        sql, params = queryset.order_by().values(*cls.facets).query.sql_with_params()
+        quoted = [connection.ops.quote_name(facet) for facet in cls.facets]
+        sql = cls.facets_sql.format(
+            groupings=", ".join(f"GROUPING({column})" for column in quoted),
+            facets=", ".join(quoted),
+            recipes=sql,
+            sets=", ".join(f"({column})" for column in quoted),
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+
+        width = len(cls.facets)
+        for row in rows:
+            groupings, values, count = row[:width], row[width:-1], row[-1]
+            if all(groupings):
+                result["count"] = count
+                continue
+            index = groupings.index(0)
+            result[cls.facets[index]].append({"value": values[index], "count": count})
+        for facet in cls.facets:
+            result[facet].sort(key=lambda item: (-item["count"], item["value"]))
+        return result
+
+    @classmethod
+    def get_facets(cls, queryset, params: dict) -> dict:
+        """Facet counts of `queryset`, filtered by `params` (cleaned filter data)"""
+        key = cls.cache_key(params)
+        facets = cache.get(key)
+        if facets is None:
+            facets = cls.count(queryset)
+            cache.set(key, facets, settings.FACETS_CACHE_TIMEOUT)
+        return facets
@@ -0,0 +1,91 @@
+import hashlib
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models.functions import Now
+
+from PIL import Image, ImageOps
+
+from core.recipe.models import Recipe
+from core.utils.response_cache import bump_model_version
+
+# variant -> bounding box; images are never upscaled
+VARIANTS = {
+    "thumb": (160, 160),
+    "card": (480, 480),
+    "full": (1600, 1600),
+}
+# extension -> (Pillow format, save options)
+FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def _open_rgb(name: str) -> Image.Image:
+    with default_storage.open(name, "rb") as file, Image.open(file) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, "white")
+            background.paste(image, mask=image.getchannel("A"))
+            return background
+        return image.convert("RGB")
+
+
+def render_variants(name: str) -> dict:
+    """
+    Resized WebP and JPEG copies of a stored image, saved in "variants/"
+    next to it. Returns {"source": name, variant: {extension: name}}.
+    """
+    image = _open_rgb(name)
+    path = PurePosixPath(name)
+    variants = {"source": name}
+    for variant, size in VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail(size, Image.Resampling.LANCZOS)
+        variants[variant] = {}
+        for extension, (image_format, options) in FORMATS.items():
+            buffer = BytesIO()
+            resized.save(buffer, image_format, **options)
+            content = buffer.getvalue()
+            # Content-addressed, so the files can be cached forever.
+            digest = hashlib.md5(content).hexdigest()[:10]
+            filename = f"{path.stem}-{variant}-{digest}.{extension}"
+            variants[variant][extension] = default_storage.save(
+                str(path.parent / "variants" / filename),
+                ContentFile(content),
+            )
+    return variants
+
+
+def delete_variants(variants: dict):
+    for variant in VARIANTS:
+        for name in variants.get(variant, {}).values():
+            default_storage.delete(name)
+
+
+def process_recipe_image(recipe_id: int, name: str) -> bool:
+    """Render the variants of a recipe image; False if the image has changed since"""
+    previous = (
+        Recipe.objects.filter(pk=recipe_id, image=name)
+        .values_list("image_variants", flat=True)
+        .first()
+    )
+    if previous is None:
+        return False
+
+    variants = render_variants(name)
+    updated = Recipe.objects.filter(pk=recipe_id, image=name).update(
+        image_variants=variants,
+        updated_at=Now(),
+    )
+    if not updated:
+        # Replaced or deleted while rendering.
+        delete_variants(variants)
+        return False
+    delete_variants(previous)
+    bump_model_version(Recipe)
+    return True
@@ -0,0 +1,160 @@
+import hashlib
+import json
+from collections import Counter
+from functools import partial
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.text import slugify
+
+from core.recipe.models import Ingredient, Recipe, recipe_search_vector
+from core.services.recipe.pantry_service import ingredient_index
+from core.services.recipe.recipe_service import CalorieService
+from core.utils.response_cache import bump_model_version
+from core.utils.slugs import bulk_create_with_slugs
+from core.utils.versions import bump_version
+
+
+class RecipeImporter:
+    """
+    Bulk loader behind `manage.py import_recipes`.
+
+    Rows are imported in batches, each in its own transaction: one query
+    for already imported keys, one for slugs, one bulk insert for recipes
+    and one for their ingredients, and one UPDATE of the search vectors.
+    Every field is cleaned by its model field (type, max_length, choices,
+    range), and a row failing any of them is reported and left out.
+    Every row has an import key (its "import_key" column or a hash of the
+    row), so importing the same input again does not duplicate anything.
+    """
+
+    fields = [
+        "name",
+        "category",
+        "description",
+        "steps",
+        "total_cooking_time",
+        "difficulty",
+        "country",
+    ]
+
+    def __init__(self, author=None, batch_size: int = 1000):
+        self.author = author
+        self.batch_size = batch_size
+        self.stats = Counter()
+        self.errors = []
+        self.ingredient_ids = {}
+        for ingredient_id, name, slug in Ingredient.objects.values_list(
+            "id",
+            "name",
+            "slug",
+        ):
+            self.ingredient_ids.setdefault(name.lower(), ingredient_id)
+            self.ingredient_ids.setdefault(slug, ingredient_id)
+
+    def import_rows(self, rows):
+        """Import (line number, row) pairs; yield the stats after each batch"""
+        rows = iter(rows)
+        while batch := list(islice(rows, self.batch_size)):
+            self.import_batch(batch)
+            yield self.stats
+
+    def import_batch(self, batch: list):
+        prepared = {}
+        for line, row in batch:
+            try:
+                key, recipe, ingredient_ids = self.prepare(row)
+            except (KeyError, TypeError, ValueError) as exc:
+                self.stats["invalid"] += 1
+                self.errors.append((line, str(exc)))
+                continue
+            if key in prepared:
+                self.stats["skipped"] += 1
+                continue
+            prepared[key] = recipe, ingredient_ids
+
+        with transaction.atomic():
+            imported = Recipe.objects.filter(import_key__in=prepared).values_list(
+                "import_key",
+                flat=True,
+            )
+            for key in imported:
+                del prepared[key]
+                self.stats["skipped"] += 1
+            if not prepared:
+                return
+
+            recipes = [recipe for recipe, _ in prepared.values()]
+            bulk_create_with_slugs(Recipe, recipes)
+
+            through = Recipe.ingredients.through
+            through.objects.bulk_create(
+                [
+                    through(recipe_id=recipe.pk, ingredient_id=ingredient_id)
+                    for recipe, ingredient_ids in prepared.values()
+                    for ingredient_id in ingredient_ids
+                ],
+            )
+            Recipe.objects.filter(pk__in=[recipe.pk for recipe in recipes]).update(
+                search_vector=recipe_search_vector(),
+                total_calories=CalorieService.expected_total(),
+            )
+            # bulk_create sends no signals: rebuild the pantry index and
+            # invalidate cached recipe responses.
+            transaction.on_commit(partial(bump_version, ingredient_index.version_name))
+            transaction.on_commit(partial(bump_model_version, Recipe))
+        self.stats["created"] += len(recipes)
+
+    def prepare(self, row: dict):
+        self.validate(row)
+        recipe = Recipe(
+            author=self.author,
+            import_key=self.import_key(row),
+            **{field: self.clean_field(field, row[field]) for field in self.fields},
+        )
+
+        ingredient_ids = set()
+        for name in self.ingredient_names(row.get("ingredients")):
+            key = name.strip().lower()
+            ingredient_id = self.ingredient_ids.get(key) or self.ingredient_ids.get(
+                slugify(key),
+            )
+            if ingredient_id is None:
+                self.stats["unknown_ingredients"] += 1
+            else:
+                ingredient_ids.add(ingredient_id)
+        return recipe.import_key, recipe, ingredient_ids
+
+    @classmethod
+    def validate(cls, row: dict):
+        if not isinstance(row, dict):
+            raise ValueError("Not a JSON object")
+        missing = [field for field in cls.fields if not row.get(field)]
+        if missing:
+            raise ValueError(f"Missing {', '.join(missing)}")
+
+    @staticmethod
+    def clean_field(name: str, value):
+        """`value` converted and validated as the model field would on save"""
+        try:
+            return Recipe._meta.get_field(name).clean(value, None)
+        except ValidationError as exc:
+            raise ValueError(f"{name}: {' '.join(exc.messages)}")
+
+    @staticmethod
+    def ingredient_names(value) -> list[str]:
+        """A JSON list, or a "|"-separated string (CSV)"""
+        if not value:
+            return []
+        if isinstance(value, str):
+            return [name for name in value.split("|") if name.strip()]
+        return [str(name) for name in value]
+
+    @staticmethod
+    def import_key(row: dict) -> str:
+        key = str(row.get("import_key") or "")
+        if key and len(key) <= 64:
+            return key
+        canonical = json.dumps(row, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(canonical.encode()).hexdigest()
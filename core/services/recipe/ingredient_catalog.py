@@ -0,0 +1,157 @@
+import threading
+from bisect import bisect_left
+from collections import Counter
+
+from django.utils.text import slugify
+
+from core.recipe.models import Ingredient
+from core.utils.versions import get_version
+
+
+def trigrams(text: str) -> set[str]:
+    """Trigrams of every word, padded the way pg_trgm does it"""
+    result = set()
+    for word in text.lower().split():
+        padded = f"  {word} "
+        result.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+class _Snapshot:
+    def __init__(self, rows):
+        self.items, by_key, prefixes, grams = {}, {}, [], {}
+        for ingredient_id, name, slug, category, caloric_content in rows:
+            self.items[ingredient_id] = {
+                "id": ingredient_id,
+                "name": name,
+                "slug": slug,
+                "category": category,
+                "caloric_content": caloric_content,
+            }
+            lowered = name.lower()
+            by_key.setdefault(lowered, set()).add(ingredient_id)
+            by_key.setdefault(slug, set()).add(ingredient_id)
+
+            # Every word start is a prefix entry: "oil" finds "Olive Oil".
+            start = 0
+            for word in lowered.split(" "):
+                if word:
+                    prefixes.append((lowered[start:], start, ingredient_id))
+                start += len(word) + 1
+            for gram in trigrams(lowered):
+                grams.setdefault(gram, []).append(ingredient_id)
+
+        prefixes.sort()
+        self.ids = frozenset(self.items)
+        self.by_key = {key: frozenset(value) for key, value in by_key.items()}
+        self.prefix_keys = [key for key, _, _ in prefixes]
+        self.prefix_entries = [(start, id_) for _, start, id_ in prefixes]
+        self.grams = grams
+        self.gram_counts = {
+            id_: len(trigrams(item["name"])) for id_, item in self.items.items()
+        }
+
+    def prefix_matches(self, query: str) -> list[int]:
+        """Names starting with the query first, then names with such a word"""
+        starts = {}
+        position = bisect_left(self.prefix_keys, query)
+        while position < len(self.prefix_keys):
+            if not self.prefix_keys[position].startswith(query):
+                break
+            start, ingredient_id = self.prefix_entries[position]
+            starts[ingredient_id] = min(start, starts.get(ingredient_id, start))
+            position += 1
+
+        def order(ingredient_id):
+            name = self.items[ingredient_id]["name"]
+            return starts[ingredient_id] > 0, len(name), name
+
+        return sorted(starts, key=order)
+
+    def fuzzy_matches(self, query: str, threshold: float) -> list[int]:
+        """Names ordered by trigram similarity to the query"""
+        query_grams = trigrams(query)
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(self.grams.get(gram, ()))
+
+        scored = []
+        for ingredient_id, count in shared.items():
+            union = len(query_grams) + self.gram_counts[ingredient_id] - count
+            if count / union >= threshold:
+                name = self.items[ingredient_id]["name"]
+                scored.append((-count / union, name, ingredient_id))
+        scored.sort()
+        return [ingredient_id for _, _, ingredient_id in scored]
+
+
+class IngredientCatalog:
+    """
+    Per-process snapshot of the ingredient catalog.
+
+    The catalog is small and rarely changes, so lookups by id, slug or name
+    and typeahead suggestions are answered from memory. It is rebuilt lazily
+    whenever the shared "ingredients" version stamp changes.
+    """
+
+    version_name = "ingredients"
+    similarity_threshold = 0.3
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._snapshot = _Snapshot([])
+
+    def _ensure_fresh(self) -> _Snapshot:
+        version = get_version(self.version_name)
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._snapshot = _Snapshot(
+                        Ingredient.objects.values_list(
+                            "id",
+                            "name",
+                            "slug",
+                            "category",
+                            "caloric_content",
+                        ),
+                    )
+                    self._version = version
+        return self._snapshot
+
+    def resolve(self, term: str) -> frozenset:
+        """Return ids of the ingredients matching an id, slug or name"""
+        snapshot = self._ensure_fresh()
+        term = term.strip().lower()
+        if term.isdigit():
+            return frozenset({int(term)}) & snapshot.ids
+        return snapshot.by_key.get(term) or snapshot.by_key.get(
+            slugify(term),
+            frozenset(),
+        )
+
+    def suggest(self, query: str, limit: int = 10) -> list[dict]:
+        """
+        Typeahead suggestions: names starting with the query first, then
+        names with a word starting with it, then trigram (fuzzy) matches.
+        """
+        snapshot = self._ensure_fresh()
+        query = " ".join(query.lower().split())
+        if not query:
+            return []
+
+        ranked = snapshot.prefix_matches(query)
+        if len(ranked) < limit:
+            seen = set(ranked)
+            ranked += [
+                ingredient_id
+                for ingredient_id in snapshot.fuzzy_matches(
+                    query,
+                    self.similarity_threshold,
+                )
+                if ingredient_id not in seen
+            ]
+        return [snapshot.items[ingredient_id] for ingredient_id in ranked[:limit]]
+
+
+ingredient_catalog = IngredientCatalog()
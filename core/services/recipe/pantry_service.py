@@ -0,0 +1,351 @@
+import threading
+from array import array
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+from core.recipe.models import Recipe
+from core.services.recipe.ingredient_catalog import ingredient_catalog
+from core.utils.versions import bump_version, get_version
+
+
+def _to_bitset(ordinals, size: int) -> int:
+    buffer = bytearray((size + 7) // 8)
+    for ordinal in ordinals:
+        buffer[ordinal >> 3] |= 1 << (ordinal & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def _set_plane_value(planes: list, bit: int, value: int) -> list:
+    """Store `value` for one recipe in bit-sliced counter planes"""
+    planes = planes + [0] * (value.bit_length() - len(planes))
+    for position, plane in enumerate(planes):
+        planes[position] = plane | bit if value >> position & 1 else plane & ~bit
+    return planes
+
+
+def _add_to_planes(planes: list, bitset: int):
+    """Add 1 to every recipe counter whose bit is set (ripple carry)"""
+    carry = bitset
+    for position, plane in enumerate(planes):
+        if not carry:
+            return
+        planes[position], carry = plane ^ carry, plane & carry
+    if carry:
+        planes.append(carry)
+
+
+def _subtract_planes(minuend: list, subtrahend: list) -> list:
+    difference, borrow = [], 0
+    for position in range(max(len(minuend), len(subtrahend))):
+        a = minuend[position] if position < len(minuend) else 0
+        b = subtrahend[position] if position < len(subtrahend) else 0
+        difference.append(a ^ b ^ borrow)
+        borrow = (~a & b) | (~(a ^ b) & borrow)
+    return difference
+
+
+def _equals(planes: list, value: int, mask: int) -> int:
+    """Narrow `mask` to the recipes whose counter equals `value`"""
+    if value >> len(planes):
+        return 0
+    for position, plane in enumerate(planes):
+        mask &= plane if value >> position & 1 else ~plane
+        if not mask:
+            break
+    return mask
+
+
+def _set_bit_positions(mask: int, start: int, stop: int):
+    """Yield positions of the set bits of `mask` with rank in [start, stop)"""
+    offset = 0
+    if start:
+        low, high = 0, mask.bit_length()
+        while low < high:
+            middle = (low + high) // 2
+            if (mask & ((1 << middle) - 1)).bit_count() >= start:
+                high = middle
+            else:
+                low = middle + 1
+        mask >>= low
+        offset = low
+    for _ in range(stop - start):
+        if not mask:
+            return
+        position = (mask & -mask).bit_length() - 1
+        yield offset + position
+        mask >>= position + 1
+        offset += position + 1
+
+
+class PantryRanking:
+    """
+    Lazily materialized ranking, sliced by the paginator.
+
+    Holds one bitset per (missing, matched) group, so counting is a popcount
+    and only the requested page is turned into recipe ids.
+    """
+
+    def __init__(self, groups: list, recipe_ids):
+        self._groups = groups
+        self._recipe_ids = recipe_ids
+
+    def __len__(self):
+        return sum(count for _, _, _, count in self._groups)
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            length = len(self)
+            if index < 0:
+                index += length
+            if not 0 <= index < length:
+                raise IndexError("PantryRanking index out of range")
+            return self[index : index + 1][0]
+        start, stop, _ = index.indices(len(self))
+
+        result = []
+        for bitset, matched, missing, count in self._groups:
+            if stop <= 0:
+                break
+            if start < count:
+                for ordinal in _set_bit_positions(bitset, start, min(stop, count)):
+                    result.append((self._recipe_ids[ordinal], matched, missing))
+            start, stop = max(start - count, 0), stop - count
+        return result
+
+
+class IngredientIndex:
+    """
+    Per-process inverted index: ingredient id -> sorted recipe ordinals.
+
+    Recipes are numbered with dense ordinals so that postings can be turned
+    into bitsets and scored with bit-sliced counters. The index is built
+    lazily from the Recipe.ingredients through table and patched in place
+    from m2m signals; a shared version stamp tells every process when its
+    copy has missed a change and must be rebuilt.
+    """
+
+    version_name = "recipe_ingredients"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._recipe_ids = array("q")
+        self._ordinals = {}
+        self._postings = {}
+        self._bitsets = {}
+        self._sizes = array("l")
+        self._size_planes = []
+        self._alive = 0
+
+    def _build(self):
+        rows = (
+            Recipe.ingredients.through.objects.order_by("recipe_id", "ingredient_id")
+            .values_list("ingredient_id", "recipe_id")
+            .iterator(chunk_size=10000)
+        )
+        self._load(rows)
+
+    def _load(self, rows):
+        """Load (ingredient_id, recipe_id) rows ordered by recipe id"""
+        recipe_ids, ordinals, sizes = array("q"), {}, array("l")
+        postings = defaultdict(lambda: array("l"))
+        for ingredient_id, recipe_id in rows:
+            ordinal = ordinals.get(recipe_id)
+            if ordinal is None:
+                ordinal = ordinals[recipe_id] = len(recipe_ids)
+                recipe_ids.append(recipe_id)
+                sizes.append(0)
+            postings[ingredient_id].append(ordinal)
+            sizes[ordinal] += 1
+
+        size_planes = []
+        for position in range(max(sizes, default=0).bit_length()):
+            size_planes.append(
+                _to_bitset(
+                    (
+                        ordinal
+                        for ordinal, size in enumerate(sizes)
+                        if size >> position & 1
+                    ),
+                    len(sizes),
+                ),
+            )
+
+        # Dense postings are cheaper to keep as bitsets than to rebuild.
+        bitsets = {
+            ingredient_id: _to_bitset(posting, len(recipe_ids))
+            for ingredient_id, posting in postings.items()
+            if len(posting) * 64 >= len(recipe_ids)
+        }
+
+        self._recipe_ids = recipe_ids
+        self._ordinals = ordinals
+        self._postings = dict(postings)
+        self._bitsets = bitsets
+        self._sizes = sizes
+        self._size_planes = size_planes
+        self._alive = (1 << len(recipe_ids)) - 1
+
+    def _ensure_fresh(self):
+        version = get_version(self.version_name)
+        if version == self._version:
+            return
+        with self._lock:
+            if version != self._version:
+                self._build()
+                self._version = version
+
+    def _bump(self) -> bool:
+        """Bump the shared version; return True if this copy is still in sync"""
+        new_version = bump_version(self.version_name)
+        if self._version is not None and self._version == new_version - 1:
+            self._version = new_version
+            return True
+        self._version = None
+        return False
+
+    def _bitset(self, ingredient_id: int) -> int:
+        bitset = self._bitsets.get(ingredient_id)
+        if bitset is None:
+            bitset = _to_bitset(self._postings[ingredient_id], len(self._recipe_ids))
+        return bitset
+
+    def _ordinal(self, recipe_id: int) -> int:
+        ordinal = self._ordinals.get(recipe_id)
+        if ordinal is None:
+            ordinal = self._ordinals[recipe_id] = len(self._recipe_ids)
+            self._recipe_ids.append(recipe_id)
+            self._sizes.append(0)
+            self._alive |= 1 << ordinal
+        return ordinal
+
+    def _resize(self, ordinal: int, delta: int):
+        self._sizes[ordinal] += delta
+        self._size_planes = _set_plane_value(
+            self._size_planes,
+            1 << ordinal,
+            self._sizes[ordinal],
+        )
+
+    def add(self, pairs):
+        """Register (ingredient_id, recipe_id) pairs"""
+        with self._lock:
+            if not self._bump():
+                return
+            for ingredient_id, recipe_id in pairs:
+                ordinal = self._ordinal(recipe_id)
+                # Copy on write: readers may be iterating over the old array.
+                posting = array("l", self._postings.get(ingredient_id, ()))
+                position = bisect_left(posting, ordinal)
+                if position < len(posting) and posting[position] == ordinal:
+                    continue
+                insort(posting, ordinal)
+                self._postings[ingredient_id] = posting
+                if ingredient_id in self._bitsets:
+                    self._bitsets[ingredient_id] |= 1 << ordinal
+                self._resize(ordinal, 1)
+
+    def remove(self, pairs):
+        """Unregister (ingredient_id, recipe_id) pairs"""
+        with self._lock:
+            if not self._bump():
+                return
+            for ingredient_id, recipe_id in pairs:
+                ordinal = self._ordinals.get(recipe_id)
+                posting = self._postings.get(ingredient_id)
+                if ordinal is None or posting is None:
+                    continue
+                position = bisect_left(posting, ordinal)
+                if position == len(posting) or posting[position] != ordinal:
+                    continue
+                self._postings[ingredient_id] = (
+                    posting[:position] + posting[position + 1 :]
+                )
+                if ingredient_id in self._bitsets:
+                    self._bitsets[ingredient_id] &= ~(1 << ordinal)
+                self._resize(ordinal, -1)
+
+    def discard_recipe(self, recipe_id: int):
+        with self._lock:
+            ordinal = self._ordinals.get(recipe_id)
+            if self._bump() and ordinal is not None:
+                # Stale ordinals left in postings are masked out while ranking.
+                self._alive &= ~(1 << ordinal)
+
+    def discard_ingredient(self, ingredient_id: int):
+        with self._lock:
+            if not self._bump():
+                return
+            for ordinal in self._postings.pop(ingredient_id, ()):
+                self._resize(ordinal, -1)
+            self._bitsets.pop(ingredient_id, None)
+
+    def rank(self, ingredient_ids, max_missing: int | None = None) -> PantryRanking:
+        """
+        Rank recipes by how much of them the given ingredients cover.
+
+        The ranking yields (recipe_id, matched, missing) tuples ordered by the
+        fewest missing ingredients, then the most matched ones.
+        """
+        self._ensure_fresh()
+        ingredient_ids = [i for i in set(ingredient_ids) if i in self._postings]
+        recipe_ids, size_planes = self._recipe_ids, self._size_planes
+
+        matched_planes, candidates = [], 0
+        for ingredient_id in ingredient_ids:
+            bitset = self._bitset(ingredient_id)
+            _add_to_planes(matched_planes, bitset)
+            candidates |= bitset
+        candidates &= self._alive
+        missing_planes = _subtract_planes(size_planes, matched_planes)
+
+        groups, missing = [], 0
+        while candidates and (max_missing is None or missing <= max_missing):
+            with_missing = _equals(missing_planes, missing, candidates)
+            candidates &= ~with_missing
+            for matched in range(len(ingredient_ids), 0, -1):
+                if not with_missing:
+                    break
+                group = _equals(matched_planes, matched, with_missing)
+                if group:
+                    groups.append((group, matched, missing, group.bit_count()))
+                    with_missing &= ~group
+            missing += 1
+
+        return PantryRanking(groups, recipe_ids)
+
+
+ingredient_index = IngredientIndex()
+
+
+class PantryService:
+    @staticmethod
+    def resolve_ingredients(terms: list[str]) -> set[int]:
+        ingredient_ids = set()
+        for term in terms:
+            ingredient_ids |= ingredient_catalog.resolve(term)
+        return ingredient_ids
+
+    @staticmethod
+    def rank_recipes(terms: list[str], max_missing: int | None = None):
+        ingredient_ids = PantryService.resolve_ingredients(terms)
+        return ingredient_index.rank(ingredient_ids, max_missing=max_missing)
+
+    @staticmethod
+    def get_recipes(ranking: list) -> list[Recipe]:
+        """Fetch ranked recipes in one query, keeping the ranking order"""
+        recipes = Recipe.objects.with_related().in_bulk(
+            [recipe_id for recipe_id, _, _ in ranking],
+        )
+        result = []
+        for recipe_id, matched, missing in ranking:
+            recipe = recipes.get(recipe_id)
+            if recipe is None:
+                continue
+            recipe.matched_count = matched
+            recipe.missing_count = missing
+            result.append(recipe)
+        return result
@@ -1,9 +1,18 @@
-from django.db.models import F
+from functools import partial
 
-from rest_framework.exceptions import ValidationError
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, FloatField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce, Greatest, Now, NullIf
+
+from rest_framework.exceptions import NotFound, ValidationError
 
 from core.account.models import User
+from core.jobs.job_queue import enqueue
 from core.recipe.models import Recipe, Review
+from core.utils.db import violated_constraint
+from core.utils.response_cache import bump_model_version
 
 
 class RecipeService:
@@ -21,34 +30,308 @@ class RecipeService:
         return recipe
 
 
+class RatingService:
+    """
+    Keeps the rating aggregate of a recipe (number_reviews, rating_sum, the
+    1-5 star histogram and avg_rating) in step with its reviews.
+
+    Every change is a single UPDATE computed from the current column values,
+    so concurrent writes cannot overwrite each other and reads never need
+    an AVG() over the reviews. Each one also moves updated_at, for the
+    change feed.
+    """
+
+    @staticmethod
+    def apply_change(
+        recipe_id: int,
+        added: int | None = None,
+        removed: int | None = None,
+    ) -> None:
+        """Account for a rating that was added, removed or changed"""
+        if added == removed:
+            return
+        count_delta = (added is not None) - (removed is not None)
+        sum_delta = (added or 0) - (removed or 0)
+
+        updates = {
+            "number_reviews": F("number_reviews") + count_delta,
+            "rating_sum": F("rating_sum") + sum_delta,
+            "updated_at": Now(),
+            # The right-hand side sees the old column values.
+            "avg_rating": Coalesce(
+                Cast(F("rating_sum") + sum_delta, FloatField())
+                / NullIf(F("number_reviews") + count_delta, 0),
+                0.0,
+            ),
+        }
+        if added is not None:
+            updates[f"stars_{added}"] = F(f"stars_{added}") + 1
+        if removed is not None:
+            updates[f"stars_{removed}"] = F(f"stars_{removed}") - 1
+        Recipe.objects.filter(pk=recipe_id).update(**updates)
+
+    @staticmethod
+    def recompute(recipe_ids=None) -> int:
+        """Rebuild aggregates from the reviews; return how many had drifted"""
+
+        def aggregate(expression):
+            reviews = (
+                Review.objects.filter(recipe_id=OuterRef("pk"))
+                .values("recipe_id")
+                .annotate(value=expression)
+                .values("value")
+            )
+            return Coalesce(Subquery(reviews), 0)
+
+        expected = {
+            "number_reviews": aggregate(Count("*")),
+            "rating_sum": aggregate(Sum("rating")),
+            **{
+                f"stars_{stars}": aggregate(Count("pk", filter=Q(rating=stars)))
+                for stars in range(1, 6)
+            },
+        }
+        expected["avg_rating"] = Coalesce(
+            Cast(expected["rating_sum"], FloatField())
+            / NullIf(expected["number_reviews"], 0),
+            0.0,
+        )
+
+        recipes = Recipe.objects.all()
+        if recipe_ids is not None:
+            recipes = recipes.filter(pk__in=recipe_ids)
+        return recipes.exclude(Q(**expected)).update(**expected, updated_at=Now())
+
+
+class CalorieService:
+    """
+    Keeps `total_calories`, the sum of the ingredients' caloric_content, in
+    step with the ingredients of a recipe and their caloric content.
+
+    Every refresh is one UPDATE that sums the through table per recipe and
+    only touches (and moves updated_at of) the recipes whose total changed,
+    unless `touch` asks for all of them.
+    """
+
+    @staticmethod
+    def expected_total():
+        calories = (
+            Recipe.ingredients.through.objects.filter(recipe_id=OuterRef("pk"))
+            .values("recipe_id")
+            .annotate(total=Sum("ingredient__caloric_content"))
+            .values("total")
+        )
+        return Coalesce(Subquery(calories), 0)
+
+    @classmethod
+    def recompute(cls, recipe_ids=None, touch: bool = False) -> int:
+        """Recompute the totals from the ingredients; return how many changed"""
+        recipes = Recipe.objects.all()
+        if recipe_ids is not None:
+            recipes = recipes.filter(pk__in=recipe_ids)
+        total = cls.expected_total()
+        if not touch:
+            recipes = recipes.exclude(total_calories=total)
+        return recipes.update(
+            total_calories=total,
+            updated_at=Now(),
+        )
+
+    @classmethod
+    def recompute_for_ingredients(cls, ingredient_ids) -> int:
+        """Fan an ingredient change out to every recipe using it, in bulk"""
+        recipe_ids = Recipe.ingredients.through.objects.filter(
+            ingredient_id__in=ingredient_ids,
+        ).values("recipe_id")
+        return cls.recompute(recipe_ids)
+
+
 class ReviewService:
+    already_reviewed_message = "You have already reviewed this movie!"
+    unique_constraint = "review_author_recipe_unique"
+
     @staticmethod
     def create_review(author: User, slug: str, validated_data: dict) -> Review:
-        recipe = Recipe.objects.get(slug=slug)
-
-        if Review.objects.filter(author=author, recipe=recipe).exists():
-            raise ValidationError("You have already reviewed this movie!")
+        try:
+            recipe_id = Recipe.objects.values_list("id", flat=True).get(slug=slug)
+        except Recipe.DoesNotExist:
+            raise NotFound("Recipe not found")
 
-        if recipe.number_reviews == 0:
-            recipe.avg_rating = validated_data["rating"]
-        else:
-            recipe.avg_rating = (
-                recipe.avg_rating * recipe.number_reviews + validated_data["rating"]
-            ) / (recipe.number_reviews + 1)
+        try:
+            with transaction.atomic():
+                review = Review.objects.create(
+                    author=author,
+                    recipe_id=recipe_id,
+                    **validated_data,
+                )
+                RatingService.apply_change(recipe_id, added=review.rating)
+        except IntegrityError as exc:
+            # The author/recipe unique constraint, also under concurrent posts;
+            # anything else (e.g. the recipe deleted meanwhile) is not ours.
+            if violated_constraint(exc) != ReviewService.unique_constraint:
+                raise
+            raise ValidationError(ReviewService.already_reviewed_message)
+        return review
 
-        recipe.number_reviews = F("number_reviews") + 1
-        recipe.save(update_fields=["number_reviews"])
+    @staticmethod
+    @transaction.atomic
+    def update_review(review: Review, validated_data: dict) -> Review:
+        # Lock the row so that the old rating cannot change under us.
+        recipe_id, old_rating = (
+            Review.objects.select_for_update()
+            .values_list("recipe_id", "rating")
+            .get(pk=review.pk)
+        )
+        for field, value in validated_data.items():
+            setattr(review, field, value)
+        review.save()
+        RatingService.apply_change(recipe_id, added=review.rating, removed=old_rating)
+        return review
 
-        recipe.refresh_from_db()
-        return Review.objects.create(author=author, recipe=recipe, **validated_data)
+    @staticmethod
+    @transaction.atomic
+    def delete_review(review: Review) -> None:
+        ratings = list(
+            Review.objects.select_for_update()
+            .filter(pk=review.pk)
+            .values_list("recipe_id", "rating"),
+        )
+        if not ratings:
+            return
+        review.delete()
+        recipe_id, rating = ratings[0]
+        RatingService.apply_change(recipe_id, removed=rating)
 
 
 class LikeService:
+    """
+    Likes are toggled by one statement: a CTE that deletes the like or, if
+    there was none, inserts it, then moves `likes_count` and returns the new
+    state and count.
+
+    With LIKES_FLUSH_INTERVAL > 0 only the count is buffered: the deltas of
+    a recipe add up in the cache and a `recipe.flush_likes` job writes them
+    to `likes_count` at most once per interval. updated_at still moves on
+    every toggle, since `liked_users` changed, so ETags and the change feed
+    see the like at once.
+    """
+
+    toggle_sql = """
+        WITH recipe AS (
+            SELECT id, likes_count FROM {recipe} WHERE slug = %(slug)s
+        ),
+        removed AS (
+            DELETE FROM {likes} AS likes USING recipe
+            WHERE likes.recipe_id = recipe.id AND likes.user_id = %(user)s
+            RETURNING likes.recipe_id
+        ),
+        added AS (
+            INSERT INTO {likes} (recipe_id, user_id)
+            SELECT id, %(user)s FROM recipe
+            WHERE NOT EXISTS (SELECT FROM removed)
+            ON CONFLICT DO NOTHING
+            RETURNING recipe_id
+        ),
+        counted AS (
+            UPDATE {recipe} AS counted
+            SET likes_count = counted.likes_count + CASE WHEN %(write_through)s
+                THEN (SELECT count(*) FROM added) - (SELECT count(*) FROM removed)
+                ELSE 0 END,
+                updated_at = statement_timestamp()
+            FROM recipe
+            WHERE counted.id = recipe.id
+                AND (EXISTS (SELECT FROM added) OR EXISTS (SELECT FROM removed))
+            RETURNING counted.likes_count
+        )
+        SELECT
+            recipe.id,
+            NOT EXISTS (SELECT FROM removed),
+            (SELECT count(*) FROM added) - (SELECT count(*) FROM removed),
+            coalesce((SELECT likes_count FROM counted), recipe.likes_count)
+        FROM recipe
+    """
+
+    @classmethod
+    def toggle_like(cls, user: User, slug: str) -> tuple[bool, int]:
+        """Toggle the like of a recipe; return whether it is liked and its count"""
+        write_through = not settings.LIKES_FLUSH_INTERVAL
+        sql = cls.toggle_sql.format(
+            recipe=Recipe._meta.db_table,
+            likes=Recipe.liked_users.through._meta.db_table,
+        )
+        params = {"slug": slug, "user": user.pk, "write_through": write_through}
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+            if row is None:
+                raise NotFound("No Recipe matches the given query.")
+            recipe_id, liked, delta, likes_count = row
+            if delta:
+                # The through rows were written directly: no m2m_changed signal.
+                transaction.on_commit(partial(bump_model_version, Recipe))
+        if write_through:
+            return liked, likes_count
+        if delta:
+            like_counter.add(recipe_id, delta)
+        return liked, likes_count + like_counter.pending(recipe_id)
+
     @staticmethod
-    def toggle_like(user: User, recipe: Recipe) -> bool:
-        if recipe.liked_users.filter(id=user.id).exists():
-            recipe.liked_users.remove(user)
-            return False
-        else:
-            recipe.liked_users.add(user)
-            return True
+    def recount_likes(recipe_ids) -> None:
+        """Recompute likes_count from the through table"""
+        likes = (
+            Recipe.liked_users.through.objects.filter(recipe_id=OuterRef("pk"))
+            .values("recipe_id")
+            .annotate(count=Count("*"))
+            .values("count")
+        )
+        recount = Coalesce(Subquery(likes), 0)
+        Recipe.objects.filter(pk__in=recipe_ids).exclude(likes_count=recount).update(
+            likes_count=recount,
+            updated_at=Now(),
+        )
+
+
+class LikeCounter:
+    """
+    Like deltas buffered in the default cache (shared by all processes when
+    it is Redis or Memcached) until `flush` writes them to `likes_count`.
+    """
+
+    @staticmethod
+    def key(recipe_id: int) -> str:
+        return f"likes:pending:{recipe_id}"
+
+    def pending(self, recipe_id: int) -> int:
+        return cache.get(self.key(recipe_id), 0)
+
+    def add(self, recipe_id: int, delta: int) -> None:
+        key = self.key(recipe_id)
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            cache.add(key, 0, timeout=None)
+            cache.incr(key, delta)
+        # The first delta since the last flush schedules the next one.
+        interval = settings.LIKES_FLUSH_INTERVAL
+        if cache.add(f"{key}:scheduled", 1, timeout=interval * 2):
+            enqueue("recipe.flush_likes", delay=interval, recipe_id=recipe_id)
+
+    def flush(self, recipe_id: int) -> int:
+        """Write the pending delta of a recipe to its row; return the delta"""
+        key = self.key(recipe_id)
+        cache.delete(f"{key}:scheduled")
+        delta = self.pending(recipe_id)
+        if not delta:
+            return 0
+        with transaction.atomic():
+            Recipe.objects.filter(pk=recipe_id).update(
+                likes_count=Greatest(F("likes_count") + delta, 0),
+                updated_at=Now(),
+            )
+            transaction.on_commit(partial(bump_model_version, Recipe))
+        # Deltas added meanwhile stay pending.
+        cache.decr(key, delta)
+        return delta
+
+
+like_counter = LikeCounter()
@@ -0,0 +1,180 @@
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+import numpy as np
+from scipy import sparse
+
+from core.account.models import User
+from core.recipe.models import Recipe, Review, UserRecommendations
+from core.utils import recommend
+
+logger = logging.getLogger(__name__)
+
+
+class ForYouBuilder:
+    """
+    "For you" recipes of every user with a history, by item-based
+    collaborative filtering.
+
+    Likes (implicit, +1) and review ratings (explicit, -1 for one star to +1
+    for five) form a sparse users x recipes matrix. Recipes are compared by
+    the cosine of the users who interacted with them, keeping the
+    FOR_YOU_NEIGHBORS closest of each; a user's score for a recipe is the sum
+    of its similarities to what they liked, weighted by how much. Users are
+    scored in chunks, on a pool of `processes` processes (0 scores inline).
+    """
+
+    like_weight = 1.0
+
+    def __init__(self, processes: int = 0, chunk_size: int = 1000):
+        self.processes = processes
+        self.chunk_size = chunk_size
+        self.size = settings.FOR_YOU_SIZE
+        self.neighbors = settings.FOR_YOU_NEIGHBORS
+
+    @staticmethod
+    def rows(queryset, width: int) -> np.ndarray:
+        values = queryset.iterator(chunk_size=10000)
+        flat = np.fromiter(chain.from_iterable(values), dtype=np.float64)
+        return flat.reshape(-1, width)
+
+    def load(self):
+        """User ids, recipe ids and the users x recipes interaction matrix"""
+        recipe_ids = np.fromiter(
+            Recipe.objects.order_by("pk").values_list("pk", flat=True),
+            dtype=np.int64,
+        )
+        likes = self.rows(
+            Recipe.liked_users.through.objects.values_list("user_id", "recipe_id"),
+            2,
+        )
+        ratings = self.rows(
+            Review.objects.filter(author__isnull=False).values_list(
+                "author_id",
+                "recipe_id",
+                "rating",
+            ),
+            3,
+        )
+        ratings[:, 2] = (ratings[:, 2] - 3) / 2
+        triples = np.concatenate(
+            [np.column_stack([likes, np.full(len(likes), self.like_weight)]), ratings],
+        )
+        user_ids, rows = np.unique(triples[:, 0].astype(np.int64), return_inverse=True)
+        columns = np.searchsorted(recipe_ids, triples[:, 1].astype(np.int64))
+        # Recipes created after `recipe_ids` was read are left out.
+        known = columns < len(recipe_ids)
+        known[known] = recipe_ids[columns[known]] == triples[known, 1]
+        # A like and a review of the same recipe add up.
+        interactions = sparse.csr_matrix(
+            (triples[known, 2].astype(np.float32), (rows[known], columns[known])),
+            shape=(len(user_ids), len(recipe_ids)),
+        )
+        return user_ids, recipe_ids, interactions
+
+    def chunks(self, users: int, recipes: int):
+        size = recommend.block_rows(recipes, self.chunk_size)
+        return [(start, min(start + size, users)) for start in range(0, users, size)]
+
+    def score(self, interactions, similarity, chunks):
+        """Recommended columns per chunk, in the order of `chunks`"""
+        args = (interactions, similarity, self.size)
+        if not self.processes or not chunks:
+            recommend.init_worker(*args)
+            yield from (recommend.recommend_chunk(*chunk) for chunk in chunks)
+            return
+        executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            # Forked children would share the parent's database connection.
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=recommend.init_worker,
+            initargs=args,
+        )
+        with executor:
+            yield from executor.map(recommend.recommend_chunk, *zip(*chunks))
+
+    def build(self) -> dict:
+        """Store the recommendations of every user with a history; return metrics"""
+        started = timezone.now()
+        timer = time.perf_counter()
+        user_ids, recipe_ids, interactions = self.load()
+        metrics = {
+            "users": len(user_ids),
+            "recipes": len(recipe_ids),
+            "interactions": interactions.nnz,
+            "load_seconds": time.perf_counter() - timer,
+        }
+
+        timer = time.perf_counter()
+        similarity = recommend.item_similarity(interactions, self.neighbors)
+        metrics["similarity_seconds"] = time.perf_counter() - timer
+
+        timer = time.perf_counter()
+        chunks = self.chunks(len(user_ids), len(recipe_ids))
+        results = self.score(interactions, similarity, chunks)
+        for (start, _), recommended in zip(chunks, results):
+            rows = [
+                UserRecommendations(
+                    user_id=int(user_ids[start + offset]),
+                    recipe_ids=recipe_ids[columns].tolist(),
+                )
+                for offset, columns in enumerate(recommended)
+            ]
+            with transaction.atomic():
+                UserRecommendations.objects.bulk_create(
+                    rows,
+                    update_conflicts=True,
+                    unique_fields=["user"],
+                    update_fields=["recipe_ids", "computed_at"],
+                )
+        metrics["score_seconds"] = time.perf_counter() - timer
+        metrics["users_per_second"] = len(user_ids) / max(
+            metrics["score_seconds"],
+            1e-9,
+        )
+
+        # Users without a history any more fall back to popularity.
+        UserRecommendations.objects.filter(computed_at__lt=started).delete()
+        ForYouService.popular_recipe_ids(refresh=True)
+        logger.info("For you recipes built: %s", metrics)
+        return metrics
+
+
+class ForYouService:
+    popular_cache_key = "for_you:popular"
+
+    @classmethod
+    def popular_recipe_ids(cls, refresh: bool = False) -> list[int]:
+        """Most liked and reviewed recipes, for users without a history"""
+        recipe_ids = None if refresh else cache.get(cls.popular_cache_key)
+        if recipe_ids is None:
+            recipe_ids = list(
+                Recipe.objects.order_by(
+                    "-likes_count",
+                    "-number_reviews",
+                    "-avg_rating",
+                    "-id",
+                ).values_list("id", flat=True)[: settings.FOR_YOU_SIZE],
+            )
+            cache.set(cls.popular_cache_key, recipe_ids, settings.FOR_YOU_POPULAR_TTL)
+        return recipe_ids
+
+    @classmethod
+    def get_recipes(cls, user: User) -> list[Recipe]:
+        recipe_ids = (
+            UserRecommendations.objects.filter(user=user)
+            .values_list("recipe_ids", flat=True)
+            .first()
+        )
+        if not recipe_ids:
+            recipe_ids = cls.popular_recipe_ids()
+        recipes = Recipe.objects.with_related().in_bulk(recipe_ids)
+        return [recipes[recipe_id] for recipe_id in recipe_ids if recipe_id in recipes]
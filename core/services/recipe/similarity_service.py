@@ -0,0 +1,127 @@
+from itertools import chain
+
+from django.conf import settings
+from django.db import transaction
+
+import numpy as np
+from rest_framework.exceptions import NotFound
+from scipy import sparse
+
+from core.recipe.models import Recipe, SimilarRecipes
+from core.utils.recommend import block_rows, split_rows, top_k
+
+
+class SimilarRecipesBuilder:
+    """
+    Top-k neighbors of every recipe, scored as a blend of two similarities:
+    cosine over the users who liked both recipes and Jaccard over their
+    ingredients, weighted by SIMILAR_RECIPES_LIKES_WEIGHT.
+
+    Both m2m tables are loaded into CSR matrices (recipes x users, recipes x
+    ingredients). Recipes are scored a dense block of rows at a time: one
+    sparse product per matrix gives every co-like and shared ingredient of
+    the block, so memory follows the block, not the square of the catalog.
+    Ties go to the lowest id.
+    """
+
+    def __init__(self, k: int | None = None, block_size: int = 1024):
+        self.k = k or settings.SIMILAR_RECIPES_K
+        self.block_size = block_size
+        self.likes_weight = settings.SIMILAR_RECIPES_LIKES_WEIGHT
+
+    @staticmethod
+    def incidence(recipe_ids: np.ndarray, through, column: str) -> sparse.csr_matrix:
+        """Binary recipes x `column` matrix of an m2m through table"""
+        pairs = through.objects.values_list("recipe_id", column).iterator(
+            chunk_size=10000,
+        )
+        pairs = np.fromiter(chain.from_iterable(pairs), dtype=np.int64).reshape(-1, 2)
+        rows = np.searchsorted(recipe_ids, pairs[:, 0])
+        # Recipes created after `recipe_ids` was read are left out.
+        known = rows < len(recipe_ids)
+        known[known] = recipe_ids[rows[known]] == pairs[known, 0]
+        columns = np.unique(pairs[known, 1], return_inverse=True)[1]
+        return sparse.csr_matrix(
+            (np.ones(len(columns), dtype=np.float32), (rows[known], columns)),
+            shape=(len(recipe_ids), columns.max(initial=-1) + 1),
+        )
+
+    def load(self):
+        recipe_ids = np.fromiter(
+            Recipe.objects.order_by("pk").values_list("pk", flat=True),
+            dtype=np.int64,
+        )
+        likes = self.incidence(recipe_ids, Recipe.liked_users.through, "user_id")
+        # Rows are binary, so the L2 norm is the square root of the count;
+        # normalized rows make the product of two rows their cosine.
+        norms = np.sqrt(np.diff(likes.indptr)).astype(np.float32)
+        likes = sparse.diags(1 / np.maximum(norms, 1)) @ likes
+        ingredients = self.incidence(
+            recipe_ids,
+            Recipe.ingredients.through,
+            "ingredient_id",
+        )
+        return recipe_ids, likes, ingredients
+
+    def scores(self, likes, ingredients, start: int, stop: int) -> np.ndarray:
+        """Blended similarity of recipes start..stop to every recipe"""
+        scores = (likes[start:stop] @ likes.T).toarray()
+        scores *= self.likes_weight
+
+        sizes = np.diff(ingredients.indptr).astype(np.float32)
+        shared = (ingredients[start:stop] @ ingredients.T).toarray()
+        union = sizes[start:stop, None] + sizes[None, :] - shared
+        scores += (1 - self.likes_weight) * np.divide(
+            shared,
+            union,
+            out=np.zeros_like(shared),
+            where=shared > 0,
+        )
+        # A recipe is not its own neighbor.
+        scores[np.arange(stop - start), np.arange(start, stop)] = 0
+        return scores
+
+    def build(self) -> int:
+        """Store the neighbors of every recipe; return how many were stored"""
+        recipe_ids, likes, ingredients = self.load()
+        block_size = block_rows(len(recipe_ids), self.block_size)
+        for start in range(0, len(recipe_ids), block_size):
+            stop = min(start + block_size, len(recipe_ids))
+            rows, columns, _ = top_k(
+                self.scores(likes, ingredients, start, stop),
+                self.k,
+            )
+            neighbors = split_rows(rows, columns, stop - start)
+            similar = [
+                SimilarRecipes(
+                    recipe_id=int(recipe_ids[start + offset]),
+                    recipe_ids=recipe_ids[columns].tolist(),
+                )
+                for offset, columns in enumerate(neighbors)
+            ]
+            with transaction.atomic():
+                SimilarRecipes.objects.bulk_create(
+                    similar,
+                    update_conflicts=True,
+                    unique_fields=["recipe"],
+                    update_fields=["recipe_ids", "computed_at"],
+                )
+        return len(recipe_ids)
+
+
+class SimilarRecipesService:
+    @staticmethod
+    def get_similar_recipes(slug: str) -> list[Recipe]:
+        """Precomputed neighbors of a recipe: one indexed lookup and one bulk fetch"""
+        recipe_ids = (
+            SimilarRecipes.objects.filter(recipe__slug=slug)
+            .values_list("recipe_ids", flat=True)
+            .first()
+        )
+        if recipe_ids is None:
+            if not Recipe.objects.filter(slug=slug).exists():
+                raise NotFound("No Recipe matches the given query.")
+            # Not built yet.
+            return []
+        recipes = Recipe.objects.with_related().in_bulk(recipe_ids)
+        return [recipes[recipe_id] for recipe_id in recipe_ids if recipe_id in recipes]
@@ -0,0 +1,181 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.core.cache import caches
+
+from dotenv import load_dotenv
+
+from core.utils.http_client import get_client
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+def fetch_temperature(location: str) -> int:
+    """Current temperature at "lat,lon" from tomorrow.io"""
+    headers = {"apikey": os.getenv("TOMORROW_IO_API_KEY")}
+    params = {
+        "location": location,
+        "language": "en",
+        "fields": ["temperature"],
+    }
+
+    response = get_client("weather").get(
+        settings.TOMORROW_IO_URL,
+        headers=headers,
+        params=params,
+    )
+    data = response.json()["data"]
+    return int(data["values"]["temperature"])
+
+
+class WeatherCache:
+    """
+    Temperature cache keyed by a rounded lat/lon grid cell.
+
+    Entries are fresh for `ttl` seconds. After that the stale value is still
+    served for up to `stale_ttl` seconds while a single background refresh
+    runs. Concurrent misses for one cell share a single upstream call: within
+    a process through a shared Future, across processes through a lock key
+    in the cache backend.
+    """
+
+    poll_interval = 0.05
+
+    def __init__(
+        self,
+        fetch=fetch_temperature,
+        ttl=None,
+        stale_ttl=None,
+        grid=None,
+        alias=None,
+        wait_timeout=None,
+    ):
+        self.fetch = fetch
+        self._ttl = ttl
+        self._stale_ttl = stale_ttl
+        self._grid = grid
+        self._alias = alias
+        self._wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._inflight = {}
+
+    # Settings are read lazily so that they can be overridden in tests.
+    @property
+    def ttl(self) -> int:
+        return self._ttl if self._ttl is not None else settings.WEATHER_CACHE_TTL
+
+    @property
+    def stale_ttl(self) -> int:
+        if self._stale_ttl is not None:
+            return self._stale_ttl
+        return settings.WEATHER_CACHE_STALE_TTL
+
+    @property
+    def grid(self) -> float:
+        return self._grid if self._grid is not None else settings.WEATHER_CACHE_GRID
+
+    @property
+    def cache(self):
+        return caches[self._alias or settings.WEATHER_CACHE_ALIAS]
+
+    @property
+    def wait_timeout(self) -> float:
+        if self._wait_timeout is not None:
+            return self._wait_timeout
+        return settings.TOMORROW_IO_TIMEOUT + 1
+
+    def cell(self, location: str) -> str:
+        """Center of the grid cell containing "lat,lon", as "lat,lon" """
+        lat, lon = (float(part) for part in location.split(","))
+        digits = max(0, len(f"{self.grid:g}".partition(".")[2]))
+        lat = round(round(lat / self.grid) * self.grid, digits)
+        lon = round(round(lon / self.grid) * self.grid, digits)
+        return f"{lat:g},{lon:g}"
+
+    def get_temperature(self, location: str) -> int:
+        """
+        Temperature of the grid cell of `location`. Raises
+        concurrent.futures.TimeoutError when a fetch of the same cell by
+        another thread outlasts `wait_timeout`.
+        """
+        cell = self.cell(location)
+        key = f"weather:{cell}"
+        cache = self.cache
+
+        entry = cache.get(key)
+        if entry is None:
+            return self._fetch_coalesced(cache, key, cell)
+        if time.time() - entry["fetched_at"] > self.ttl:
+            self._refresh_in_background(cache, key, cell)
+        return entry["temperature"]
+
+    def _store(self, cache, key: str, temperature: int) -> int:
+        entry = {"temperature": temperature, "fetched_at": time.time()}
+        cache.set(key, entry, timeout=self.ttl + self.stale_ttl)
+        return temperature
+
+    def _fetch_coalesced(self, cache, key: str, cell: str) -> int:
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            return future.result(timeout=self.wait_timeout)
+
+        try:
+            temperature = self._fetch_once(cache, key, cell)
+        except Exception as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(temperature)
+            return temperature
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _fetch_once(self, cache, key: str, cell: str) -> int:
+        lock_key = f"{key}:lock"
+        if not cache.add(lock_key, 1, timeout=self.wait_timeout):
+            # Another process is fetching this cell: wait for its result.
+            deadline = time.monotonic() + self.wait_timeout
+            while time.monotonic() < deadline:
+                time.sleep(self.poll_interval)
+                entry = cache.get(key)
+                if entry is not None:
+                    return entry["temperature"]
+            return self._store(cache, key, self.fetch(cell))
+
+        try:
+            return self._store(cache, key, self.fetch(cell))
+        finally:
+            cache.delete(lock_key)
+
+    def _refresh_in_background(self, cache, key: str, cell: str):
+        lock_key = f"{key}:lock"
+        if cache.add(lock_key, 1, timeout=self.wait_timeout):
+            thread = threading.Thread(
+                target=self._refresh,
+                args=(cache, key, cell, lock_key),
+                daemon=True,
+            )
+            thread.start()
+
+    def _refresh(self, cache, key: str, cell: str, lock_key: str):
+        try:
+            self._store(cache, key, self.fetch(cell))
+        except Exception:
+            # Keep serving the stale value; the next request retries.
+            logger.warning("Weather refresh for %s failed", cell, exc_info=True)
+        finally:
+            cache.delete(lock_key)
+
+
+weather_cache = WeatherCache()
@@ -0,0 +1,7 @@
+from django.db import IntegrityError
+
+
+def violated_constraint(exc: IntegrityError) -> str | None:
+    """Name of the constraint behind an IntegrityError, as PostgreSQL reports it"""
+    diag = getattr(exc.__cause__, "diag", None)
+    return getattr(diag, "constraint_name", None)
@@ -0,0 +1,214 @@
+"""
+Offline IP geolocation.
+
+The database is a single binary file that is memory-mapped by every
+process. It holds the sorted range start addresses as little-endian integer
+arrays (IPv4 as uint32, IPv6 as separate high and low uint64 halves),
+followed by one float32 (lat, lon) pair per range; NaN marks a gap with no
+known location. A lookup is a `bisect` over the mapped arrays, without any
+parsing or copying.
+"""
+
+import ipaddress
+import math
+import mmap
+import os
+import socket
+import struct
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+
+from django.conf import settings
+
+MAGIC = b"RSGEO1"
+HEADER = struct.Struct("<6s2xII")
+COORDINATES = struct.Struct("<ff")
+GAP = COORDINATES.pack(math.nan, math.nan)
+LOW_MASK = (1 << 64) - 1
+IPV4_MAPPED_PREFIX = b"\x00" * 10 + b"\xff\xff"
+
+
+def _pack(ip: str) -> bytes:
+    """Packed form of an IP address; IPv4-mapped IPv6 addresses become IPv4"""
+    try:
+        return socket.inet_pton(socket.AF_INET, ip)
+    except OSError:
+        pass
+    try:
+        packed = socket.inet_pton(socket.AF_INET6, ip)
+    except OSError:
+        raise ValueError(f"{ip!r} is not a valid IP address")
+    if packed.startswith(IPV4_MAPPED_PREFIX):
+        return packed[12:]
+    return packed
+
+
+def _compact(ranges: list, limit: int) -> list:
+    """Turn (start, end, coordinates) ranges into sorted (start, coordinates)"""
+    entries, next_start = [], 0
+    for start, end, coordinates in sorted(ranges):
+        if end < next_start:
+            continue
+        start = max(start, next_start)
+        if start > next_start:
+            entries.append((next_start, GAP))
+        if not entries or entries[-1][1] != coordinates:
+            entries.append((start, coordinates))
+        next_start = end + 1
+    if entries and next_start < limit:
+        entries.append((next_start, GAP))
+    return entries
+
+
+def _uint_array(typecode: str, values) -> bytes:
+    values = array(typecode, values)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values.tobytes()
+
+
+def write_database(path, ranges) -> dict:
+    """
+    Write (start_ip, end_ip, lat, lon) ranges to `path` atomically.
+
+    Returns the number of stored entries per IP version.
+    """
+    by_version = {4: [], 6: []}
+    for start, end, lat, lon in ranges:
+        start, end = ipaddress.ip_address(start), ipaddress.ip_address(end)
+        coordinates = COORDINATES.pack(float(lat), float(lon))
+        by_version[start.version].append((int(start), int(end), coordinates))
+
+    v4 = _compact(by_version[4], 1 << 32)
+    v6 = _compact(by_version[6], 1 << 128)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile("wb", dir=directory, delete=False) as file:
+        file.write(HEADER.pack(MAGIC, len(v4), len(v6)))
+        file.write(_uint_array("I", (start for start, _ in v4)))
+        file.write(_uint_array("Q", (start >> 64 for start, _ in v6)))
+        file.write(_uint_array("Q", (start & LOW_MASK for start, _ in v6)))
+        file.write(b"".join(coordinates for _, coordinates in v4 + v6))
+    os.replace(file.name, path)
+    return {4: len(v4), 6: len(v6)}
+
+
+class _Tables:
+    def __init__(self, buffer):
+        magic, v4_count, v6_count = HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            raise ValueError("Not a GeoIP database")
+
+        offset = HEADER.size
+        self.buffer = buffer
+        self.v4_starts = self._uint_view(buffer, "I", offset, v4_count)
+        offset += v4_count * 4
+        self.v6_high = self._uint_view(buffer, "Q", offset, v6_count)
+        offset += v6_count * 8
+        self.v6_low = self._uint_view(buffer, "Q", offset, v6_count)
+        offset += v6_count * 8
+        self.v4_coordinates = offset
+        self.v6_coordinates = offset + v4_count * COORDINATES.size
+
+    @staticmethod
+    def _uint_view(buffer, typecode: str, offset: int, count: int):
+        size = array(typecode).itemsize
+        view = memoryview(buffer)[offset : offset + count * size]
+        if sys.byteorder == "little":
+            return view.cast(typecode)
+        values = array(typecode, view.tobytes())
+        values.byteswap()
+        return values
+
+
+class GeoIPDatabase:
+    """
+    Per-process reader of the memory-mapped database.
+
+    The file is checked at most once per `check_interval` seconds and
+    reopened when it changed, so a refresh (which replaces the file
+    atomically) is picked up without a restart.
+    """
+
+    check_interval = 1.0
+
+    def __init__(self, path=None):
+        self._path = path
+        self._lock = threading.Lock()
+        self._checked = None
+        self._stamp = None
+        self._tables = None
+
+    @property
+    def path(self):
+        return self._path or settings.GEOIP_PATH
+
+    def _is_checked(self, path, now: float) -> bool:
+        checked = self._checked
+        return (
+            checked is not None
+            and checked[0] == path
+            and now - checked[1] < self.check_interval
+        )
+
+    def _ensure_fresh(self) -> _Tables | None:
+        path = self.path
+        if self._is_checked(path, time.monotonic()):
+            return self._tables
+
+        with self._lock:
+            # Another thread may have (re)loaded the tables while we waited;
+            # `_checked` is only set once they are in place.
+            now = time.monotonic()
+            if self._is_checked(path, now):
+                return self._tables
+            try:
+                stat = os.stat(path)
+            except OSError:
+                self._checked, self._stamp, self._tables = None, None, None
+                return None
+            stamp = (path, stat.st_mtime_ns, stat.st_size, stat.st_ino)
+            if stamp != self._stamp:
+                with open(path, "rb") as file:
+                    # The mapping stays valid after the file is replaced.
+                    buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                self._tables = _Tables(buffer)
+                self._stamp = stamp
+            self._checked = path, now
+        return self._tables
+
+    def lookup(self, ip: str) -> tuple[float, float] | None:
+        """(lat, lon) of an IPv4 or IPv6 address, or None if unknown"""
+        key = _pack(ip)
+        tables = self._ensure_fresh()
+        if tables is None:
+            return None
+
+        value = int.from_bytes(key, "big")
+        if len(key) == 4:
+            index = bisect_right(tables.v4_starts, value) - 1
+            offset = tables.v4_coordinates
+        else:
+            high, low = value >> 64, value & LOW_MASK
+            left = bisect_left(tables.v6_high, high)
+            right = bisect_right(tables.v6_high, high, left)
+            index = bisect_right(tables.v6_low, low, left, right) - 1
+            offset = tables.v6_coordinates
+        if index < 0:
+            return None
+
+        lat, lon = COORDINATES.unpack_from(
+            tables.buffer,
+            offset + index * COORDINATES.size,
+        )
+        if math.isnan(lat):
+            return None
+        return lat, lon
+
+
+geoip_database = GeoIPDatabase()
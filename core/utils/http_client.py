@@ -0,0 +1,256 @@
+"""
+Shared outbound HTTP clients for external APIs.
+
+Every upstream gets one `HttpClient` per process (see `get_client`) with a
+pooled keep-alive session, connect/read timeouts bounded by an overall
+deadline, a few jittered retries for transient failures and a circuit
+breaker that fails fast with `CircuitOpenError` while the upstream is down.
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from core.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(requests.RequestException):
+    """The upstream failed repeatedly; calls are rejected until it recovers"""
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures. Once
+    `reset_timeout` seconds have passed a single trial call is let through:
+    success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return "open"
+        return "half-open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures, self._opened_at, self._trial = 0, None, False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+
+class LatencyMetrics:
+    """Call counters and a window of recent latencies for one client"""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.rejected = 0
+
+    def increment(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def record(self, seconds: float, failed: bool):
+        with self._lock:
+            self.calls += 1
+            self.failures += failed
+            self._latencies.append(seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            counters = {
+                "calls": self.calls,
+                "failures": self.failures,
+                "retries": self.retries,
+                "rejected": self.rejected,
+            }
+
+        def percentile(fraction):
+            if not latencies:
+                return None
+            position = min(len(latencies) - 1, int(len(latencies) * fraction))
+            return round(latencies[position] * 1000, 2)
+
+        return {
+            **counters,
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+            "max_ms": percentile(1),
+        }
+
+
+class HttpClient:
+    def __init__(
+        self,
+        name: str,
+        connect_timeout: float = 1,
+        read_timeout: float = 3,
+        deadline: float = 5,
+        retries: int = 1,
+        backoff: float = 0.1,
+        pool_size: int = 10,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30,
+    ):
+        self.name = name
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.deadline = deadline
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.metrics = LatencyMetrics()
+
+        # urllib3 keeps one pool of keep-alive connections per host.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request, retrying connection errors, timeouts and 429/5xx
+        responses. Raises `CircuitOpenError` without calling the upstream
+        while the circuit is open.
+        """
+        if not self.breaker.allow():
+            self.metrics.increment("rejected")
+            raise CircuitOpenError(f"Circuit for {self.name} is open")
+
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            remaining = self.deadline - (time.monotonic() - started)
+            try:
+                return self._attempt(method, url, remaining, kwargs)
+            except requests.RequestException as exc:
+                delay = random.uniform(0, self.backoff * 2**attempt)
+                elapsed = time.monotonic() - started
+                if (
+                    not self._is_transient(exc)
+                    or attempt >= self.retries
+                    or elapsed + delay >= self.deadline
+                ):
+                    if self._is_transient(exc):
+                        self.breaker.record_failure()
+                    else:
+                        self.breaker.record_success()
+                    raise
+            attempt += 1
+            self.metrics.increment("retries")
+            time.sleep(delay)
+
+    def _attempt(self, method, url, remaining, kwargs) -> requests.Response:
+        timeout = (
+            max(min(self.connect_timeout, remaining), 0.001),
+            max(min(self.read_timeout, remaining), 0.001),
+        )
+        start = time.perf_counter()
+        failed = True
+        try:
+            response = self.session.request(method, url, timeout=timeout, **kwargs)
+            response.raise_for_status()
+            failed = False
+        finally:
+            elapsed = time.perf_counter() - start
+            self.metrics.record(elapsed, failed)
+            logger.debug(
+                "%s %s %s %.1fms%s",
+                self.name,
+                method,
+                url,
+                elapsed * 1000,
+                " failed" if failed else "",
+            )
+        self.breaker.record_success()
+        return response
+
+    @staticmethod
+    def _is_transient(exc: requests.RequestException) -> bool:
+        if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+            return True
+        response = getattr(exc, "response", None)
+        return response is not None and response.status_code in RETRY_STATUSES
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(name: str) -> HttpClient:
+    """The process-wide client configured in OUTBOUND_HTTP[name]"""
+    client = _clients.get(name)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(name)
+            if client is None:
+                options = settings.OUTBOUND_HTTP.get(name, {})
+                client = _clients[name] = HttpClient(name, **options)
+    return client
+
+
+def snapshot() -> dict:
+    """Metrics of every client of this process, by name"""
+    return {name: client.metrics.snapshot() for name, client in list(_clients.items())}
+
+
+metrics.register("http", snapshot)
+
+
+def reset_clients():
+    """Forget configured clients, e.g. after OUTBOUND_HTTP changed"""
+    with _clients_lock:
+        for client in _clients.values():
+            client.session.close()
+        _clients.clear()
+
+
+@receiver(setting_changed)
+def reset_clients_on_setting_change(setting, **kwargs):
+    if setting == "OUTBOUND_HTTP":
+        reset_clients()
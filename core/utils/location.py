@@ -1,5 +1,12 @@
+from django.conf import settings
+
 import requests
 
+from core.utils.geoip import geoip_database
+from core.utils.http_client import get_client
+
+DEFAULT_LOCATION = "50.4501,30.5234"
+
 
 def get_user_ip(request) -> str:
     x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
@@ -11,29 +18,38 @@ def get_user_ip(request) -> str:
 
 
 def get_user_location_by_ip(ip: str) -> str:
-    default_location = "50.4501,30.5234"
     if ip in ("127.0.0.1", "::1", None):
-        return default_location
+        return DEFAULT_LOCATION
+
+    try:
+        coordinates = geoip_database.lookup(ip.strip())
+    except ValueError:
+        return DEFAULT_LOCATION
+
+    if coordinates is not None:
+        lat, lon = coordinates
+        return f"{lat:.4f},{lon:.4f}"
+    if settings.GEOIP_HTTP_FALLBACK:
+        return get_user_location_over_http(ip)
+    return DEFAULT_LOCATION
 
+
+def get_user_location_over_http(ip: str) -> str:
     url = f"http://ip-api.com/json/{ip}"
 
     try:
-        response = requests.get(url=url)
-        response.raise_for_status()
+        response = get_client("geoip").get(url)
         data = response.json()
 
         if data.get("status") != "success":
-            return default_location
-
-        lat = str(data.get("lat"))
-        lon = str(data.get("lon"))
-        location = lat + "," + lon
+            return DEFAULT_LOCATION
 
+        lat = data.get("lat")
+        lon = data.get("lon")
         if lat is None or lon is None:
-            return default_location
-        location = lat + "," + lon
+            return DEFAULT_LOCATION
 
-        return location
+        return f"{lat},{lon}"
 
     except (requests.RequestException, ValueError, KeyError):
-        return default_location
+        return DEFAULT_LOCATION
@@ -0,0 +1,57 @@
+"""
+Periodic report of in-process counters, such as the latencies of the
+outbound HTTP clients and the response cache hit ratio.
+
+Every source registered with `register` is logged by each process as one
+`metrics <source> <json>` line on the `core.utils.metrics` logger, at most
+every METRICS_LOG_INTERVAL seconds, by the first request that finds the
+report due (see `MetricsLogMiddleware`).
+"""
+
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# source name -> callable returning a JSON-serializable snapshot
+sources = {}
+_lock = threading.Lock()
+_last_report = time.monotonic()
+
+
+def register(name: str, snapshot) -> None:
+    sources[name] = snapshot
+
+
+def report() -> None:
+    for name, snapshot in list(sources.items()):
+        logger.info("metrics %s %s", name, json.dumps(snapshot(), sort_keys=True))
+
+
+def report_if_due() -> bool:
+    """Log the report if the interval has passed; return whether it did"""
+    global _last_report
+    interval = settings.METRICS_LOG_INTERVAL
+    if not interval:
+        return False
+    now = time.monotonic()
+    with _lock:
+        if now - _last_report < interval:
+            return False
+        _last_report = now
+    report()
+    return True
+
+
+class MetricsLogMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        report_if_due()
+        return response
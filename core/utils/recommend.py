@@ -0,0 +1,102 @@
+"""
+Item-based collaborative filtering over sparse matrices.
+
+Only NumPy and SciPy: process pool workers import this module without
+setting Django up.
+"""
+
+import numpy as np
+from scipy import sparse
+
+# Upper bound of a dense score block: 64 MB of float32.
+MAX_CELLS = 16 * 1024 * 1024
+
+
+def top_k(scores: np.ndarray, k: int):
+    """
+    Rows, columns and values of the k best positive scores of every row of
+    a dense block, sorted by row, then best score, then lowest column.
+    """
+    k = min(k, scores.shape[1])
+    if not k:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0, dtype=scores.dtype)
+    # Everything scoring at least the k-th best, so that ties at the cut are
+    # settled by column rather than by partition order.
+    kth = np.partition(scores, -k, axis=1)[:, -k]
+    rows, columns = np.nonzero((scores >= kth[:, None]) & (scores > 0))
+    values = scores[rows, columns]
+    order = np.lexsort((columns, -values, rows))
+    rows, columns, values = rows[order], columns[order], values[order]
+    row_starts = np.searchsorted(rows, np.arange(len(scores)))
+    best = np.arange(len(rows)) - row_starts[rows] < k
+    return rows[best], columns[best], values[best]
+
+
+def split_rows(rows: np.ndarray, columns: np.ndarray, count: int) -> list:
+    """The columns of `top_k` as one array per row"""
+    return np.split(columns, np.searchsorted(rows, np.arange(1, count)))
+
+
+def block_rows(columns: int, block_size: int | None = None) -> int:
+    """Rows per dense block of `columns` floats, within MAX_CELLS"""
+    rows = MAX_CELLS // max(columns, 1)
+    return max(1, min(block_size or rows, rows))
+
+
+def item_similarity(interactions: sparse.csr_matrix, neighbors: int):
+    """
+    Cosine similarity of the items (columns) over the users who interacted
+    with them, keeping the `neighbors` most similar items of each.
+    """
+    items = interactions.T.tocsr()
+    items.data = np.ones_like(items.data)
+    # Binary rows: the L2 norm is the square root of the count.
+    norms = np.sqrt(np.diff(items.indptr)).astype(np.float32)
+    items = sparse.diags(1 / np.maximum(norms, 1)) @ items
+    count = items.shape[0]
+    size = block_rows(count)
+
+    blocks = []
+    for start in range(0, count, size):
+        stop = min(start + size, count)
+        similarity = (items[start:stop] @ items.T).toarray()
+        similarity[np.arange(stop - start), np.arange(start, stop)] = 0
+        rows, columns, values = top_k(similarity, neighbors)
+        blocks.append(
+            sparse.csr_matrix(
+                (values, (rows, columns)),
+                shape=(stop - start, count),
+            ),
+        )
+    if not blocks:
+        return sparse.csr_matrix((0, 0), dtype=np.float32)
+    return sparse.vstack(blocks).tocsr()
+
+
+def recommend(interactions: sparse.csr_matrix, similarity, size: int) -> list:
+    """Column indexes of the `size` best unseen items of every user (row)"""
+    scores = (interactions @ similarity).toarray()
+    # Nothing the user has already liked or reviewed, including the stored
+    # zeros of a three star review (or a like and a one star review).
+    seen = np.repeat(np.arange(interactions.shape[0]), np.diff(interactions.indptr))
+    scores[seen, interactions.indices] = 0
+    rows, columns, _ = top_k(scores, size)
+    return split_rows(rows, columns, interactions.shape[0])
+
+
+# Set in every pool worker by `init_worker`, so that the matrices are
+# pickled once per worker rather than once per chunk.
+_worker = {}
+
+
+def init_worker(interactions, similarity, size: int):
+    _worker.update(interactions=interactions, similarity=similarity, size=size)
+
+
+def recommend_chunk(start: int, stop: int) -> list:
+    return recommend(
+        _worker["interactions"][start:stop],
+        _worker["similarity"],
+        _worker["size"],
+    )
@@ -0,0 +1,108 @@
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+
+from core.utils import metrics
+from core.utils.versions import bump_version, get_versions
+
+
+def model_version_name(model) -> str:
+    return f"models:{model._meta.label_lower}"
+
+
+def bump_model_version(model) -> int:
+    """Invalidate every cached response that depends on `model`"""
+    return bump_version(model_version_name(model))
+
+
+class ResponseCache:
+    """
+    Rendered responses keyed by the normalized request and the version
+    stamps of the models they were built from.
+
+    Bumping a model version (see `bump_model_version`) makes every key
+    built from the old one unreachable, so invalidation is a single
+    counter increment; stale entries simply expire. The cache alias is
+    RESPONSE_CACHE_ALIAS (locmem, file based or a shared backend such as
+    Redis), entries live RESPONSE_CACHE_TIMEOUT seconds (0 disables).
+    """
+
+    def __init__(self, alias=None, timeout=None):
+        self._alias = alias
+        self._timeout = timeout
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self):
+        return caches[self._alias or settings.RESPONSE_CACHE_ALIAS]
+
+    @property
+    def timeout(self) -> int:
+        if self._timeout is not None:
+            return self._timeout
+        return settings.RESPONSE_CACHE_TIMEOUT
+
+    def key(self, request, models, parts=()) -> str:
+        versions = get_versions(sorted(model_version_name(model) for model in models))
+        query = sorted(
+            (name, value) for name, values in request.GET.lists() for value in values
+        )
+        key = repr(
+            [
+                request.path,
+                query,
+                getattr(request, "accepted_media_type", None),
+                list(parts),
+                sorted(versions.items()),
+            ],
+        )
+        return f"responses:{hashlib.md5(key.encode()).hexdigest()}"
+
+    def get(self, request, key: str):
+        cached = self.cache.get(key)
+        with self._lock:
+            if cached is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        status, content, headers = cached
+        response = HttpResponse(content, status=status, headers=headers)
+        response["X-Cache"] = "HIT"
+        return get_conditional_response(
+            request,
+            etag=headers.get("ETag"),
+            response=response,
+        )
+
+    def set(self, key: str, response):  # noqa: A003
+        if response.status_code != 200 or response.streaming:
+            return
+        if hasattr(response, "render"):
+            response.render()
+        headers = {
+            header: value
+            for header, value in response.items()
+            if header not in ("Set-Cookie", "X-Cache")
+        }
+        self.cache.set(key, (200, response.content, headers), self.timeout)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / total, 3) if total else None,
+        }
+
+
+response_cache = ResponseCache()
+metrics.register("response_cache", response_cache.snapshot)
@@ -0,0 +1,113 @@
+import functools
+
+from django.db import IntegrityError, connection, transaction
+from django.utils.text import slugify
+
+from core.utils.db import violated_constraint
+
+# Room left in the slug column for a "-<n>" suffix
+SUFFIX_RESERVE = 7
+# Allocations retried when a concurrent insert takes the same slug
+ATTEMPTS = 5
+
+
+def slug_base(model, name: str) -> str:
+    max_length = model._meta.get_field("slug").max_length
+    base = slugify(name)[: max_length - SUFFIX_RESERVE].strip("-")
+    return base or model._meta.model_name
+
+
+def max_suffixes(model, bases) -> dict:
+    """
+    Highest taken suffix for every base in one query: 0 if only the bare
+    base is taken, missing if the base is free.
+
+    The `~>=~`/`~<~` range over `base-` uses the slug pattern-ops index
+    (every slug starting with "base-" sorts between "base-" and "base.").
+    """
+    table = connection.ops.quote_name(model._meta.db_table)
+    sql = f"""
+        SELECT b.base, MAX(
+            CASE WHEN s.slug = b.base THEN 0
+            ELSE substr(s.slug, length(b.base) + 2)::bigint END
+        )
+        FROM unnest(%s::text[]) AS b(base)
+        JOIN {table} AS s
+          ON s.slug = b.base
+          OR (
+            s.slug ~>=~ (b.base || '-')
+            AND s.slug ~<~ (b.base || '.')
+            AND substr(s.slug, length(b.base) + 2) ~ '^[0-9]{{1,18}}$'
+          )
+        GROUP BY b.base
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [sorted(set(bases))])
+        return dict(cursor.fetchall())
+
+
+def allocate_slugs(model, names) -> list[str]:
+    """Unique slugs for a batch of new rows, with a single query"""
+    bases = [slug_base(model, name) for name in names]
+    taken = max_suffixes(model, bases)
+
+    slugs, assigned = [], set()
+    for base in bases:
+        suffix = taken.get(base)
+        if suffix is not None:
+            suffix += 1
+        slug = base if suffix is None else f"{base}-{suffix}"
+        # Another base in the batch may have produced the same slug.
+        while slug in assigned:
+            suffix = (suffix or 0) + 1
+            slug = f"{base}-{suffix}"
+        taken[base] = suffix or 0
+        assigned.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+@functools.cache
+def slug_constraints(table: str) -> frozenset:
+    """Names of the unique constraints on the slug column of `table`"""
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    return frozenset(
+        name
+        for name, constraint in constraints.items()
+        if constraint["unique"] and constraint["columns"] == ["slug"]
+    )
+
+
+def is_slug_conflict(model, exc: IntegrityError) -> bool:
+    return violated_constraint(exc) in slug_constraints(model._meta.db_table)
+
+
+def save_with_slug(instance, save, *args, **kwargs):
+    """
+    Allocate `instance.slug` from its name and `save()` it. A concurrent
+    insert can take the same slug between the two; the save then fails on
+    the unique index and is retried with a fresh allocation.
+    """
+    model = type(instance)
+    for attempt in range(ATTEMPTS):
+        instance.slug = allocate_slugs(model, [instance.name])[0]
+        try:
+            with transaction.atomic():
+                return save(*args, **kwargs)
+        except IntegrityError as exc:
+            if attempt == ATTEMPTS - 1 or not is_slug_conflict(model, exc):
+                raise
+
+
+def bulk_create_with_slugs(model, objs: list) -> list:
+    """`bulk_create` of new rows with slugs allocated for the whole batch"""
+    for attempt in range(ATTEMPTS):
+        for obj, slug in zip(objs, allocate_slugs(model, [obj.name for obj in objs])):
+            obj.slug = slug
+        try:
+            with transaction.atomic():
+                return model.objects.bulk_create(objs)
+        except IntegrityError as exc:
+            if attempt == ATTEMPTS - 1 or not is_slug_conflict(model, exc):
+                raise
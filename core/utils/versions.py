@@ -0,0 +1,43 @@
+import time
+
+from django.core.cache import cache
+
+
+def _version_key(name: str) -> str:
+    return f"version:{name}"
+
+
+def _initial_version() -> int:
+    # Time based start value: an evicted counter never restarts at a number
+    # some process has already seen.
+    return time.time_ns() // 1000
+
+
+def get_version(name: str) -> int:
+    """Return the current version stamp of a named data set"""
+    key = _version_key(name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(name: str) -> int:
+    """Atomically increment the version stamp and return the new value"""
+    key = _version_key(name)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, _initial_version(), timeout=None)
+        return cache.incr(key)
+
+
+def get_versions(names) -> dict:
+    """Return the version stamps of several data sets with one cache read"""
+    keys = {_version_key(name): name for name in names}
+    versions = cache.get_many(keys)
+    for key in keys.keys() - versions.keys():
+        cache.add(key, _initial_version(), timeout=None)
+        versions[key] = cache.get(key)
+    return {keys[key]: version for key, version in versions.items()}